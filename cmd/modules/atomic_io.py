@@ -0,0 +1,99 @@
+"""Cross-process file locks and atomic replace-on-write helpers."""
+
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_fd(fd: int):
+    """Block until an exclusive lock on ``fd`` is held."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:  # pragma: no cover
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+
+def unlock_fd(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:  # pragma: no cover
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on ``path + '.lock'`` for the duration of the block.
+
+    The lock lives in a sidecar file because the data file itself is
+    replaced by rename, which would orphan a lock taken on its inode.
+    """
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        lock_fd(fd)
+        try:
+            yield
+        finally:
+            unlock_fd(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_path(path: str):
+    """Yield a temp path beside ``path`` that is renamed over it on success.
+
+    Readers see either the old or the new file, never a truncated one.
+    """
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    # Keep the real extension last so format-sniffing writers (PIL) still work.
+    suffix = ".tmp" + os.path.splitext(path)[1]
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=suffix)
+    os.close(fd)
+    # mkstemp creates 0600 files; keep the permissions of the file being replaced.
+    try:
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+    except FileNotFoundError:
+        os.chmod(tmp_path, 0o644)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def atomic_write(path: str, data):
+    """Atomically replace ``path`` with ``data`` (``str`` or ``bytes``)."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def atomic_write_yaml(path: str, data):
+    # Imported here so JSON-only callers (the dispatcher's metrics flush) skip yaml.
+    import yaml
+
+    atomic_write(path, yaml.safe_dump(data))
+
+
+def atomic_write_json(path: str, data):
+    atomic_write(path, json.dumps(data, indent=2))
+
+
+def read_json(path: str, default):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return default
@@ -1,15 +1,16 @@
 # cmd_dispatcher.py
 
 import os
-import zipfile
-import shutil
 
 
-def bundleDeployKit():
+def bundleDeployKit(mode="incremental"):
     """
     Bundles the Hookah+ deploy kit: React UI, YAML configs, and Netlify-ready build.
-    Returns path to generated ZIP.
+    Unchanged files reuse their compressed bytes from the previous bundle
+    (pass mode="full" to recompress everything). Returns path to generated ZIP.
     """
+    from deploy_bundle import build_deploy_kit
+
     bundle_name = "hookahplus_deploy_kit.zip"
     output_dir = "dist"
     bundle_path = os.path.join(output_dir, bundle_name)
@@ -23,18 +24,13 @@ def bundleDeployKit():
         "README.md"
     ]
 
-    with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for item in files_to_include:
-            if os.path.isdir(item):
-                for root, _, files in os.walk(item):
-                    for file in files:
-                        full_path = os.path.join(root, file)
-                        arcname = os.path.relpath(full_path, os.path.dirname(item))
-                        zipf.write(full_path, arcname)
-            elif os.path.isfile(item):
-                zipf.write(item, os.path.basename(item))
-
-    return f"✅ Deploy kit bundled at: {bundle_path}"
+    stats = build_deploy_kit(files_to_include, bundle_path, incremental=mode != "full")
+    return (
+        f"✅ Deploy kit bundled at: {bundle_path} "
+        f"({stats['files']} files: {stats['compressed']} compressed, {stats['reused']} reused; "
+        f"{stats['bytes_read']:,} bytes read, {stats['bytes_written']:,} written; "
+        f"{stats['elapsed_seconds']:.2f}s, ~{stats['estimated_seconds_saved']:.2f}s saved)"
+    )
 
 
 def switchDomain(domain_name="hookahplus.net"):
@@ -98,43 +94,51 @@ def registerLoungeConfig(
 ):
     """Registers a YAML config for a new Hookah+ lounge."""
     import yaml
-    import os
-    from slugify import slugify
-
-    if flavor_addons is None:
-        flavor_addons = {
-            "Mint Blast": 2,
-            "Double Apple": 3,
-            "Blue Ice": 1
-        }
-
-    if section_names is None:
-        section_names = ["Main", "VIP"]
-
-    if not slug:
-        slug = slugify(lounge_name)
-
-    config = {
-        "lounge_name": lounge_name,
-        "slug": slug,
-        "session_price": session_price,
-        "flavor_addons": flavor_addons,
-        "sections": section_names,
-        "seat_count": seat_count,
-        "reflex_enabled": True
-    }
-
-    output_dir = "configs/lounges"
+    from lounge_onboarding import INDEX_NAME, LOUNGES_DIR, build_lounge_config, update_index
+
+    config = build_lounge_config(
+        lounge_name,
+        session_price=session_price,
+        flavor_addons=flavor_addons,
+        seat_count=seat_count,
+        section_names=section_names,
+        slug=slug,
+    )
+    if config["slug"] == os.path.splitext(INDEX_NAME)[0]:
+        return f"\u274c Slug '{config['slug']}' is reserved for {INDEX_NAME}"
+
+    output_dir = LOUNGES_DIR
     os.makedirs(output_dir, exist_ok=True)
-    config_path = os.path.join(output_dir, f"{slug}.yaml")
+    config_path = os.path.join(output_dir, f"{config['slug']}.yaml")
 
     try:
         with open(config_path, "w") as f:
             yaml.dump(config, f)
+        update_index(config, output_dir)
         return f"\u2705 Lounge config registered: {config_path}"
     except Exception as e:
         return f"\u274c Failed to write config: {str(e)}"
 
+
+def registerLoungeConfigsBulk(source, on_conflict="error", workers=None):
+    """Registers every lounge in a CSV/JSONL file and rebuilds configs/lounges/index.yaml."""
+    from lounge_onboarding import register_lounges_bulk
+
+    try:
+        report = register_lounges_bulk(
+            source, on_conflict=on_conflict, workers=int(workers) if workers else None
+        )
+    except Exception as e:
+        return f"\u274c Bulk lounge registration failed: {str(e)}"
+
+    lines = [
+        f"\u2705 {report['written']} lounge configs registered in "
+        f"{report['elapsed_seconds']:.2f}s (index: {report['index']})"
+    ]
+    for error in report["errors"]:
+        lines.append(f"\u274c line {error['line']}: {error['error']}")
+    return "\n".join(lines)
+
 def pushPressKit():
     """Simulates pushing the latest press kit assets."""
     # Placeholder for real sync logic
@@ -161,6 +165,7 @@ COMMANDS = {
     "lockTrustDeploy": lockTrustDeploy,
     "alignMainPortalUI": alignMainPortalUI,
     "registerLoungeConfig": registerLoungeConfig,
+    "registerLoungeConfigsBulk": registerLoungeConfigsBulk,
     "pushPressKit": pushPressKit,
     "releaseTeaserVideo": releaseTeaserVideo
 }
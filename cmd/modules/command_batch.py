@@ -0,0 +1,148 @@
+"""Run many ``cmd.*`` dispatcher commands in one process.
+
+A batch file holds one command per line, either ``switchDomain example.com``
+(shell-style words) or ``cmd.switchDomain("example.com")`` (Python literal
+arguments). Lines starting with ``#`` are comments.
+
+Commands run one at a time, in file order. With ``parallel=True``
+(``--batch --parallel``) the commands between ``---`` separators form a
+stage: a stage's commands run concurrently and stages run in order, so a
+parallel batch needs a ``---`` wherever a later command depends on an
+earlier one.
+"""
+
+import ast
+import importlib
+import re
+import shlex
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from command_metrics import METRICS, track
+
+STAGE_SEPARATOR = "---"
+_CALL_RE = re.compile(r"^(?:cmd\.)?(?P<name>[A-Za-z_][\w]*)\s*\((?P<args>.*)\)\s*;?$")
+_NAME_RE = re.compile(r"[A-Za-z_]\w*")
+
+
+def parse_command_line(line: str):
+    """Return ``(name, args)`` for one batch line, or ``None`` for blanks/comments.
+
+    Raises ``ValueError`` for a line whose arguments cannot be parsed.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    match = _CALL_RE.match(line)
+    if match:
+        raw = match.group("args").strip()
+        try:
+            args = ast.literal_eval(f"({raw},)") if raw else ()
+        except (ValueError, SyntaxError) as e:
+            raise ValueError(f"arguments are not Python literals: {e}") from None
+        return match.group("name"), tuple(args)
+    words = shlex.split(line)  # ValueError on an unbalanced quote
+    name = words[0][4:] if words[0].startswith("cmd.") else words[0]
+    if not _NAME_RE.fullmatch(name):
+        raise ValueError(f"not a command name: {words[0]!r}")  # e.g. an unclosed ``cmd.x(``
+    return name, tuple(words[1:])
+
+
+def parse_batch(lines):
+    """Split batch lines into stages of ``(line_number, name, args, error)``.
+
+    ``error`` is ``None`` unless the line could not be parsed; ``run_batch``
+    reports such a line as a failed result and still runs the others.
+    """
+    stages = [[]]
+    for number, line in enumerate(lines, 1):
+        if line.strip() == STAGE_SEPARATOR:
+            if stages[-1]:
+                stages.append([])
+            continue
+        try:
+            parsed = parse_command_line(line)
+        except ValueError as e:
+            name = re.match(r"\s*(?:cmd\.)?(\w*)", line).group(1)
+            stages[-1].append((number, name, (), f"Parse error on line {number}: {e}"))
+            continue
+        if parsed is not None:
+            stages[-1].append((number, *parsed, None))
+    return [stage for stage in stages if stage]
+
+
+def _invoke(name, target, args):
+    """Call a registry entry (callable or ``"module:function"``); runs in pool workers.
+
+    Returns ``(result, error, sample)``; the metrics sample travels back to
+    the parent so process-pool runs are counted too.
+    """
+    if isinstance(target, str):
+        module_name, _, attr = target.partition(":")
+        target = getattr(importlib.import_module(module_name), attr)
+    try:
+        with track(name, record=False) as sample:
+            result = target(*args)
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", sample
+    return result, None, sample
+
+
+def _describe(name, args):
+    return f"{name}({', '.join(repr(a) for a in args)})"
+
+
+def run_batch(stages, commands, workers: int = None, processes: bool = False, out=print, parallel: bool = False):
+    """Run parsed stages against a command registry; returns one result dict per command.
+
+    Commands run sequentially unless ``parallel`` is set, in which case each
+    stage's commands are submitted together. Each command's timing and
+    outcome is recorded in ``command_metrics.METRICS``.
+    """
+    if not parallel:
+        stages = [[entry] for stage in stages for entry in stage]
+        workers = 1
+    spec = getattr(commands, "spec", commands.__getitem__)
+    executor_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    results = []
+    with executor_cls(max_workers=workers) as pool:
+        for stage in stages:
+            futures = []
+            for number, name, args, error in stage:
+                submitted = time.perf_counter()
+                if error is None and name not in commands:
+                    error = f"Unknown command: {name}"
+                if error is not None:
+                    futures.append((number, name, args, submitted, error))
+                    continue
+                futures.append((number, name, args, submitted, pool.submit(_invoke, name, spec(name), args)))
+
+            for number, name, args, submitted, future in futures:
+                entry = {"line": number, "command": name, "args": list(args)}
+                if isinstance(future, str):
+                    entry.update(ok=False, error=future, seconds=0.0)
+                else:
+                    try:
+                        result, error, sample = future.result()
+                        METRICS.record(sample)
+                        if error is None:
+                            entry.update(ok=True, result=result, seconds=sample["wall_seconds"])
+                        else:
+                            entry.update(ok=False, error=error, seconds=sample["wall_seconds"])
+                        entry["cpu_seconds"] = sample["cpu_seconds"]
+                    except Exception as e:
+                        entry.update(ok=False, error=f"{type(e).__name__}: {e}",
+                                     seconds=time.perf_counter() - submitted)
+                results.append(entry)
+                if out:
+                    status = "✅" if entry["ok"] else "❌"
+                    detail = entry["result"] if entry["ok"] else entry["error"]
+                    out(f"{status} [{entry['seconds'] * 1e3:8.1f} ms] {_describe(name, args)} -> {detail}")
+    return results
+
+
+def summarize(results, wall_seconds):
+    ok = sum(1 for r in results if r["ok"])
+    serial = sum(r["seconds"] for r in results)
+    return (f"{ok}/{len(results)} commands succeeded in {wall_seconds * 1e3:.1f} ms wall "
+            f"({serial * 1e3:.1f} ms of command time)")
@@ -0,0 +1,250 @@
+"""Timing, memory and outcome metrics for dispatched ``cmd.*`` commands.
+
+With ``HOOKAHPLUS_METRICS=1``, every command run through ``COMMANDS`` (or
+``command_batch.run_batch``) is measured for:
+
+* wall-clock and CPU time;
+* the process's peak RSS after the call;
+* whether it returned or raised.
+
+Totals accumulate across processes in ``metrics/cmd_dispatcher.json``. Each
+``flush`` also renders ``metrics/cmd_dispatcher.prom`` in the Prometheus
+text format: wall and CPU time histograms, call counters by status, and
+peak-memory gauges.
+
+Profiling is opt-in per command. Set ``HOOKAHPLUS_PROFILE`` to ``cprofile``,
+``tracemalloc`` or both (comma separated), and optionally limit it with
+``HOOKAHPLUS_PROFILE_COMMANDS=bundleDeployKit,...``. cProfile stats
+(``.prof``) and the top tracemalloc allocation sites (``.txt``) are written
+to ``metrics/profiles``; tracemalloc also records the command's Python heap
+peak. Recording is off by default: commands are left unwrapped and nothing
+is written, so a plain dispatch pays no file locks or metrics I/O.
+
+The dispatcher imports this module on every run, so the profilers and the
+file helpers (which pull in ``yaml``) are only imported when needed.
+"""
+
+import _thread
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+METRICS_PATH = os.environ.get(
+    "HOOKAHPLUS_METRICS_PATH", os.path.join(BASE_DIR, "metrics", "cmd_dispatcher.prom")
+)
+PROFILE_DIR = os.path.join(os.path.dirname(METRICS_PATH), "profiles")
+ENABLED = os.environ.get("HOOKAHPLUS_METRICS", "0") != "0"
+PROFILERS = {p.strip() for p in os.environ.get("HOOKAHPLUS_PROFILE", "").split(",") if p.strip()}
+PROFILE_COMMANDS = {c.strip() for c in os.environ.get("HOOKAHPLUS_PROFILE_COMMANDS", "").split(",") if c.strip()}
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+TRACEMALLOC_TOP = 25
+
+
+def peak_rss_bytes():
+    """High-water mark of this process's resident memory, or ``None`` where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _histogram():
+    return {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+
+
+def _observe(histogram, value):
+    for i, bound in enumerate(BUCKETS):
+        if value <= bound:
+            histogram["buckets"][i] += 1
+    histogram["sum"] += value
+    histogram["count"] += 1
+
+
+def _merge_histogram(into, other):
+    into["buckets"] = [a + b for a, b in zip(into["buckets"], other["buckets"])]
+    into["sum"] += other["sum"]
+    into["count"] += other["count"]
+
+
+def _empty_entry():
+    return {"ok": 0, "error": 0, "wall": _histogram(), "cpu": _histogram(),
+            "peak_rss_bytes": None, "python_peak_bytes": None}
+
+
+def _merge_entry(into, other):
+    into["ok"] += other["ok"]
+    into["error"] += other["error"]
+    _merge_histogram(into["wall"], other["wall"])
+    _merge_histogram(into["cpu"], other["cpu"])
+    for key in ("peak_rss_bytes", "python_peak_bytes"):
+        if other[key] is not None:
+            into[key] = max(into[key] or 0, other[key])
+
+
+def _profiled(name):
+    return PROFILERS and (not PROFILE_COMMANDS or name in PROFILE_COMMANDS)
+
+
+def _profile_path(name, suffix):
+    from datetime import datetime
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    return os.path.join(PROFILE_DIR, f"{name}-{stamp}-{os.getpid()}{suffix}")
+
+
+@contextmanager
+def track(name: str, record: bool = True):
+    """Measure the block as one run of command ``name``; yields the sample dict.
+
+    With ``record=False`` the sample is only filled in, so a pool worker can
+    hand it back to the parent process to ``METRICS.record``.
+    """
+    sample = {"command": name, "ok": False}
+    profiler = None
+    if _profiled(name) and "cprofile" in PROFILERS:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    # tracemalloc is process-wide: commands running concurrently share one peak.
+    tracing = _profiled(name) and "tracemalloc" in PROFILERS
+    started_tracing = False
+    if tracing:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        tracemalloc.reset_peak()
+    cpu_start = time.thread_time()
+    wall_start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield sample
+        sample["ok"] = True
+    finally:
+        if profiler:
+            profiler.disable()
+        sample["wall_seconds"] = time.perf_counter() - wall_start
+        sample["cpu_seconds"] = time.thread_time() - cpu_start
+        sample["peak_rss_bytes"] = peak_rss_bytes()
+        if tracing:
+            from atomic_io import atomic_write
+
+            sample["python_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            stats = tracemalloc.take_snapshot().statistics("lineno")[:TRACEMALLOC_TOP]
+            sample["tracemalloc"] = _profile_path(name, ".tracemalloc.txt")
+            atomic_write(sample["tracemalloc"], "".join(f"{stat}\n" for stat in stats))
+            if started_tracing:
+                tracemalloc.stop()
+        if profiler:
+            sample["cprofile"] = _profile_path(name, ".prof")
+            profiler.dump_stats(sample["cprofile"])
+        if record:
+            METRICS.record(sample)
+
+
+class CommandMetrics:
+    """Thread-safe per-command totals, merged into the on-disk state on ``flush``."""
+
+    def __init__(self, path: str = METRICS_PATH):
+        self.path = path
+        self.state_path = os.path.splitext(path)[0] + ".json"
+        self._pending = {}
+        self._lock = _thread.allocate_lock()
+
+    def record(self, sample: dict):
+        if not ENABLED:
+            return
+        with self._lock:
+            entry = self._pending.setdefault(sample["command"], _empty_entry())
+            entry["ok" if sample["ok"] else "error"] += 1
+            _observe(entry["wall"], sample["wall_seconds"])
+            _observe(entry["cpu"], sample["cpu_seconds"])
+            for key in ("peak_rss_bytes", "python_peak_bytes"):
+                if sample.get(key) is not None:
+                    entry[key] = max(entry[key] or 0, sample[key])
+
+    def wrap(self, name: str, fn):
+        """Return ``fn`` instrumented as command ``name`` (the registry's resolve hook)."""
+        if not ENABLED:
+            return fn
+        import functools
+
+        @functools.wraps(fn)
+        def instrumented(*args, **kwargs):
+            with track(name):
+                return fn(*args, **kwargs)
+        return instrumented
+
+    def flush(self):
+        """Merge pending samples into the saved totals and rewrite the Prometheus file."""
+        if not ENABLED:
+            return None
+        from atomic_io import atomic_write, atomic_write_json, file_lock, read_json
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with file_lock(self.state_path):
+            totals = read_json(self.state_path, {})
+            for name, entry in pending.items():
+                _merge_entry(totals.setdefault(name, _empty_entry()), entry)
+            atomic_write_json(self.state_path, totals)
+            atomic_write(self.path, render_prometheus(totals))
+        return self.path
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_histogram(lines, metric, help_text, totals, key):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    for name, entry in sorted(totals.items()):
+        histogram, label = entry[key], _label(name)
+        for bound, count in zip(BUCKETS, histogram["buckets"]):
+            lines.append(f'{metric}_bucket{{command="{label}",le="{bound}"}} {count}')
+        lines.append(f'{metric}_bucket{{command="{label}",le="+Inf"}} {histogram["count"]}')
+        lines.append(f'{metric}_sum{{command="{label}"}} {histogram["sum"]:.6f}')
+        lines.append(f'{metric}_count{{command="{label}"}} {histogram["count"]}')
+
+
+def render_prometheus(totals: dict):
+    """Render saved totals in the Prometheus text exposition format."""
+    lines = []
+    _render_histogram(lines, "hookahplus_command_duration_seconds",
+                      "Wall-clock time of dispatched commands.", totals, "wall")
+    _render_histogram(lines, "hookahplus_command_cpu_seconds",
+                      "CPU time of dispatched commands (calling thread).", totals, "cpu")
+    lines.append("# HELP hookahplus_command_calls_total Dispatched commands by outcome.")
+    lines.append("# TYPE hookahplus_command_calls_total counter")
+    for name, entry in sorted(totals.items()):
+        for status in ("ok", "error"):
+            lines.append(f'hookahplus_command_calls_total{{command="{_label(name)}",status="{status}"}} {entry[status]}')
+    gauges = (
+        ("peak_rss_bytes", "hookahplus_command_peak_rss_bytes", "Highest process RSS seen after the command."),
+        ("python_peak_bytes", "hookahplus_command_python_peak_bytes", "Highest Python heap peak under tracemalloc."),
+    )
+    for key, metric, help_text in gauges:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for name, entry in sorted(totals.items()):
+            if entry[key] is not None:
+                lines.append(f'{metric}{{command="{_label(name)}"}} {entry[key]}')
+    return "\n".join(lines) + "\n"
+
+
+METRICS = CommandMetrics()
@@ -0,0 +1,57 @@
+"""Lazy ``cmd.*`` registry: commands resolve to callables on first use."""
+
+import importlib
+from collections.abc import Mapping
+
+
+class LazyCommandRegistry(Mapping):
+    """Map command names to callables or ``"module:function"`` paths.
+
+    String entries are imported only when that command is looked up, so
+    dispatching one command never pays for importing every module in the
+    registry. Resolved callables are cached. ``wrap(name, fn)``, if given,
+    is applied once to every resolved callable (e.g. to instrument it).
+    """
+
+    def __init__(self, commands=None, wrap=None):
+        self._specs = dict(commands or {})
+        self._resolved = {}
+        self._wrap = wrap
+
+    def register(self, name: str, target):
+        self._specs[name] = target
+        self._resolved.pop(name, None)
+
+    def spec(self, name: str):
+        """Return the raw registry entry (callable or import path) without importing."""
+        return self._specs[name]
+
+    def __getitem__(self, name):
+        try:
+            return self._resolved[name]
+        except KeyError:
+            pass
+        target = self._specs[name]
+        if isinstance(target, str):
+            module_name, _, attr = target.partition(":")
+            target = getattr(importlib.import_module(module_name), attr)
+        if self._wrap is not None:
+            target = self._wrap(name, target)
+        self._resolved[name] = target
+        return target
+
+    def __contains__(self, name):
+        # Mapping's default goes through __getitem__, which would import the module.
+        return name in self._specs
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def __len__(self):
+        return len(self._specs)
+
+    def preload(self):
+        """Resolve every command now (the old eager behaviour)."""
+        for name in self._specs:
+            self[name]
+        return self
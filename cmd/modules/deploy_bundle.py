@@ -0,0 +1,185 @@
+"""Incremental, parallel builder for the Hookah+ deploy-kit ZIP.
+
+A JSON manifest beside the ZIP records, per entry, the source file's size,
+mtime and SHA-256 plus where its compressed bytes sit in the ZIP. On the
+next build, unchanged files (same size and mtime, or same hash) have their
+already-deflated bytes copied straight from the previous ZIP; only changed
+files are read and compressed, in parallel (zlib releases the GIL).
+"""
+
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from atomic_io import atomic_path
+
+MANIFEST_VERSION = 1
+COMPRESSION_LEVEL = 6
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_ZIP_VERSION = 20
+_UNIX = 3
+_UTF8_FLAG = 0x800
+
+
+def collect_sources(files_to_include):
+    """Yield ``(full_path, arcname)`` pairs using bundleDeployKit's naming rules."""
+    for item in files_to_include:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for file in sorted(files):
+                    full_path = os.path.join(root, file)
+                    yield full_path, os.path.relpath(full_path, os.path.dirname(item)).replace(os.sep, "/")
+        elif os.path.isfile(item):
+            yield item, os.path.basename(item)
+
+
+def _dos_datetime(mtime):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), \
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+def _compress_file(full_path):
+    with open(full_path, "rb") as f:
+        data = f.read()
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15)
+    packed = compressor.compress(data) + compressor.flush()
+    return {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "crc": zlib.crc32(data) & 0xFFFFFFFF,
+        "size": len(data),
+        "compressed_size": len(packed),
+    }, packed
+
+
+def _hash_file(full_path):
+    digest = hashlib.sha256()
+    with open(full_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return {"entries": {}}
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"entries": {}}
+    return manifest
+
+
+def build_deploy_kit(files_to_include, bundle_path, incremental: bool = True, workers: int = None):
+    """Build ``bundle_path`` from ``files_to_include`` and return a stats dict."""
+    start = time.perf_counter()
+    manifest_path = os.path.splitext(bundle_path)[0] + ".manifest.json"
+    previous = {"entries": {}}
+    if incremental and os.path.exists(bundle_path):
+        previous = load_manifest(manifest_path)
+        # Offsets are only valid for the exact ZIP the manifest was written with.
+        if previous.get("bundle_size") != os.path.getsize(bundle_path):
+            previous = {"entries": {}, "compress_bytes_per_second": previous.get("compress_bytes_per_second")}
+    old_entries = previous["entries"]
+
+    stats = {"files": 0, "reused": 0, "compressed": 0, "bytes_read": 0, "bytes_written": 0,
+             "reused_bytes": 0}
+    plan = []  # (arcname, full_path, stat, reuse_entry or None)
+    for full_path, arcname in collect_sources(files_to_include):
+        st = os.stat(full_path)
+        old = old_entries.get(arcname)
+        reuse = None
+        if old and old["size"] == st.st_size:
+            if old["mtime_ns"] == st.st_mtime_ns:
+                reuse = old
+            else:
+                stats["bytes_read"] += st.st_size
+                if _hash_file(full_path) == old["sha256"]:
+                    reuse = old
+        plan.append((arcname, full_path, st, reuse))
+
+    to_compress = [full_path for _, full_path, _, reuse in plan if reuse is None]
+    compress_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        compressed = dict(zip(to_compress, pool.map(_compress_file, to_compress)))
+    compress_seconds = time.perf_counter() - compress_start
+
+    os.makedirs(os.path.dirname(os.path.abspath(bundle_path)), exist_ok=True)
+    new_entries = {}
+    central = []
+    with atomic_path(bundle_path) as tmp_path:
+        old_zip = open(bundle_path, "rb") if any(reuse for *_, reuse in plan) else None
+        try:
+            with open(tmp_path, "wb") as out:
+                for arcname, full_path, st, reuse in plan:
+                    if reuse is not None:
+                        info = {k: reuse[k] for k in ("sha256", "crc", "size", "compressed_size")}
+                        old_zip.seek(reuse["data_offset"])
+                        packed = old_zip.read(reuse["compressed_size"])
+                        stats["reused"] += 1
+                        stats["reused_bytes"] += info["size"]
+                    else:
+                        info, packed = compressed[full_path]
+                        stats["compressed"] += 1
+                        stats["bytes_read"] += info["size"]
+                    if info["size"] > 0xFFFFFFFF or info["compressed_size"] > 0xFFFFFFFF:
+                        raise ValueError(f"{arcname} is too large for a non-ZIP64 deploy kit")
+
+                    name = arcname.encode("utf-8")
+                    flags = 0 if name.isascii() else _UTF8_FLAG
+                    dos_time, dos_date = _dos_datetime(st.st_mtime)
+                    header_offset = out.tell()
+                    out.write(_LOCAL_HEADER.pack(
+                        b"PK\x03\x04", _ZIP_VERSION, 0, flags, zlib.DEFLATED, dos_time, dos_date,
+                        info["crc"], info["compressed_size"], info["size"], len(name), 0,
+                    ))
+                    out.write(name)
+                    data_offset = out.tell()
+                    out.write(packed)
+                    central.append((name, flags, dos_time, dos_date, info, st.st_mode, header_offset))
+                    new_entries[arcname] = {**info, "mtime_ns": st.st_mtime_ns, "data_offset": data_offset}
+
+                if len(central) > 0xFFFF:
+                    raise ValueError("Too many files for a non-ZIP64 deploy kit")
+                central_offset = out.tell()
+                for name, flags, dos_time, dos_date, info, mode, header_offset in central:
+                    out.write(_CENTRAL_HEADER.pack(
+                        b"PK\x01\x02", _ZIP_VERSION, _UNIX, _ZIP_VERSION, 0, flags, zlib.DEFLATED,
+                        dos_time, dos_date, info["crc"], info["compressed_size"], info["size"],
+                        len(name), 0, 0, 0, 0, (mode & 0xFFFF) << 16, header_offset,
+                    ))
+                    out.write(name)
+                central_size = out.tell() - central_offset
+                out.write(_END_RECORD.pack(
+                    b"PK\x05\x06", 0, 0, len(central), len(central), central_size, central_offset, 0,
+                ))
+                stats["bytes_written"] = out.tell()
+        finally:
+            if old_zip is not None:
+                old_zip.close()
+
+    rate = previous.get("compress_bytes_per_second")
+    compressed_bytes = sum(info["size"] for info, _ in compressed.values())
+    # Tiny rebuilds are dominated by pool overhead, so keep the stored rate unless
+    # this run compressed enough data to measure throughput meaningfully.
+    if compressed_bytes and compress_seconds > 0 and (compressed_bytes >= 1 << 20 or not rate):
+        rate = compressed_bytes / compress_seconds
+    stats["files"] = len(plan)
+    stats["elapsed_seconds"] = time.perf_counter() - start
+    stats["estimated_seconds_saved"] = stats["reused_bytes"] / rate if rate else 0.0
+
+    with atomic_path(manifest_path) as tmp_manifest:
+        with open(tmp_manifest, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "bundle_size": stats["bytes_written"],
+                       "compress_bytes_per_second": rate, "entries": new_entries}, f, indent=1)
+    return stats
@@ -0,0 +1,242 @@
+"""Incremental flavor leaderboard fed by checkout flavor events.
+
+Each event logged by ``inject_flavor_metadata_stripe`` / ``ingest_stripe_events``
+(``{"timestamp", "flavor_combo", ...}``) counts once for every flavor in its
+combo (``"Peach + Mint"`` -> ``Peach``, ``Mint``). Counts are kept all-time and
+over sliding windows (last hour, day, week). A window is a ring of time
+buckets; when a bucket expires its counts are subtracted, so nothing is ever
+rescanned. Every window keeps its flavors in a list sorted by count, so
+``top(k)`` is a slice of ``k`` entries.
+
+The engine state (counters plus a cursor into the flavor log) is pickled
+beside the leaderboard, so ``catch_up`` only reads events logged since the
+last save, starting at the cursor's journal offset.
+"""
+
+import os
+import pickle
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+import yaml
+
+from atomic_io import atomic_write, atomic_write_yaml, file_lock
+from journal import JournalCursor
+from log_streams import event_time, split_combo
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+LEADERBOARD_PATH = os.path.join(BASE_DIR, "data", "flavor_leaderboard.yaml")
+STATE_PATH = os.path.join(BASE_DIR, "data", "flavor_leaderboard.state.pickle")
+STATE_VERSION = 2
+
+# window name -> (span seconds, bucket seconds)
+WINDOWS = {
+    "hour": (3600, 60),
+    "day": (86400, 3600),
+    "week": (7 * 86400, 3600),
+}
+
+
+class RankedCounter:
+    """Counts kept alongside a list of ``(-count, name)`` in sorted order."""
+
+    def __init__(self):
+        self.counts = {}
+        self._order = []
+
+    def add(self, name, delta):
+        old = self.counts.get(name, 0)
+        new = old + delta
+        if old:
+            del self._order[bisect_left(self._order, (-old, name))]
+        if new > 0:
+            self.counts[name] = new
+            insort(self._order, (-new, name))
+        else:
+            self.counts.pop(name, None)
+
+    def top(self, k):
+        return [(name, -negative) for negative, name in self._order[:k]]
+
+    def __len__(self):
+        return len(self.counts)
+
+
+class SlidingWindow:
+    """Per-flavor counts over the last ``span`` seconds, in ``bucket`` second steps."""
+
+    def __init__(self, span: int, bucket: int):
+        self.bucket = bucket
+        self.slots = span // bucket
+        self.ranked = RankedCounter()
+        self._buckets = {}  # bucket index -> Counter
+        self._indices = []  # live bucket indices, ascending
+        self._head = None  # newest bucket index seen
+
+    def advance(self, now: float):
+        """Expire every bucket that has fallen out of the window ending at ``now``."""
+        index = int(now // self.bucket)
+        if self._head is None or index > self._head:
+            self._head = index
+        cutoff = self._head - self.slots
+        while self._indices and self._indices[0] <= cutoff:
+            for name, count in self._buckets.pop(self._indices.pop(0)).items():
+                self.ranked.add(name, -count)
+
+    def add(self, names, at: float, count: int = 1):
+        self.advance(at)
+        index = int(at // self.bucket)
+        if index <= self._head - self.slots:
+            return  # older than the window
+        bucket = self._buckets.get(index)
+        if bucket is None:
+            bucket = self._buckets[index] = Counter()
+            if not self._indices or index > self._indices[-1]:
+                self._indices.append(index)
+            else:
+                insort(self._indices, index)
+        for name in names:
+            bucket[name] += count
+            self.ranked.add(name, count)
+
+
+class FlavorLeaderboard:
+    """All-time and sliding-window flavor rankings, updated one event at a time."""
+
+    def __init__(self):
+        self.all_time = RankedCounter()
+        self.windows = {name: SlidingWindow(*spec) for name, spec in WINDOWS.items()}
+        self.cursor = JournalCursor()  # how far into the flavor log catch_up has read
+        self.latest = None  # epoch seconds of the newest event
+
+    def record(self, flavor_combo: str, timestamp=None, count: int = 1):
+        """Fold one checkout into every counter."""
+        names = split_combo(flavor_combo)
+        at = event_time(timestamp)
+        for name in names:
+            self.all_time.add(name, count)
+        for window in self.windows.values():
+            window.add(names, at, count)
+        if self.latest is None or at > self.latest:
+            self.latest = at
+
+    def consume(self, events):
+        """Fold a batch of flavor events (dicts with ``flavor_combo``/``timestamp``)."""
+        n = 0
+        for event in events:
+            if event.get("flavor_combo"):
+                self.record(event["flavor_combo"], event.get("timestamp"))
+            n += 1
+        return n
+
+    def catch_up(self, events):
+        """Consume new events from ``stripe_integration.iter_flavor_log_since(self.cursor)``."""
+        return self.consume(events)
+
+    def top(self, k: int = 10, window: str = "all", now: float = None):
+        """Return ``[(flavor, count)]`` for the ``k`` best sellers in ``window``."""
+        if window == "all":
+            return self.all_time.top(k)
+        try:
+            sliding = self.windows[window]
+        except KeyError:
+            raise ValueError(f"Unknown window: {window} (expected all, {', '.join(WINDOWS)})") from None
+        sliding.advance(time.time() if now is None else now)
+        return sliding.ranked.top(k)
+
+    def count(self, flavor: str, window: str = "all", now: float = None):
+        if window == "all":
+            return self.all_time.counts.get(flavor, 0)
+        sliding = self.windows[window]
+        sliding.advance(time.time() if now is None else now)
+        return sliding.ranked.counts.get(flavor, 0)
+
+    def save(self, path: str = STATE_PATH):
+        payload = pickle.dumps({"version": STATE_VERSION, "board": self}, pickle.HIGHEST_PROTOCOL)
+        with file_lock(path):
+            atomic_write(path, payload)
+        return path
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH):
+        """Return the saved engine, or a fresh one if there is no usable state."""
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return cls()
+        if state.get("version") != STATE_VERSION:
+            return cls()
+        return state["board"]
+
+
+def write_leaderboard(board: FlavorLeaderboard, path: str = LEADERBOARD_PATH, baseline: dict = None):
+    """Rewrite ``flavor_leaderboard.yaml`` with live sales counts.
+
+    ``sales`` becomes the flavor's ``baseline`` (historical sales before event
+    logging began) plus its all-time checkout count; ``loyalty`` and
+    ``burnout`` are kept as they are. Flavors seen only in events are added.
+    """
+    with file_lock(path):
+        rows = []
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                rows = yaml.safe_load(f) or []
+        by_name = {row["name"]: row for row in rows}
+        baseline = baseline or {}
+        for name in set(by_name) | set(board.all_time.counts) | set(baseline):
+            row = by_name.setdefault(name, {"name": name, "sales": 0, "loyalty": 0.0, "burnout": 0.0})
+            row["sales"] = baseline.get(name, 0) + board.all_time.counts.get(name, 0)
+        rows = sorted(by_name.values(), key=lambda row: (-row["sales"], row["name"]))
+        atomic_write(path, yaml.safe_dump(rows, sort_keys=False))
+    return path
+
+
+_board = None
+
+
+def get_flavor_leaderboard(attach: bool = True):
+    """Load the saved engine once per process and follow new flavor events in memory."""
+    global _board
+    if _board is None:
+        import stripe_integration
+
+        _board = FlavorLeaderboard.load()
+        _follow_flavor_log()
+        if attach:
+            stripe_integration.add_flavor_listener(_follow_flavor_log)
+    return _board
+
+
+def _follow_flavor_log(events=None):
+    # Read from the cursor rather than folding ``events`` directly, so the
+    # cursor stays in step with what the board has counted.
+    import stripe_integration
+
+    return _board.catch_up(stripe_integration.iter_flavor_log_since(_board.cursor))
+
+
+def refresh_flavor_leaderboard(k: int = 5):
+    """Catch up on logged flavor events, save state and rewrite the leaderboard file."""
+    start = time.perf_counter()
+    board = get_flavor_leaderboard(attach=False)
+    _follow_flavor_log()  # also pick up other processes' events
+    baseline_path = os.path.splitext(STATE_PATH)[0] + ".baseline.yaml"
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r") as f:
+            baseline = yaml.safe_load(f) or {}
+    else:
+        # The first refresh freezes the static numbers as pre-logging history.
+        baseline = {}
+        if os.path.exists(LEADERBOARD_PATH):
+            with open(LEADERBOARD_PATH, "r") as f:
+                baseline = {row["name"]: row.get("sales", 0) for row in yaml.safe_load(f) or []}
+        atomic_write_yaml(baseline_path, baseline)
+    board.save()
+    write_leaderboard(board, baseline=baseline)
+    leaders = ", ".join(f"{name} ({count})" for name, count in board.top(k, "day"))
+    return (
+        f"🏆 Flavor leaderboard refreshed from {board.cursor.count} events in "
+        f"{(time.perf_counter() - start) * 1e3:.1f} ms; top today: {leaders or 'none'}"
+    )
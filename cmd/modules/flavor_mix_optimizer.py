@@ -0,0 +1,279 @@
+"""Branch-and-bound search for the best 2- and 3-flavor mixes.
+
+A mix scores the mean of its flavors' own scores plus the mean of its pair
+scores:
+
+* flavor score = ``sales`` (log-scaled against ``sales_scale``, the
+  catalog's best seller unless fixed) and ``loyalty`` rewarded, ``burnout``
+  penalised;
+* pair score = a synergy bonus for flavors whose name/notes words don't
+  overlap, minus a fatigue penalty growing with both flavors' burnout.
+
+Flavors are searched in descending flavor-score order, so the best possible
+completion of a partial mix is bounded by the next flavor scores plus the
+largest possible pair score; branches that cannot beat the current top
+results are cut. Pair scores are memoised, and ``update_flavor`` re-runs the
+search only for mixes containing the changed flavor, reusing a reserve of
+ranked mixes for everything else. An update that moves the best seller's
+sales changes every flavor score, so it re-scores and re-searches everything.
+"""
+
+import heapq
+import math
+import os
+import pickle
+import re
+import time
+
+import yaml
+
+from atomic_io import atomic_write, file_lock
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+LEADERBOARD_PATH = os.path.join(BASE_DIR, "data", "flavor_leaderboard.yaml")
+PROFILES_PATH = os.path.join(BASE_DIR, "data", "flavor_profiles.yaml")
+STATE_PATH = os.path.join(BASE_DIR, "data", "flavor_mix.state.pickle")
+STATE_VERSION = 2
+
+DEFAULT_WEIGHTS = {"sales": 0.45, "loyalty": 0.4, "burnout": 0.3, "synergy": 0.2, "fatigue": 0.15}
+_WORD = re.compile(r"[a-z]+")
+_STOPWORDS = {"a", "and", "the", "with", "of", "finish", "classic", "smooth"}
+
+
+def load_catalog(leaderboard_path: str = LEADERBOARD_PATH, profiles_path: str = PROFILES_PATH):
+    """Return ``{name: {"sales", "loyalty", "burnout", "notes"}}`` from the data files."""
+    catalog = {}
+    if os.path.exists(leaderboard_path):
+        with open(leaderboard_path, "r") as f:
+            for row in yaml.safe_load(f) or []:
+                catalog[row["name"]] = {
+                    "sales": float(row.get("sales") or 0),
+                    "loyalty": float(row.get("loyalty") or 0),
+                    "burnout": float(row.get("burnout") or 0),
+                    "notes": "",
+                }
+    if os.path.exists(profiles_path):
+        with open(profiles_path, "r") as f:
+            for row in yaml.safe_load(f) or []:
+                if row.get("name") in catalog:
+                    catalog[row["name"]]["notes"] = row.get("notes") or ""
+    return catalog
+
+
+class FlavorMixOptimizer:
+    """Top-N flavor mixes per size with memoised pair scores."""
+
+    def __init__(self, catalog: dict, sizes=(2, 3), top_n: int = 5, reserve: int = 4,
+                 weights: dict = None, sales_scale: float = None):
+        self.catalog = {name: dict(stats) for name, stats in catalog.items()}
+        self.sizes = tuple(sizes)
+        self.top_n = top_n
+        self.reserve_size = top_n * reserve
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self._fixed_scale = sales_scale
+        self.sales_scale = self._scale()
+        self._unary = {}
+        self._words = {}
+        self._pairs = {}
+        self._pair_keys = {}  # flavor -> memo keys that involve it
+        self._reserve = {}  # size -> [(score, mix)] best first
+        self._complete = {}  # size -> True when the reserve holds every mix
+        self.stats = {"pair_evaluations": 0, "nodes": 0}
+        for name in self.catalog:
+            self._score_flavor(name)
+        self._sort()
+
+    def _score_flavor(self, name):
+        stats, w = self.catalog[name], self.weights
+        sales = math.log1p(max(0.0, stats["sales"])) / math.log1p(self.sales_scale)
+        self._unary[name] = w["sales"] * sales + w["loyalty"] * stats["loyalty"] / 10 - w["burnout"] * stats["burnout"] / 10
+        words = set(_WORD.findall(f"{name} {stats.get('notes', '')}".lower())) - _STOPWORDS
+        self._words[name] = words
+
+    def _scale(self):
+        return self._fixed_scale or max([s["sales"] for s in self.catalog.values()] + [1.0])
+
+    def _rescale(self):
+        """Re-score every flavor if ``sales_scale`` moved; returns True if it did."""
+        scale = self._scale()
+        if scale == self.sales_scale:
+            return False
+        self.sales_scale = scale
+        for name in self.catalog:
+            self._score_flavor(name)
+        return True
+
+    def _rank(self, size):
+        ranked = self._search(size, self.reserve_size)
+        self._reserve[size] = ranked
+        self._complete[size] = len(ranked) < self.reserve_size
+
+    def _sort(self):
+        self._order = sorted(self.catalog, key=lambda n: (-self._unary[n], n))
+        min_burnout = min([s["burnout"] for s in self.catalog.values()] + [0.0])
+        # Largest pair score any two flavors could reach: full synergy, least fatigue.
+        self._pair_bound = self.weights["synergy"] - self.weights["fatigue"] * max(0.0, min_burnout) ** 2 / 100
+
+    def pair(self, a, b):
+        key = (a, b) if a < b else (b, a)
+        score = self._pairs.get(key)
+        if score is None:
+            self.stats["pair_evaluations"] += 1
+            wa, wb = self._words[a], self._words[b]
+            overlap = len(wa & wb) / len(wa | wb) if wa or wb else 0.0
+            burn = self.catalog[a]["burnout"] * self.catalog[b]["burnout"] / 100
+            score = self.weights["synergy"] * (1 - overlap) - self.weights["fatigue"] * burn
+            self._pairs[key] = score
+            self._pair_keys.setdefault(a, set()).add(key)
+            self._pair_keys.setdefault(b, set()).add(key)
+        return score
+
+    def _forget_pairs(self, name):
+        for key in self._pair_keys.pop(name, ()):
+            self._pairs.pop(key, None)
+            other = key[0] if key[1] == name else key[1]
+            self._pair_keys.get(other, set()).discard(key)
+
+    def _search(self, size, limit, forced=None):
+        """Return the best ``limit`` mixes of ``size`` flavors (all containing ``forced`` if given)."""
+        chosen0 = [forced] if forced else []
+        pool = [n for n in self._order if n != forced]
+        unary = [self._unary[n] for n in pool]
+        prefix = [0.0]
+        for value in unary:
+            prefix.append(prefix[-1] + value)
+        n_pairs = size * (size - 1) // 2
+        pair_bound = self._pair_bound
+        heap = []
+
+        def dfs(start, chosen, usum, psum):
+            remaining = size - len(chosen)
+            if remaining == 0:
+                score = usum / size + psum / n_pairs
+                item = (score, tuple(sorted(chosen)))
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+                return
+            missing_pairs = n_pairs - len(chosen) * (len(chosen) - 1) // 2
+            for i in range(start, len(pool) - remaining + 1):
+                self.stats["nodes"] += 1
+                # pool is sorted by flavor score, so the bound only shrinks as i grows.
+                bound = (usum + prefix[i + remaining] - prefix[i]) / size + (psum + missing_pairs * pair_bound) / n_pairs
+                if len(heap) >= limit and bound <= heap[0][0]:
+                    break
+                name = pool[i]
+                added = sum(self.pair(name, other) for other in chosen)
+                chosen.append(name)
+                dfs(i + 1, chosen, usum + unary[i], psum + added)
+                chosen.pop()
+
+        if forced is None or forced in self.catalog:
+            dfs(0, chosen0, sum(self._unary[n] for n in chosen0), 0.0)
+        return sorted(heap, reverse=True)
+
+    def optimize(self):
+        """Search every size from scratch; returns ``{size: [(score, mix)]}``."""
+        for size in self.sizes:
+            self._rank(size)
+        return self.results()
+
+    def results(self):
+        return {size: self._reserve.get(size, [])[: self.top_n] for size in self.sizes}
+
+    def update_flavor(self, name, **stats):
+        """Apply new stats for one flavor (or add it) and refresh the rankings incrementally.
+
+        Mixes without ``name`` keep their scores, so the reserve still ranks
+        them exactly; only mixes containing ``name`` are searched again.
+        """
+        self.catalog.setdefault(name, {"sales": 0.0, "loyalty": 0.0, "burnout": 0.0, "notes": ""}).update(stats)
+        self._forget_pairs(name)
+        rescaled = self._rescale()
+        self._score_flavor(name)
+        self._sort()
+        for size in self.sizes:
+            if size not in self._reserve:
+                continue
+            kept = [item for item in self._reserve[size] if name not in item[1]]
+            complete = self._complete[size]
+            if rescaled or (not complete and len(kept) < self.top_n):
+                self._rank(size)
+                continue
+            merged = sorted(kept + self._search(size, self.reserve_size, forced=name), reverse=True)
+            if not complete:
+                # Past the last kept mix there may be unseen mixes without ``name``.
+                merged = [item for item in merged if item >= kept[-1]]
+            self._reserve[size] = merged[: self.reserve_size]
+        return self.results()
+
+    def remove_flavor(self, name):
+        """Drop a flavor from the catalog and from every ranking."""
+        if self.catalog.pop(name, None) is None:
+            return self.results()
+        self._forget_pairs(name)
+        self._unary.pop(name, None)
+        self._words.pop(name, None)
+        rescaled = self._rescale()
+        self._sort()
+        for size in self.sizes:
+            if size not in self._reserve:
+                continue
+            kept = [item for item in self._reserve[size] if name not in item[1]]
+            if rescaled or (not self._complete[size] and len(kept) < self.top_n):
+                self._rank(size)
+            else:
+                self._reserve[size] = kept
+        return self.results()
+
+    def sync_catalog(self, catalog: dict):
+        """Apply a freshly loaded catalog, updating only flavors whose stats differ."""
+        changed = [name for name, stats in catalog.items() if self.catalog.get(name) != stats]
+        removed = [name for name in self.catalog if name not in catalog]
+        for name in removed:
+            self.remove_flavor(name)
+        for name in changed:
+            self.update_flavor(name, **catalog[name])
+        return changed + removed
+
+    def save(self, path: str = STATE_PATH):
+        payload = pickle.dumps({"version": STATE_VERSION, "optimizer": self}, pickle.HIGHEST_PROTOCOL)
+        with file_lock(path):
+            atomic_write(path, payload)
+        return path
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH):
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return state["optimizer"] if state.get("version") == STATE_VERSION else None
+
+
+def optimize_flavor_mixes(top_n: int = 5, sizes=(2, 3), state_path: str = STATE_PATH):
+    """Load the saved optimizer, apply catalog changes incrementally, save it; returns the results."""
+    start = time.perf_counter()
+    catalog = load_catalog()
+    optimizer = FlavorMixOptimizer.load(state_path)
+    stale = optimizer is None or optimizer.top_n != top_n or optimizer.sizes != tuple(sizes)
+    if not stale:
+        differing = set(catalog) ^ set(optimizer.catalog)
+        differing.update(name for name, stats in catalog.items() if optimizer.catalog.get(name) != stats)
+        # Past a quarter of the catalog a fresh search is cheaper than patching.
+        stale = len(differing) > max(1, len(catalog) // 4)
+    if stale:
+        optimizer = FlavorMixOptimizer(catalog, sizes=sizes, top_n=top_n)
+        optimizer.optimize()
+        changed = list(catalog)
+    else:
+        changed = optimizer.sync_catalog(catalog)
+    optimizer.save(state_path)
+    return {
+        "results": optimizer.results(),
+        "changed": changed,
+        "elapsed_seconds": time.perf_counter() - start,
+        "pair_evaluations": optimizer.stats["pair_evaluations"],
+    }
@@ -0,0 +1,220 @@
+"""Rolling per-flavor usage rates that nudge surge prices.
+
+Every flavor gets two ring buffers of time buckets (minute or hour sized):
+a short "recent" window and a longer "baseline" window. Each ring keeps a
+running total, and buckets are zeroed as time moves past them, so adding an
+event and reading a rate are both O(1) (amortised over elapsed buckets).
+
+A flavor whose recent rate runs above its baseline is nudged up, one that
+has cooled off is nudged down, within ``max_surge``/``max_discount`` of the
+flavor's own base price, plus any weekend surcharge the surge add-on put on
+it. Nudged prices go into the resident ``SurgePriceTable``.
+"""
+
+import os
+import time
+from datetime import datetime
+
+from log_streams import event_time, split_combo
+
+# bucket name -> (bucket seconds, recent buckets, baseline buckets)
+BUCKETS = {
+    "minute": (60, 15, 24 * 60),
+    "hour": (3600, 1, 7 * 24),
+}
+USAGE_BUCKET = os.environ.get("HOOKAHPLUS_USAGE_BUCKET", "minute")
+
+
+class UsageRing:
+    """Event counts for the last ``slots`` buckets with a running total."""
+
+    __slots__ = ("slots", "counts", "total", "head")
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.counts = [0] * slots
+        self.total = 0
+        self.head = None  # newest bucket index
+
+    def advance(self, index: int):
+        """Zero every bucket between the current head and ``index``."""
+        head = self.head
+        if head is None:
+            self.head = index
+            return
+        if index <= head:
+            return
+        counts = self.counts
+        for i in range(max(head + 1, index - self.slots + 1), index + 1):
+            slot = i % self.slots
+            self.total -= counts[slot]
+            counts[slot] = 0
+        self.head = index
+
+    def add(self, index: int, n: int = 1):
+        self.advance(index)
+        if index <= self.head - self.slots:
+            return False  # older than the ring
+        self.counts[index % self.slots] += n
+        self.total += n
+        return True
+
+
+class FlavorUsageAggregator:
+    """Recent vs baseline usage per flavor, fed one checkout at a time."""
+
+    def __init__(self, bucket: str = USAGE_BUCKET, recent_buckets: int = None, baseline_buckets: int = None):
+        try:
+            self.bucket_seconds, default_recent, default_baseline = BUCKETS[bucket]
+        except KeyError:
+            raise ValueError(f"Unknown usage bucket: {bucket} (expected {', '.join(BUCKETS)})") from None
+        self.recent_buckets = recent_buckets or default_recent
+        self.baseline_buckets = baseline_buckets or default_baseline
+        if self.recent_buckets > self.baseline_buckets:
+            raise ValueError("recent window must not be longer than the baseline window")
+        self._rings = {}  # flavor -> (recent UsageRing, baseline UsageRing)
+        self._first_index = None  # oldest bucket seen, so short histories aren't diluted
+        self.events = 0
+
+    @property
+    def baseline_seconds(self):
+        return self.bucket_seconds * self.baseline_buckets
+
+    def record(self, flavor_combo: str, timestamp=None, count: int = 1):
+        index = int(event_time(timestamp) // self.bucket_seconds)
+        if self._first_index is None or index < self._first_index:
+            self._first_index = index
+        for flavor in split_combo(flavor_combo):
+            rings = self._rings.get(flavor)
+            if rings is None:
+                rings = self._rings[flavor] = (UsageRing(self.recent_buckets), UsageRing(self.baseline_buckets))
+            rings[0].add(index, count)
+            rings[1].add(index, count)
+        self.events += 1
+
+    def consume(self, events):
+        """Fold a batch of flavor events (dicts with ``flavor_combo``/``timestamp``)."""
+        for event in events:
+            if event.get("flavor_combo"):
+                self.record(event["flavor_combo"], event.get("timestamp"))
+        return self.events
+
+    def rates(self, flavor: str, now: float = None):
+        """Return ``(recent_per_hour, baseline_per_hour)`` for one flavor."""
+        rings = self._rings.get(flavor)
+        if rings is None:
+            return 0.0, 0.0
+        index = int((time.time() if now is None else now) // self.bucket_seconds)
+        recent, baseline = rings
+        recent.advance(index)
+        baseline.advance(index)
+        span = max(1, index - self._first_index + 1)
+        hours = self.bucket_seconds / 3600
+        return (
+            recent.total / (min(self.recent_buckets, span) * hours),
+            baseline.total / (min(self.baseline_buckets, span) * hours),
+        )
+
+    def flavors(self):
+        return list(self._rings)
+
+    def nudges(self, now: float = None, sensitivity: float = 0.25, max_surge: float = 0.3,
+               max_discount: float = 0.1, min_events: int = 20):
+        """Return ``{flavor: (usage_ratio, price_factor)}`` for flavors with enough history.
+
+        ``usage_ratio`` is recent rate / baseline rate; ``price_factor`` is
+        ``sensitivity * (ratio - 1)`` clamped to ``[-max_discount, max_surge]``.
+        """
+        result = {}
+        for flavor, (_, baseline) in self._rings.items():
+            recent_rate, baseline_rate = self.rates(flavor, now)
+            if baseline.total < min_events or baseline_rate <= 0:
+                continue
+            ratio = recent_rate / baseline_rate
+            factor = max(-max_discount, min(max_surge, sensitivity * (ratio - 1)))
+            result[flavor] = (ratio, factor)
+        return result
+
+
+def push_price_nudges(aggregator, table, base_prices: dict = None, now: float = None, surcharges: dict = None,
+                      **nudge_options):
+    """Nudge every price already in ``table``; returns ``{key: price}`` for changed entries.
+
+    Table keys are flavors or combos (``"Peach + Mint"``); a combo moves by
+    the mean factor of its flavors that have enough history. The factor is
+    applied to the key's own base price: ``base_prices[key]`` (normally the
+    latest ``base_price`` in the surge log), else its current table price,
+    which is then logged as the base so repeated syncs never compound.
+    ``surcharges[key]`` (the weekend add-on, see ``latest_surcharges``) is
+    added on top of the nudged price and logged with it.
+    """
+    nudges = aggregator.nudges(now, **nudge_options)
+    base_prices = base_prices or {}
+    surcharges = surcharges or {}
+    changed = {}
+    stamp = datetime.utcnow().isoformat()
+    for key, current in table.snapshot().items():
+        matched = [nudges[flavor] for flavor in split_combo(key) if flavor in nudges]
+        if not matched:
+            continue
+        ratio = sum(r for r, _ in matched) / len(matched)
+        factor = sum(f for _, f in matched) / len(matched)
+        surcharge = float(surcharges.get(key, 0)) if key in base_prices else 0.0
+        base_price = float(base_prices.get(key, current))
+        price = round(base_price * (1 + factor) + surcharge, 2)
+        if current == price:
+            continue
+        table.set(key, price, {
+            "flavor": key,
+            "base_price": base_price,
+            "surcharge": surcharge,
+            "surge_price": price,
+            "usage_ratio": round(ratio, 3),
+            "reason": "usage",
+            "timestamp": stamp,
+        })
+        changed[key] = price
+    return changed
+
+
+def latest_base_prices(entries):
+    """Return ``{flavor: base_price}`` from the newest surge log entry per flavor."""
+    prices = {}
+    for entry in entries:
+        if entry.get("flavor") and entry.get("base_price") is not None:
+            prices[entry["flavor"]] = entry["base_price"]
+    return prices
+
+
+def latest_surcharges(entries):
+    """Return ``{flavor: surcharge}`` carried by the newest surge log entry per flavor.
+
+    An add-on entry's surcharge is ``surge_price - base_price`` (``+3`` on
+    weekends, ``0`` otherwise); a usage nudge logs the one it carried.
+    """
+    surcharges = {}
+    for entry in entries:
+        if not entry.get("flavor"):
+            continue
+        if "surcharge" in entry:
+            surcharges[entry["flavor"]] = float(entry["surcharge"])
+        elif entry.get("reason") != "usage" and None not in (entry.get("base_price"), entry.get("surge_price")):
+            surcharges[entry["flavor"]] = round(float(entry["surge_price"]) - float(entry["base_price"]), 2)
+    return surcharges
+
+
+_aggregator = None
+
+
+def get_flavor_usage(attach: bool = True):
+    """Build the aggregator from the baseline window of the flavor log, then follow new events."""
+    global _aggregator
+    if _aggregator is None:
+        import stripe_integration
+
+        aggregator = FlavorUsageAggregator()
+        aggregator.consume(stripe_integration.iter_flavor_log(since=time.time() - aggregator.baseline_seconds))
+        if attach:
+            stripe_integration.add_flavor_listener(aggregator.consume)
+        _aggregator = aggregator
+    return _aggregator
@@ -0,0 +1,281 @@
+"""Append-only JSON-lines journals for high-frequency Hookah+ logs."""
+
+import json
+import os
+import threading
+import time
+import zlib
+
+from atomic_io import atomic_write_json, lock_fd, read_json, unlock_fd
+
+FSYNC_ALWAYS = "always"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER)
+
+
+class JournalCursor:
+    """How far a reader got through a compacted log and its journal.
+
+    ``count`` is the number of records consumed. ``segment`` identifies the
+    journal file the last one came from and ``offset`` is the byte just
+    past it, so the next read seeks there instead of starting over.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.segment = None
+        self.offset = 0
+
+
+class AppendJournal:
+    """One JSON record per line, appended without rewriting the file.
+
+    ``fsync`` controls durability: ``always`` syncs after every append,
+    ``interval`` syncs at most once per ``fsync_interval`` seconds and
+    ``never`` leaves flushing to the OS. The interval is tracked per
+    instance, so writers should share one journal per path.
+
+    ``target`` is the compacted log the records are merged into; see
+    ``compact``.
+    """
+
+    def __init__(self, path: str, target: str = None, fsync: str = FSYNC_INTERVAL, fsync_interval: float = 1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.path = path
+        self.target = target
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_sync = 0.0
+
+    @property
+    def compacting_path(self):
+        return self.path + ".compacting"
+
+    @property
+    def state_path(self):
+        return self.path + ".state.json"
+
+    def append(self, record: dict):
+        self.append_many([record])
+
+    def append_many(self, records):
+        payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        if not payload:
+            return
+        data = payload.encode("utf-8")
+        while True:
+            fd = self._open_locked()
+            try:
+                # A compaction may have renamed the file between open and lock;
+                # if so this fd points at the old inode, so reopen the new one.
+                if not self._is_current(fd):
+                    continue
+                os.write(fd, data)
+                if self._should_sync():
+                    os.fsync(fd)
+                    self._last_sync = time.monotonic()
+                return
+            finally:
+                os.close(fd)
+
+    def _open_locked(self):
+        # The file is reopened per write so a concurrent compaction that
+        # renames the journal away never swallows later appends.
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        lock_fd(fd)
+        return fd
+
+    def _is_current(self, fd):
+        try:
+            return os.path.samestat(os.fstat(fd), os.stat(self.path))
+        except FileNotFoundError:
+            return False
+
+    def _should_sync(self):
+        if self.fsync == FSYNC_ALWAYS:
+            return True
+        if self.fsync == FSYNC_INTERVAL:
+            return time.monotonic() - self._last_sync >= self.fsync_interval
+        return False
+
+    @staticmethod
+    def iter_file(path: str):
+        """Yield records from a journal file, skipping a torn final line."""
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def __iter__(self):
+        if not self._merged_aside(read_json(self.state_path, {})):
+            yield from self.iter_file(self.compacting_path)
+        yield from self.iter_file(self.path)
+
+    def _merged_aside(self, state):
+        """True while ``.compacting`` is already in ``target`` but not yet removed."""
+        pending = state.get("pending")
+        return pending is not None and _fingerprint(self.target) != pending["target"]
+
+    def base_count(self, state):
+        """Records in ``target`` as of the last compaction, or ``None`` if it has changed since."""
+        if "base" in state and state.get("target") == _fingerprint(self.target):
+            return state["base"]
+        return None
+
+    def iter_since(self, cursor: JournalCursor, iter_target):
+        """Yield the records of ``target`` plus the journal past ``cursor``, advancing it.
+
+        ``iter_target(skip)`` streams ``target`` from its ``skip``-th record.
+        It is only called when the cursor still points into ``target`` (or
+        its size is unknown): a cursor inside the journal seeks straight to
+        its byte offset.
+        """
+        state = read_json(self.state_path, {})
+        paths = [self.path] if self._merged_aside(state) else [self.compacting_path, self.path]
+        # Open the live file first: if a compaction renames it in between,
+        # both opens hit the same file and the duplicate is dropped.
+        files = {}
+        for path in reversed(paths):
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            segment = _segment(f)
+            if segment in files:
+                f.close()
+            else:
+                files[segment] = f
+        files = dict(reversed(files.items()))
+        try:
+            skip, base = 0, self.base_count(state)
+            if cursor.segment in files:
+                segments = list(files)
+                for segment in segments[: segments.index(cursor.segment)]:
+                    files.pop(segment).close()
+                files[cursor.segment].seek(cursor.offset)
+            elif base is not None and cursor.count >= base:
+                skip = cursor.count - base
+            else:
+                for record in iter_target(cursor.count):
+                    cursor.count += 1
+                    cursor.segment, cursor.offset = None, 0
+                    yield record
+            for segment, f in files.items():
+                offset = f.tell()
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn final line
+                    offset += len(line)
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if skip:
+                        skip -= 1
+                        cursor.segment, cursor.offset = segment, offset
+                        continue
+                    record = json.loads(line)
+                    cursor.count += 1
+                    cursor.segment, cursor.offset = segment, offset
+                    yield record
+        finally:
+            for f in files.values():
+                f.close()
+
+    def read(self):
+        return list(self)
+
+    def compact(self, merge):
+        """Hand pending records to ``merge`` and drop them from the journal.
+
+        The live journal is renamed aside first, so appends made while
+        ``merge`` runs land in a fresh file. A leftover ``.compacting`` file
+        from an interrupted run is merged before anything else.
+
+        ``merge`` must replace ``target`` (e.g. with ``atomic_write``). Its
+        fingerprint is saved before merging, so if a run dies after the
+        merge but before the cleanup, the next run sees ``target`` changed
+        and only finishes the cleanup instead of merging twice. If ``merge``
+        returns how many records ``target`` now holds, that count is saved
+        too and lets ``iter_since`` skip ``target`` without reading it.
+        """
+        state = read_json(self.state_path, {})
+        pending = state.get("pending")
+        if pending is not None and _fingerprint(self.target) != pending["target"]:
+            # The interrupted run merged already; only the cleanup is left.
+            if os.path.exists(self.compacting_path):
+                os.remove(self.compacting_path)
+            atomic_write_json(self.state_path, {})
+            return 0
+        if not os.path.exists(self.compacting_path):
+            if not os.path.exists(self.path):
+                return 0
+            if pending is None:
+                atomic_write_json(self.state_path, {**state, "pending": {"target": _fingerprint(self.target)}})
+            # Rename under the writers' lock so no append is mid-flight.
+            fd = self._open_locked()
+            try:
+                os.replace(self.path, self.compacting_path)
+            finally:
+                unlock_fd(fd)
+                os.close(fd)
+        elif pending is None:
+            # Left by a run that predates the marker; merge it as before.
+            atomic_write_json(self.state_path, {**state, "pending": {"target": _fingerprint(self.target)}})
+        records = list(self.iter_file(self.compacting_path))
+        base = merge(records) if records else state.get("base")
+        os.remove(self.compacting_path)
+        if isinstance(base, int) and (records or self.base_count(state) is not None):
+            atomic_write_json(self.state_path, {"base": base, "target": _fingerprint(self.target)})
+        else:
+            atomic_write_json(self.state_path, {})
+        return len(records)
+
+
+def _segment(f):
+    """Identify an open journal file: its inode plus a checksum of its first line.
+
+    The checksum tells a reused inode apart from the file a cursor was in.
+    """
+    st = os.fstat(f.fileno())
+    first = f.readline()
+    f.seek(0)
+    return (st.st_dev, st.st_ino, zlib.crc32(first) if first.endswith(b"\n") else None)
+
+
+def _fingerprint(path):
+    """Identify one version of a file that is only ever replaced, never edited in place."""
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+class JournalCompactor(threading.Thread):
+    """Daemon thread that calls ``compact_fn`` every ``interval`` seconds."""
+
+    def __init__(self, compact_fn, interval: float = 300.0):
+        super().__init__(daemon=True, name="journal-compactor")
+        self.compact_fn = compact_fn
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.compact_fn()
+
+    def stop(self, final_compaction: bool = True):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        if final_compaction:
+            self.compact_fn()
@@ -0,0 +1,186 @@
+"""Bounded-memory readers for the YAML/JSONL event logs.
+
+``iter_yaml_items`` yields the entries of a YAML list one at a time instead
+of ``yaml.safe_load``-ing the whole file. Block-style lists (what
+``yaml.safe_dump`` writes) are cut at item boundaries and parsed a batch at
+a time with the C loader when available; anything else falls back to
+PyYAML's event parser, which composes one item at a time.
+
+``filter_events`` applies the time-range / flavor / user filters shared by
+``stripe_integration.iter_flavor_log``, ``iter_surge_log`` and
+``iter_loyalty_events``.
+"""
+
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import yaml
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_COMBO_SPLIT = re.compile(r"\s*(?:\+|&|,|/)\s*")
+
+
+class _NotBlockSequence(Exception):
+    """The file is not laid out as a block-style list the fast path understands."""
+
+
+def split_combo(flavor_combo: str):
+    """Return the individual flavors in a combo string, without duplicates."""
+    seen = []
+    for name in _COMBO_SPLIT.split(str(flavor_combo or "")):
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+
+def event_time(timestamp):
+    """Epoch seconds for an event timestamp (naive ISO strings are UTC)."""
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def _is_item(stripped):
+    return stripped == "-" or stripped.startswith("- ")
+
+
+def _block_chunks(f, key, batch_size, skip=0):
+    """Yield dedented YAML text holding up to ``batch_size`` list items each.
+
+    The first ``skip`` items are dropped as text, without being parsed.
+    """
+    lines = iter(f)
+    if key is not None:
+        for line in lines:
+            if line.startswith(f"{key}:"):
+                if line[len(key) + 1:].split("#", 1)[0].strip():
+                    raise _NotBlockSequence(key)  # flow list or scalar value
+                break
+            if line.startswith(("{", "[")):
+                raise _NotBlockSequence(line)  # flow-style document
+        else:
+            return
+
+    indent = None
+    buf, items, seen = [], 0, 0
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            if buf:
+                buf.append("\n")
+            continue
+        if indent is None and key is None and stripped == "---":
+            continue
+        width = len(line) - len(line.lstrip(" "))
+        if indent is None:
+            if not _is_item(stripped):
+                raise _NotBlockSequence(line)
+            indent = width
+        if width < indent or (width == indent and not _is_item(stripped)):
+            if key is None:
+                raise _NotBlockSequence(line)
+            break  # the next key of the enclosing mapping
+        if width == indent:
+            seen += 1
+            if seen <= skip:
+                continue
+            if items >= batch_size:
+                yield "".join(buf)
+                buf, items = [], 0
+            items += 1
+        elif seen <= skip:
+            continue
+        buf.append(line[indent:])
+    if buf:
+        yield "".join(buf)
+
+
+def _iter_items_events(path, key):
+    """Compose and yield one list item at a time with PyYAML's event API."""
+    with open(path, "rb") as f:
+        loader = yaml.SafeLoader(f)
+        try:
+            loader.get_event()  # StreamStart
+            if not loader.check_event(yaml.DocumentStartEvent):
+                return
+            loader.get_event()
+            if key is not None:
+                if not loader.check_event(yaml.MappingStartEvent):
+                    return
+                loader.get_event()
+                while not loader.check_event(yaml.MappingEndEvent):
+                    name = loader.construct_document(loader.compose_node(None, None))
+                    if name == key and loader.check_event(yaml.SequenceStartEvent):
+                        break
+                    loader.compose_node(None, None)  # skip this key's value
+                else:
+                    return
+            if not loader.check_event(yaml.SequenceStartEvent):
+                return
+            loader.get_event()
+            while not loader.check_event(yaml.SequenceEndEvent):
+                yield loader.construct_document(loader.compose_node(None, None))
+        finally:
+            loader.dispose()
+
+
+def iter_yaml_items(path: str, key: str = None, batch_size: int = 500, skip: int = 0):
+    """Yield the items of a YAML list file (or of the list under top-level ``key``).
+
+    ``skip`` drops that many leading items; on the fast path they are never parsed.
+    """
+    if not os.path.exists(path):
+        return
+    yielded = skip
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for chunk in _block_chunks(f, key, batch_size, skip):
+                for item in yaml.load(chunk, Loader=_Loader) or []:
+                    yield item
+                    yielded += 1
+        return
+    except (_NotBlockSequence, yaml.YAMLError):
+        pass
+    for i, item in enumerate(_iter_items_events(path, key)):
+        if i >= yielded:
+            yield item
+
+
+def filter_events(events, since=None, until=None, flavor=None, user=None):
+    """Keep events with ``since <= timestamp < until`` matching ``flavor``/``user``.
+
+    ``since``/``until`` take epoch seconds, datetimes or ISO strings. An
+    event matches ``flavor`` if its ``flavor`` field is equal or its
+    ``flavor_combo`` contains it. Events without a timestamp are dropped
+    only when a time bound is given.
+    """
+    lo = None if since is None else event_time(since)
+    hi = None if until is None else event_time(until)
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        if user is not None and str(event.get("user")) != str(user):
+            continue
+        if flavor is not None and event.get("flavor") != flavor and flavor not in split_combo(
+            event.get("flavor_combo")
+        ):
+            continue
+        if lo is not None or hi is not None:
+            stamp = event.get("timestamp")
+            if stamp is None:
+                continue
+            try:
+                at = event_time(stamp)
+            except (TypeError, ValueError):
+                continue
+            if (lo is not None and at < lo) or (hi is not None and at >= hi):
+                continue
+        yield event
@@ -0,0 +1,153 @@
+"""Cached reader for ``configs/lounges/*.yaml`` with a precompiled snapshot.
+
+Parsed configs are kept in memory keyed by slug, along with each file's
+size, mtime and SHA-256. A lookup only costs a ``stat``; a file is parsed
+again only when its stat changed *and* its content hash differs. The whole
+cache is pickled to ``configs/lounges/.snapshot.pickle`` so a new process
+starts from the snapshot and re-parses just the configs edited since.
+"""
+
+import hashlib
+import os
+import pickle
+import time
+
+import yaml
+
+from atomic_io import atomic_write, file_lock
+from lounge_onboarding import INDEX_NAME, LOUNGES_DIR, SLUG_RE
+
+SNAPSHOT_NAME = ".snapshot.pickle"
+SNAPSHOT_VERSION = 1
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class LoungeConfigCache:
+    """In-memory lounge configs validated against file mtime and content hash."""
+
+    def __init__(self, config_dir: str = LOUNGES_DIR, snapshot_path: str = None, rescan_interval: float = 2.0):
+        self.config_dir = config_dir
+        self.snapshot_path = snapshot_path or os.path.join(config_dir, SNAPSHOT_NAME)
+        self.rescan_interval = rescan_interval
+        self._entries = {}  # slug -> {"file", "size", "mtime_ns", "sha256", "config"}
+        self._last_scan = 0.0
+        self.stats = {"parsed": 0, "hash_hits": 0, "snapshot_loaded": False}
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        if snapshot.get("version") == SNAPSHOT_VERSION:
+            self._entries = snapshot["entries"]
+            self.stats["snapshot_loaded"] = True
+
+    def save_snapshot(self):
+        """Write every cached config to the snapshot file."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+        payload = pickle.dumps({"version": SNAPSHOT_VERSION, "entries": self._entries}, pickle.HIGHEST_PROTOCOL)
+        with file_lock(self.snapshot_path):
+            atomic_write(self.snapshot_path, payload)
+        return self.snapshot_path
+
+    def _validate(self, slug, filename):
+        """Make the entry for ``filename`` current; returns True if it was re-parsed."""
+        path = os.path.join(self.config_dir, filename)
+        st = os.stat(path)
+        entry = self._entries.get(slug)
+        if entry and entry["file"] == filename and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return False
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if entry and entry["file"] == filename and entry["sha256"] == digest:
+            entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            self.stats["hash_hits"] += 1
+            return False
+        self._entries[slug] = {
+            "file": filename,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest,
+            "config": yaml.load(raw, Loader=_Loader) or {},
+        }
+        self.stats["parsed"] += 1
+        return True
+
+    def refresh(self, save: bool = True):
+        """Rescan the directory; returns the slugs that were (re)loaded or removed."""
+        changed = []
+        seen = set()
+        if os.path.isdir(self.config_dir):
+            for filename in os.listdir(self.config_dir):
+                slug = filename[:-5]
+                if not filename.endswith(".yaml") or filename == INDEX_NAME or not SLUG_RE.fullmatch(slug):
+                    continue
+                seen.add(slug)
+                if self._validate(slug, filename):
+                    changed.append(slug)
+        for slug in set(self._entries) - seen:
+            del self._entries[slug]
+            changed.append(slug)
+        self._last_scan = time.monotonic()
+        if changed and save:
+            self.save_snapshot()
+        return changed
+
+    def _maybe_rescan(self):
+        if time.monotonic() - self._last_scan >= self.rescan_interval:
+            self.refresh()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, slug: str, default=None):
+        """Return one lounge config, re-validating just that file."""
+        filename = f"{slug}.yaml"
+        if filename == INDEX_NAME or not SLUG_RE.fullmatch(slug):
+            return default  # the slug index, or not a slug onboarding would write
+        try:
+            self._validate(slug, filename)
+        except FileNotFoundError:
+            self._entries.pop(slug, None)
+            return default
+        return self._entries[slug]["config"]
+
+    def all(self):
+        """Return ``{slug: config}`` for every lounge, rescanning at most every ``rescan_interval``."""
+        self._maybe_rescan()
+        return {slug: entry["config"] for slug, entry in self._entries.items()}
+
+
+_caches = {}
+
+
+def get_lounge_config_cache(config_dir: str = LOUNGES_DIR):
+    cache = _caches.get(config_dir)
+    if cache is None:
+        cache = _caches[config_dir] = LoungeConfigCache(config_dir)
+    return cache
+
+
+def get_lounge_config(slug: str, default=None):
+    return get_lounge_config_cache().get(slug, default)
+
+
+def load_all_lounge_configs():
+    return get_lounge_config_cache().all()
+
+
+def build_lounge_snapshot(config_dir: str = LOUNGES_DIR):
+    """Refresh the cache and write the snapshot (dispatcher entry point)."""
+    start = time.perf_counter()
+    cache = get_lounge_config_cache(config_dir)
+    changed = cache.refresh(save=False)
+    path = cache.save_snapshot()
+    return (
+        f"✅ Lounge snapshot written to {path}: {len(cache)} configs, "
+        f"{len(changed)} reloaded in {(time.perf_counter() - start) * 1e3:.1f} ms"
+    )
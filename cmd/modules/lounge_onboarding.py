@@ -0,0 +1,241 @@
+"""Bulk lounge onboarding: stream rows, validate, write configs in parallel.
+
+Rows come from CSV or JSONL with the same fields as ``registerLoungeConfig``
+(``lounge_name``, ``session_price``, ``flavor_addons``, ``seat_count``,
+``sections``/``section_names``, optional ``slug``). In CSV,
+``flavor_addons`` is ``"Mint Blast:2;Double Apple:3"`` or a JSON object and
+``sections`` is ``"Main|VIP"`` or a JSON list.
+
+Slugs are checked against one in-memory index built from
+``configs/lounges/index.yaml`` (or the existing ``*.yaml`` files), and the
+index is rewritten once at the end mapping each slug to its config file.
+"""
+
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from atomic_io import atomic_write, atomic_write_yaml, file_lock
+
+try:
+    from slugify import slugify
+except ImportError:  # pragma: no cover
+    slugify = None
+
+LOUNGES_DIR = os.path.join("configs", "lounges")
+INDEX_NAME = "index.yaml"
+SLUG_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+DEFAULT_FLAVOR_ADDONS = {"Mint Blast": 2, "Double Apple": 3, "Blue Ice": 1}
+DEFAULT_SECTIONS = ["Main", "VIP"]
+
+
+def make_slug(lounge_name: str) -> str:
+    if slugify is not None:
+        return slugify(lounge_name)
+    return re.sub(r"[^a-z0-9]+", "-", lounge_name.lower()).strip("-")
+
+
+def build_lounge_config(
+    lounge_name,
+    session_price=30,
+    flavor_addons=None,
+    seat_count=10,
+    section_names=None,
+    slug=None,
+):
+    """Return the config dict ``registerLoungeConfig`` writes."""
+    return {
+        "lounge_name": lounge_name,
+        "slug": slug or make_slug(lounge_name),
+        "session_price": session_price,
+        "flavor_addons": DEFAULT_FLAVOR_ADDONS.copy() if flavor_addons is None else flavor_addons,
+        "sections": list(DEFAULT_SECTIONS) if section_names is None else section_names,
+        "seat_count": seat_count,
+        "reflex_enabled": True,
+    }
+
+
+def iter_rows(source: str):
+    """Stream raw rows from a ``.csv`` or ``.jsonl`` file as ``(line_number, row)``.
+
+    CSV rows are dicts. JSONL lines are yielded undecoded and ``validate_row``
+    decodes them, so a malformed line is reported instead of ending the import.
+    """
+    if source.endswith(".csv"):
+        with open(source, "r", newline="") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+    else:
+        with open(source, "r") as f:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    yield number, line
+
+
+def _number(value):
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def _parse_addons(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, dict):
+        return {str(k): _number(v) for k, v in value.items()}
+    value = str(value).strip()
+    if value.startswith("{"):
+        return _parse_addons(json.loads(value))
+    addons = {}
+    for pair in value.split(";"):
+        if pair.strip():
+            name, _, price = pair.rpartition(":")
+            if not name:
+                raise ValueError(f"flavor add-on {pair!r} must look like 'Name:price'")
+            addons[name.strip()] = price.strip()
+    return _parse_addons(addons)
+
+
+def _parse_sections(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    value = str(value).strip()
+    if value.startswith("["):
+        return _parse_sections(json.loads(value))
+    return [part.strip() for part in value.split("|") if part.strip()]
+
+
+def validate_row(row) -> dict:
+    """Turn a raw row (a dict or one JSONL line) into a lounge config, raising ``ValueError`` on bad data."""
+    if isinstance(row, str):
+        row = json.loads(row)
+    if not isinstance(row, dict):
+        raise ValueError(f"row must be a JSON object, not {type(row).__name__}")
+    lounge_name = str(row.get("lounge_name") or "").strip()
+    if not lounge_name:
+        raise ValueError("lounge_name is required")
+
+    price = row.get("session_price")
+    session_price = 30 if price in (None, "") else _number(price)
+    if session_price < 0:
+        raise ValueError("session_price must be >= 0")
+
+    seats = row.get("seat_count")
+    seat_count = 10 if seats in (None, "") else int(seats)
+    if seat_count <= 0:
+        raise ValueError("seat_count must be > 0")
+
+    slug = str(row.get("slug") or "").strip() or make_slug(lounge_name)
+    if not SLUG_RE.fullmatch(slug):
+        raise ValueError(f"invalid slug {slug!r}")
+    if slug == os.path.splitext(INDEX_NAME)[0]:
+        raise ValueError(f"slug {slug!r} is reserved for {INDEX_NAME}; set another slug")
+
+    return build_lounge_config(
+        lounge_name,
+        session_price=session_price,
+        flavor_addons=_parse_addons(row.get("flavor_addons")),
+        seat_count=seat_count,
+        section_names=_parse_sections(row.get("sections", row.get("section_names"))),
+        slug=slug,
+    )
+
+
+def load_index(output_dir: str = LOUNGES_DIR):
+    """Return ``{slug: {"file": ..., "lounge_name": ...}}`` for registered lounges."""
+    index_path = os.path.join(output_dir, INDEX_NAME)
+    if os.path.exists(index_path):
+        with open(index_path, "r") as f:
+            return (yaml.safe_load(f) or {}).get("lounges", {})
+    index = {}
+    if os.path.isdir(output_dir):
+        for name in sorted(os.listdir(output_dir)):
+            if name.endswith(".yaml") and name != INDEX_NAME:
+                with open(os.path.join(output_dir, name), "r") as f:
+                    config = yaml.safe_load(f) or {}
+                slug = config.get("slug") or name[:-5]
+                index[slug] = {"file": name, "lounge_name": config.get("lounge_name")}
+    return index
+
+
+def write_index(index, output_dir: str = LOUNGES_DIR):
+    atomic_write_yaml(os.path.join(output_dir, INDEX_NAME), {"lounges": dict(sorted(index.items()))})
+
+
+def update_index(config, output_dir: str = LOUNGES_DIR):
+    """Record one registered lounge in the index (used by ``registerLoungeConfig``)."""
+    with file_lock(os.path.join(output_dir, INDEX_NAME)):
+        index = load_index(output_dir)
+        index[config["slug"]] = {"file": f"{config['slug']}.yaml", "lounge_name": config["lounge_name"]}
+        write_index(index, output_dir)
+
+
+def _write_config(args):
+    """Serialise and write one lounge config; runs in pool workers."""
+    config, path = args
+    atomic_write(path, yaml.dump(config))
+    return path
+
+
+def register_lounges_bulk(source: str, output_dir: str = LOUNGES_DIR, on_conflict: str = "error", workers: int = None):
+    """Validate every row in ``source`` and write its lounge configs in parallel.
+
+    ``on_conflict`` decides what happens when a slug is already taken by a
+    different lounge: ``error`` rejects the row, ``suffix`` appends ``-2``,
+    ``-3``..., ``overwrite`` replaces the existing config.
+    """
+    if on_conflict not in ("error", "suffix", "overwrite"):
+        raise ValueError(f"Unknown on_conflict policy: {on_conflict}")
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+
+    with file_lock(os.path.join(output_dir, INDEX_NAME)):
+        index = load_index(output_dir)
+        batch_slugs = set()
+        jobs, errors = [], []
+        for line, row in iter_rows(source):
+            try:
+                config = validate_row(row)
+            except (ValueError, TypeError) as e:
+                errors.append({"line": line, "error": str(e)})
+                continue
+
+            slug = config["slug"]
+            taken = slug in batch_slugs or (
+                slug in index and index[slug].get("lounge_name") != config["lounge_name"]
+            )
+            # "overwrite" only replaces configs from earlier runs, never a row of this batch.
+            if taken and (on_conflict == "error" or (on_conflict == "overwrite" and slug in batch_slugs)):
+                errors.append({"line": line, "error": f"slug collision: {slug}"})
+                continue
+            if taken and on_conflict == "suffix":
+                n = 2
+                while f"{slug}-{n}" in index or f"{slug}-{n}" in batch_slugs:
+                    n += 1
+                slug = config["slug"] = f"{slug}-{n}"
+
+            batch_slugs.add(slug)
+            index[slug] = {"file": f"{slug}.yaml", "lounge_name": config["lounge_name"]}
+            jobs.append((config, os.path.join(output_dir, f"{slug}.yaml")))
+
+        if len(jobs) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                written = list(pool.map(_write_config, jobs, chunksize=max(1, len(jobs) // 32)))
+        else:
+            written = [_write_config(job) for job in jobs]
+        write_index(index, output_dir)
+
+    return {
+        "written": len(written),
+        "errors": errors,
+        "index": os.path.join(output_dir, INDEX_NAME),
+        "elapsed_seconds": time.perf_counter() - start,
+    }
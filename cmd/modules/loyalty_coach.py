@@ -0,0 +1,281 @@
+"""Staff coaching hints per guest and lounge, precomputed from loyalty transactions.
+
+``CoachHintIndex`` folds each transaction into running totals per user and
+lounge: visits, spend, loyalty gain, TrustArc sum, surge visits, and first
+and last visit. The index is pickled with a cursor into the ledger (the
+last row id read), so a refresh only queries rows added since.
+
+``LoyaltyCoach`` renders hints from those totals and serves them through
+``HintCache``, an LRU with a size limit and a TTL. The TTL bounds how stale
+the time-based hints ("last seen 30 days ago") can get. New transactions
+for a user invalidate only that user's cached entries. A cache miss or an
+expired entry first catches up from the ledger cursor, at most once per
+``catch_up_interval``, so transactions written by other processes show up
+too; once attached, the coach also catches up whenever this process records
+loyalty. Unknown guests are cached as well, so repeated lookups for them do
+not each rescan the log; such an entry lives for one ``catch_up_interval``.
+
+Transactions without a timestamp count towards the totals but leave first
+and last visit unknown (``None``).
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from atomic_io import atomic_write, file_lock
+from log_streams import event_time
+from loyalty_ledger import LedgerCursor
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+STATE_PATH = os.path.join(BASE_DIR, "data", "loyalty_coach.state.pickle")
+STATE_VERSION = 3
+UNASSIGNED = "unassigned"
+CACHE_SIZE = int(os.environ.get("HOOKAHPLUS_COACH_CACHE_SIZE", "4096"))
+CACHE_TTL = float(os.environ.get("HOOKAHPLUS_COACH_CACHE_TTL", "300"))
+CATCH_UP_INTERVAL = float(os.environ.get("HOOKAHPLUS_COACH_CATCH_UP_INTERVAL", "5"))
+LAPSED_DAYS = 21
+MILESTONE_POINTS = 10
+
+# Running totals per (user, lounge), by position.
+VISITS, SPEND, GAIN, TRUST_SUM, TRUST_N, SURGE, FIRST, LAST = range(8)
+_UNKNOWN = object()  # cached result for a guest with no transactions
+
+
+class CoachHintIndex:
+    """Per-user, per-lounge loyalty totals that hints are rendered from."""
+
+    def __init__(self):
+        self.stats = {}  # user -> lounge -> [visits, spend, gain, trust_sum, trust_n, surge, first, last]
+        self.cursor = LedgerCursor()  # how far into the ledger catch_up has read
+
+    def record(self, tx):
+        """Fold one transaction in; returns its user."""
+        user = str(tx["user"])
+        at = event_time(tx["timestamp"]) if tx.get("timestamp") is not None else None
+        row = self.stats.setdefault(user, {}).setdefault(tx.get("lounge_id") or UNASSIGNED, [0, 0.0, 0.0, 0.0, 0, 0, at, at])
+        row[VISITS] += 1
+        row[SPEND] += float(tx.get("amount") or 0)
+        row[GAIN] += float(tx.get("loyalty_gain") or 0)
+        if tx.get("trust_arc") is not None:
+            row[TRUST_SUM] += float(tx["trust_arc"])
+            row[TRUST_N] += 1
+        row[SURGE] += 1 if tx.get("surge_active") else 0
+        if at is not None:
+            row[FIRST] = at if row[FIRST] is None else min(row[FIRST], at)
+            row[LAST] = at if row[LAST] is None else max(row[LAST], at)
+        return user
+
+    def consume(self, transactions):
+        """Fold a batch of transactions; returns the set of users whose totals changed."""
+        return {self.record(tx) for tx in transactions}
+
+    def catch_up(self, transactions):
+        """Fold in new transactions from ``stripe_integration.iter_loyalty_events_since(self.cursor)``."""
+        return self.consume(transactions)
+
+    def balance(self, user):
+        return sum(row[GAIN] for row in self.stats.get(user, {}).values())
+
+    def summary(self, user, lounge_id=None):
+        """Return the user's totals for one lounge, or merged across lounges, or ``None``."""
+        lounges = self.stats.get(user)
+        if not lounges:
+            return None
+        if lounge_id is not None:
+            row = lounges.get(lounge_id)
+            return list(row) if row else None
+        rows = list(lounges.values())
+        merged = [sum(row[i] for row in rows) for i in range(FIRST)]
+        firsts = [row[FIRST] for row in rows if row[FIRST] is not None]
+        lasts = [row[LAST] for row in rows if row[LAST] is not None]
+        return merged + [min(firsts, default=None), max(lasts, default=None)]
+
+    def save(self, path: str = STATE_PATH):
+        payload = pickle.dumps({"version": STATE_VERSION, "index": self}, pickle.HIGHEST_PROTOCOL)
+        with file_lock(path):
+            atomic_write(path, payload)
+        return path
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH):
+        """Return the saved index, or a fresh one if there is no usable state."""
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return cls()
+        if state.get("version") != STATE_VERSION:
+            return cls()
+        return state["index"]
+
+
+class HintCache:
+    """Thread-safe LRU of ``(user, lounge_id) -> hints`` with a TTL and per-user invalidation."""
+
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._by_user = {}  # user -> keys cached for that user
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl: float = None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            self._by_user.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        del self._entries[key]
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+    def invalidate_user(self, user):
+        with self._lock:
+            for key in list(self._by_user.get(user, ())):
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def render_hints(summary, balance, now: float = None):
+    """Turn one set of totals into short staff-facing hints."""
+    visits, spend, _, trust_sum, trust_n, surge, _, last = summary[: LAST + 1]
+    now = time.time() if now is None else now
+    trust = trust_sum / trust_n if trust_n else None
+    days_away = (now - last) / 86400 if last is not None else None
+    hints = []
+    if visits == 1:
+        hints.append("First visit here: introduce the loyalty wallet and SPS meter.")
+    elif days_away is not None and days_away >= LAPSED_DAYS:
+        hints.append(f"Regular ({visits} visits) last seen {days_away:.0f} days ago: welcome them back with a refill.")
+    # Tiers follow the rewards table in ReflexLoyalty_Vault.yaml.
+    if trust is not None and trust >= 9.0:
+        hints.append("TrustArc 9+: offer the Tier VII Gate and an invite token.")
+    elif trust is not None and trust >= 7.0:
+        hints.append("TrustArc 7-8.9: offer bonus mixes or a free refill.")
+    elif trust is not None and trust < 6.0:
+        hints.append("Low TrustArc: whisper nudge to 'Explore the Flow'.")
+    if visits >= 3 and surge / visits >= 0.5:
+        hints.append("Books surge sessions often: mention this week's surge flavor.")
+    to_milestone = MILESTONE_POINTS - balance % MILESTONE_POINTS
+    if to_milestone <= 1.0:
+        hints.append(f"{to_milestone:.2f} points from the next {MILESTONE_POINTS}-point milestone.")
+    return {
+        "visits": visits,
+        "spend": round(spend, 2),
+        "balance": round(balance, 2),
+        "avg_trust_arc": round(trust, 2) if trust is not None else None,
+        "last_visit": datetime.fromtimestamp(last, timezone.utc).isoformat() if last is not None else None,
+        "hints": hints,
+    }
+
+
+class LoyaltyCoach:
+    """Serve hints from the index through the cache, invalidating per user on new ledger rows."""
+
+    def __init__(self, index: CoachHintIndex = None, cache: HintCache = None,
+                 catch_up_interval: float = CATCH_UP_INTERVAL):
+        self.index = index or CoachHintIndex()
+        self.cache = cache or HintCache()
+        self.catch_up_interval = catch_up_interval
+        self._last_catch_up = None
+        self._lock = threading.Lock()
+
+    def hints(self, user: str, lounge_id: str = None):
+        """Hints for ``user`` at ``lounge_id`` (or across all lounges), or ``None`` for unknown guests."""
+        key = (str(user), lounge_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return None if cached is _UNKNOWN else cached
+        if self._last_catch_up is None or time.monotonic() - self._last_catch_up >= self.catch_up_interval:
+            self.refresh()
+        with self._lock:
+            summary = self.index.summary(key[0], lounge_id)
+            balance = self.index.balance(key[0])
+        if summary is None:
+            # Kept until the next catch-up may run, or until the guest's first transaction is read.
+            self.cache.put(key, _UNKNOWN, ttl=self.catch_up_interval)
+            return None
+        hints = {"user": key[0], "lounge_id": lounge_id, **render_hints(summary, balance)}
+        self.cache.put(key, hints)
+        return hints
+
+    def apply(self, transactions):
+        """Fold new loyalty transactions in and drop the cached hints of their users."""
+        with self._lock:
+            changed = self.index.consume(transactions)
+        for user in changed:
+            self.cache.invalidate_user(user)
+        return changed
+
+    def refresh(self, transactions=None):
+        """Catch up on ledger rows past the index cursor, whichever process wrote them.
+
+        ``transactions`` (what the loyalty listener passes) is ignored: the
+        cursor read already includes them.
+        """
+        import stripe_integration
+
+        with self._lock:
+            changed = self.index.catch_up(stripe_integration.iter_loyalty_events_since(self.index.cursor))
+            self._last_catch_up = time.monotonic()
+        for user in changed:
+            self.cache.invalidate_user(user)
+        return changed
+
+
+_coach = None
+
+
+def refresh_coach_index(state_path: str = STATE_PATH):
+    """Load the saved index, fold in new ledger transactions, save it; returns the index and changed users."""
+    import stripe_integration
+
+    index = CoachHintIndex.load(state_path)
+    changed = index.catch_up(stripe_integration.iter_loyalty_events_since(index.cursor))
+    if changed:
+        index.save(state_path)
+    return index, changed
+
+
+def get_loyalty_coach(attach: bool = True):
+    """Build the coach from the saved index, then follow new loyalty transactions."""
+    global _coach
+    if _coach is None:
+        import stripe_integration
+
+        index, _ = refresh_coach_index()
+        coach = LoyaltyCoach(index)
+        if attach:
+            stripe_integration.add_loyalty_listener(coach.refresh)
+        _coach = coach
+    return _coach
@@ -0,0 +1,248 @@
+"""SQLite-backed loyalty ledger with per-user running balances."""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from log_streams import iter_yaml_items
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    amount REAL NOT NULL DEFAULT 0,
+    trust_arc REAL,
+    loyalty_gain REAL NOT NULL,
+    surge_active INTEGER NOT NULL DEFAULT 0,
+    timestamp TEXT,
+    lounge_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (user, id);
+CREATE TABLE IF NOT EXISTS balances (
+    user TEXT PRIMARY KEY,
+    balance REAL NOT NULL DEFAULT 0,
+    tx_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS imported_sources (
+    path TEXT PRIMARY KEY,
+    tx_count INTEGER NOT NULL,
+    imported_at TEXT NOT NULL
+);
+"""
+
+_TX_COLUMNS = ("id", "user", "amount", "trust_arc", "loyalty_gain", "surge_active", "timestamp", "lounge_id")
+
+
+class LoyaltyLedger:
+    """Loyalty transactions indexed by user.
+
+    Every insert also updates the ``balances`` row for that user inside the
+    same transaction, so ``balance()`` is a primary-key lookup and
+    ``history()`` walks the ``(user, id)`` index instead of the whole table.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(transactions)")}
+        if "lounge_id" not in columns:  # ledgers created before lounge tagging
+            self._conn.execute("ALTER TABLE transactions ADD COLUMN lounge_id TEXT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(
+        self,
+        user: str,
+        amount: float,
+        trust_arc: float,
+        loyalty_gain: float,
+        surge_active: bool = False,
+        timestamp: str = None,
+        lounge_id: str = None,
+    ):
+        """Insert one transaction and bump the user's balance."""
+        self.record_many(
+            [
+                {
+                    "user": user,
+                    "amount": amount,
+                    "trust_arc": trust_arc,
+                    "loyalty_gain": loyalty_gain,
+                    "surge_active": surge_active,
+                    "timestamp": timestamp,
+                    "lounge_id": lounge_id,
+                }
+            ]
+        )
+
+    def record_many(self, transactions):
+        """Insert many transactions in a single SQLite transaction."""
+        rows = [
+            (
+                str(tx["user"]),
+                float(tx.get("amount") or 0),
+                tx.get("trust_arc"),
+                float(tx["loyalty_gain"]),
+                1 if tx.get("surge_active") else 0,
+                tx.get("timestamp") or datetime.utcnow().isoformat(),
+                tx.get("lounge_id"),
+            )
+            for tx in transactions
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._insert(rows)
+        return len(rows)
+
+    def _insert(self, rows):
+        self._conn.executemany(
+            "INSERT INTO transactions (user, amount, trust_arc, loyalty_gain, surge_active, timestamp, lounge_id)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        deltas = {}
+        for row in rows:
+            gain, count = deltas.get(row[0], (0.0, 0))
+            deltas[row[0]] = (gain + row[3], count + 1)
+        self._conn.executemany(
+            "INSERT INTO balances (user, balance, tx_count) VALUES (?, ?, ?)"
+            " ON CONFLICT(user) DO UPDATE SET"
+            " balance = balance + excluded.balance, tx_count = tx_count + excluded.tx_count",
+            [(user, gain, count) for user, (gain, count) in deltas.items()],
+        )
+
+    def balance(self, user: str) -> float:
+        row = self._query_one("SELECT balance FROM balances WHERE user = ?", (user,))
+        return round(row[0], 2) if row else 0.0
+
+    def balances(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT user, balance FROM balances ORDER BY user").fetchall()
+        return {user: round(balance, 2) for user, balance in rows}
+
+    def history(self, user: str, limit: int = None):
+        """Return a user's transactions, newest first."""
+        sql = f"SELECT {', '.join(_TX_COLUMNS)} FROM transactions WHERE user = ? ORDER BY id DESC"
+        params = (user,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def _query_one(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    @staticmethod
+    def _row_to_dict(row):
+        tx = dict(zip(_TX_COLUMNS, row))
+        tx["surge_active"] = bool(tx["surge_active"])
+        return tx
+
+    def iter_transactions(self, user: str = None, batch_size: int = 1000, after_id: int = 0):
+        """Yield transactions with ``id > after_id`` oldest first, ``batch_size`` rows per query.
+
+        Pages by ``id`` so no cursor (or lock) is held between batches and
+        writers are never blocked by a slow consumer.
+        """
+        sql = f"SELECT {', '.join(_TX_COLUMNS)} FROM transactions WHERE id > ?"
+        if user is not None:
+            sql += " AND user = ?"
+        sql += " ORDER BY id LIMIT ?"
+        last_id = after_id
+        while True:
+            params = (last_id,) + ((user,) if user is not None else ()) + (batch_size,)
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+            for row in rows:
+                yield self._row_to_dict(row)
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def import_yaml_vault(self, vault_path: str, force: bool = False, batch_size: int = 5000):
+        """Import a YAML loyalty vault once; returns the number of rows added.
+
+        Reads ``transactions`` entries as written by
+        ``attach_loyalty_to_stripe_events`` and legacy ``sessions`` entries,
+        whose ``points`` become the loyalty gain. The vault is streamed and
+        inserted in batches of ``batch_size`` rows within one transaction.
+        """
+        if not os.path.exists(vault_path):
+            return 0
+        key = os.path.abspath(vault_path)
+        if not force and self._query_one("SELECT 1 FROM imported_sources WHERE path = ?", (key,)):
+            return 0
+
+        with self._lock, self._conn:
+            # Re-check under a write lock so concurrent workers opening the
+            # ledger for the first time import the vault exactly once.
+            self._conn.execute("BEGIN IMMEDIATE")
+            if not force and self._conn.execute(
+                "SELECT 1 FROM imported_sources WHERE path = ?", (key,)
+            ).fetchone():
+                return 0
+            total = 0
+            batch = []
+            for row in vault_rows(vault_path):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    self._insert(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                self._insert(batch)
+                total += len(batch)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO imported_sources (path, tx_count, imported_at) VALUES (?, ?, ?)",
+                (key, total, datetime.utcnow().isoformat()),
+            )
+        return total
+
+
+class LedgerCursor:
+    """How far a reader got: the last ledger row id, or the entries read per YAML vault section."""
+
+    def __init__(self):
+        self.last_id = 0
+        self.transactions = 0
+        self.sessions = 0
+
+
+def vault_rows(vault_path: str, cursor: LedgerCursor = None):
+    """Stream ``(user, amount, trust_arc, loyalty_gain, surge_active, timestamp, lounge_id)`` from a YAML vault.
+
+    With ``cursor`` only entries past it are read, and it is advanced. Each
+    section is counted on its own: new transactions land before the
+    ``sessions`` list, so one running count would shift.
+    """
+    cursor = cursor or LedgerCursor()
+    for tx in iter_yaml_items(vault_path, "transactions", skip=cursor.transactions):
+        cursor.transactions += 1
+        yield (
+            str(tx["user"]),
+            float(tx.get("amount") or 0),
+            tx.get("trust_arc"),
+            float(tx.get("loyalty_gain") or 0),
+            1 if tx.get("surge_active") else 0,
+            tx.get("timestamp"),
+            tx.get("lounge_id"),
+        )
+    for session in iter_yaml_items(vault_path, "sessions", skip=cursor.sessions):
+        cursor.sessions += 1
+        if "user" not in session:
+            continue
+        yield (
+            str(session["user"]), 0.0, None, float(session.get("points") or 0), 0,
+            session.get("timestamp"), session.get("lounge_id"),
+        )
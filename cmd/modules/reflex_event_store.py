@@ -0,0 +1,223 @@
+"""Segmented, append-only store for reflex events (``{type, trigger, message, timestamp}``).
+
+Events are appended as JSON lines to ``data/reflex_log/segment-NNNNNN.jsonl``.
+A segment is sealed once it holds ``SEGMENT_EVENTS`` events, and sealing
+writes a sidecar ``.index.json`` with the byte offset of every event:
+
+* by ``type``;
+* sorted by timestamp.
+
+``manifest.json`` lists every segment with its event count, committed byte
+length, timestamp range and per-type counts. A query first drops the
+segments whose range or types cannot match, then reads sealed segments
+through their index (seeking straight to matching lines). Only the single
+open segment is scanned.
+
+Appends hold the manifest lock. Bytes past a segment's committed length
+come from an interrupted append: readers never see them, and the next
+append truncates them away.
+"""
+
+import bisect
+import json
+import os
+from datetime import datetime, timezone
+
+from atomic_io import atomic_write_json, file_lock, read_json
+from log_streams import event_time
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+STORE_DIR = os.path.join(BASE_DIR, "data", "reflex_log")
+LEGACY_PATH = os.path.join(BASE_DIR, "data", "ReflexLog.json")
+SEGMENT_EVENTS = int(os.environ.get("HOOKAHPLUS_REFLEX_SEGMENT_EVENTS", "10000"))
+MANIFEST_VERSION = 1
+
+
+def _bound(value):
+    return None if value is None else event_time(value)
+
+
+class ReflexEventStore:
+    """Append and query reflex events across indexed segments."""
+
+    def __init__(self, directory: str = STORE_DIR, segment_events: int = SEGMENT_EVENTS):
+        self.directory = directory
+        self.segment_events = segment_events
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self._indexes = {}  # sealed segment name -> loaded index
+
+    def manifest(self):
+        manifest = read_json(self.manifest_path, None)
+        if not manifest or manifest.get("version") != MANIFEST_VERSION:
+            manifest = {"version": MANIFEST_VERSION, "segments": []}
+        return manifest
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # -- writing -------------------------------------------------------------
+
+    def append(self, event: dict):
+        return self.append_many([event])
+
+    def append_many(self, events):
+        """Append events in order, sealing segments as they fill; returns how many were written."""
+        events = list(events)
+        if not events:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        with file_lock(self.manifest_path):
+            manifest = self.manifest()
+            written = self._append(manifest, events)
+            atomic_write_json(self.manifest_path, manifest)
+        return written
+
+    def _append(self, manifest, events):
+        """Write ``events`` and update ``manifest`` in place (caller holds the lock and saves it)."""
+        segments = manifest["segments"]
+        written = 0
+        while written < len(events):
+            if not segments or segments[-1]["sealed"]:
+                segments.append({
+                    "name": f"segment-{len(segments):06d}.jsonl", "count": 0, "bytes": 0,
+                    "first": None, "last": None, "types": {}, "sealed": False,
+                })
+            segment = segments[-1]
+            batch = events[written: written + self.segment_events - segment["count"]]
+            self._write(segment, batch)
+            written += len(batch)
+            if segment["count"] >= self.segment_events:
+                self._seal(segment)
+        return written
+
+    def _write(self, segment, events):
+        lines = [(json.dumps(e, separators=(",", ":")) + "\n").encode("utf-8") for e in events]
+        with open(self._path(segment["name"]), "ab") as f:
+            # Drop the tail of an append that never reached the manifest.
+            f.truncate(segment["bytes"])
+            f.seek(segment["bytes"])
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        for event, line in zip(events, lines):
+            at = event_time(event.get("timestamp"))
+            segment["first"] = at if segment["first"] is None else min(segment["first"], at)
+            segment["last"] = at if segment["last"] is None else max(segment["last"], at)
+            kind = event.get("type") or ""
+            segment["types"][kind] = segment["types"].get(kind, 0) + 1
+            segment["count"] += 1
+            segment["bytes"] += len(line)
+
+    def _seal(self, segment):
+        types, times = {}, []
+        for offset, event in self._scan(segment):
+            types.setdefault(event.get("type") or "", []).append(offset)
+            times.append((event_time(event.get("timestamp")), offset))
+        times.sort()
+        index = {"types": types, "times": [t for t, _ in times], "offsets": [o for _, o in times]}
+        atomic_write_json(self._path(segment["name"][: -len(".jsonl")] + ".index.json"), index)
+        segment["sealed"] = True
+
+    # -- reading -------------------------------------------------------------
+
+    def _scan(self, segment):
+        """Yield ``(offset, event)`` for the committed part of a segment."""
+        with open(self._path(segment["name"]), "rb") as f:
+            offset = 0
+            while offset < segment["bytes"]:
+                line = f.readline()
+                if not line:
+                    break
+                yield offset, json.loads(line)
+                offset += len(line)
+
+    def _index(self, segment):
+        name = segment["name"]
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = read_json(self._path(name[: -len(".jsonl")] + ".index.json"), None)
+        return index
+
+    def _read_offsets(self, segment, offsets):
+        with open(self._path(segment["name"]), "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield json.loads(f.readline())
+
+    def _query_segment(self, segment, type, since, until):
+        index = self._index(segment) if segment["sealed"] else None
+        if index is None:
+            for _, event in self._scan(segment):
+                if type is not None and event.get("type") != type:
+                    continue
+                at = event_time(event.get("timestamp"))
+                if (since is None or at >= since) and (until is None or at < until):
+                    yield event
+            return
+        offsets = None
+        if since is not None or until is not None:
+            times = index["times"]
+            lo = 0 if since is None else bisect.bisect_left(times, since)
+            hi = len(times) if until is None else bisect.bisect_left(times, until)
+            offsets = set(index["offsets"][lo:hi])
+        if type is not None:
+            typed = index["types"].get(type, [])
+            offsets = set(typed) if offsets is None else offsets.intersection(typed)
+        if offsets is None:
+            yield from (event for _, event in self._scan(segment))
+        else:
+            yield from self._read_offsets(segment, sorted(offsets))
+
+    def segments_for(self, type: str = None, since=None, until=None):
+        """Manifest entries of the segments that can hold matching events."""
+        since, until = _bound(since), _bound(until)
+        return [
+            segment for segment in self.manifest()["segments"]
+            if segment["count"]
+            and (type is None or type in segment["types"])
+            and (since is None or segment["last"] >= since)
+            and (until is None or segment["first"] < until)
+        ]
+
+    def query(self, type: str = None, since=None, until=None):
+        """Yield events of ``type`` with ``since <= timestamp < until``, in append order."""
+        segments = self.segments_for(type, since, until)
+        since, until = _bound(since), _bound(until)
+        for segment in segments:
+            yield from self._query_segment(segment, type, since, until)
+
+    def __iter__(self):
+        return self.query()
+
+    def count(self, type: str = None):
+        segments = self.manifest()["segments"]
+        if type is None:
+            return sum(s["count"] for s in segments)
+        return sum(s["types"].get(type, 0) for s in segments)
+
+
+def log_reflex_event(type: str, trigger: str, message: str, timestamp: str = None, store: ReflexEventStore = None):
+    """Append one reflex event, timestamped now (UTC) unless given."""
+    event = {
+        "type": type,
+        "trigger": trigger,
+        "message": message,
+        "timestamp": timestamp or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    (store or ReflexEventStore()).append(event)
+    return event
+
+
+def migrate_reflex_log(legacy_path: str = LEGACY_PATH, directory: str = STORE_DIR):
+    """Copy ``ReflexLog.json`` into the event store once; later calls are no-ops."""
+    store = ReflexEventStore(directory)
+    os.makedirs(directory, exist_ok=True)
+    with file_lock(store.manifest_path):
+        manifest = store.manifest()
+        if manifest.get("migrated_from"):
+            return {"migrated": 0, "already_migrated": True, "events": store.count()}
+        events = read_json(legacy_path, [])
+        store._append(manifest, events)
+        manifest["migrated_from"] = os.path.basename(legacy_path)
+        atomic_write_json(store.manifest_path, manifest)
+    return {"migrated": len(events), "already_migrated": False, "events": store.count()}
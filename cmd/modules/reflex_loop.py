@@ -1,16 +1,34 @@
 """Hookah+ Reflex Loop commands for Phases 5-7."""
 
+import os
+
 
 def deploy_trust_heatmap():
     """Activate lounge dashboards rendering trust event heatmaps."""
-    print("🔥 Trust heatmap deployed across lounges.")
+    from trust_heatmap import refresh_trust_heatmap
+
+    refresh = refresh_trust_heatmap()
+    if "error" in refresh:
+        return refresh["error"]
+    print(
+        f"🔥 Trust heatmap deployed across {refresh['lounges']} lounges "
+        f"(+{refresh['events_added']} events in {refresh['elapsed_seconds'] * 1e3:.0f} ms)."
+    )
     return "Trust heatmap deployment triggered"
 
 
 def sync_flavor_usage_to_pricing():
     """Sync high-usage flavor data to pricing nudges."""
-    print("🍓 Flavor usage synced to pricing metadata.")
-    return "Flavor usage pricing sync initiated"
+    import stripe_integration
+    from flavor_usage import get_flavor_usage, latest_base_prices, latest_surcharges, push_price_nudges
+
+    table = stripe_integration.get_surge_price_table()
+    base_prices = latest_base_prices(stripe_integration.iter_surge_log())
+    surcharges = latest_surcharges(stripe_integration.iter_surge_log())
+    changed = push_price_nudges(get_flavor_usage(), table, base_prices, surcharges=surcharges)
+    table.flush()
+    print(f"🍓 Flavor usage synced to pricing metadata ({len(changed)} prices nudged).")
+    return f"Flavor usage pricing sync nudged {len(changed)} flavors"
 
 
 def enable_session_replay_consent():
@@ -19,28 +37,83 @@ def enable_session_replay_consent():
     return "Session replay consent enabled"
 
 
-def generate_loyalty_coach_hints():
-    """Provide AI coaching hints to lounge staff."""
+def generate_loyalty_coach_hints(user: str = None, lounge_id: str = None, limit: int = 5):
+    """Provide AI coaching hints to lounge staff.
+
+    With ``user`` the hints for that guest are shown; otherwise those of the
+    ``limit`` most recently seen guests (at ``lounge_id`` if given).
+    """
+    from loyalty_coach import LAST, get_loyalty_coach
+
+    coach = get_loyalty_coach()
+    if user is None:
+        coach.refresh()  # guests other processes recorded since the coach was built
+        recent = sorted(
+            (
+                (row[LAST] or 0.0, guest)
+                for guest, lounges in coach.index.stats.items()
+                for lounge, row in lounges.items()
+                if lounge_id is None or lounge == lounge_id
+            ),
+            reverse=True,
+        )
+        users = list(dict.fromkeys(guest for _, guest in recent))[: int(limit)]
+    else:
+        users = [user]
+    shown = 0
+    for guest in users:
+        hints = coach.hints(guest, lounge_id)
+        if hints is None:
+            continue
+        shown += 1
+        print(f"🧠 {guest}: {' '.join(hints['hints']) or 'No coaching needed.'} "
+              f"({hints['visits']} visits, balance {hints['balance']})")
     print("🧠 Loyalty coach hints generated via Whisper.")
-    return "Loyalty coach hints generated"
+    return f"Loyalty coach hints generated for {shown} guests"
 
 
-def auto_optimize_flavor_mixes():
+def auto_optimize_flavor_mixes(top_n: int = 5):
     """Suggest optimized flavor mix combinations."""
-    print("⚙️ Auto optimization for flavor mixes complete.")
+    from flavor_mix_optimizer import optimize_flavor_mixes
+
+    run = optimize_flavor_mixes(top_n=int(top_n))
+    for size, ranked in run["results"].items():
+        for score, mix in ranked:
+            print(f"⚙️ {size}-flavor mix {' + '.join(mix)} (score {score:.3f})")
+    print(
+        f"⚙️ Auto optimization for flavor mixes complete: {len(run['changed'])} flavors rescored "
+        f"in {run['elapsed_seconds'] * 1e3:.1f} ms."
+    )
     return "Flavor mixes auto-optimized"
 
 
-def export_owner_trust_digest():
+def export_owner_trust_digest(month: str = None, binary: str = None):
     """Export trust digest report for lounge owners."""
-    print("📤 Owner trust digest exported.")
-    return "Owner trust digest export queued"
+    from trust_digest import export_trust_digest
+
+    export = export_trust_digest(month=month, binary=binary)
+    if "error" in export:
+        return export["error"]
+    print(
+        f"📤 Owner trust digest exported for {export['month']}: {export['lounges']} lounges, "
+        f"{export['daily_rows']} daily rows in {export['elapsed_seconds']:.2f}s -> {os.path.dirname(export['files'][0])}"
+    )
+    return f"Owner trust digest exported for {export['lounges']} lounges"
 
 
-def simulate_flavor_bloom():
+def simulate_flavor_bloom(scenarios: int = 20000, seed: int = None):
     """Simulate regional flavor demand spikes."""
-    print("🌸 Flavor bloom simulation run.")
-    return "Flavor bloom simulation completed"
+    from flavor_bloom import simulate_regions
+
+    results = simulate_regions(scenarios=int(scenarios), seed=None if seed is None else int(seed))
+    for r in results:
+        revenue, sessions = r["revenue"], r["sessions"]
+        print(
+            f"🌸 {r['region']} {r['days']}d x{r['scenarios']}: revenue p5 ${revenue['p5']:,.0f} / "
+            f"p50 ${revenue['p50']:,.0f} / p95 ${revenue['p95']:,.0f}, sessions p5 {sessions['p5']:.0f} / "
+            f"p50 {sessions['p50']:.0f} / p95 {sessions['p95']:.0f} ({r['elapsed_seconds'] * 1e3:.0f} ms)"
+        )
+    return f"Flavor bloom simulation completed for {len(results)} regions"
 
 
 def unlock_premium_reflex_tools():
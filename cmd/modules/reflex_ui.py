@@ -10,9 +10,14 @@ def render_reflex_loyalty(user_id: str):
     # injection logic or UI simulation here
     return f"Loyalty heatmap rendered for user {user_id}"
 
-def inject_reflex_heatmap():
+def inject_reflex_heatmap(lounge_id: str = None):
+    from trust_heatmap import write_heatmap_snapshot
+
     print("🔥 Injecting Reflex Heatmap into dashboard...")
-    return "Heatmap successfully injected."
+    result = write_heatmap_snapshot(lounge_id)
+    if "error" in result:
+        return result["error"]
+    return f"Heatmap successfully injected ({result['lounges']} lounges -> {result['snapshot']})."
 
 def deploy_flavor_mix_ui():
     """Deploy the Flavor Mix user interface.
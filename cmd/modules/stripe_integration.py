@@ -1,9 +1,19 @@
 import os
 import json
+import hashlib
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
 import yaml
 
+from atomic_io import atomic_path, atomic_write_json, atomic_write_yaml, file_lock, read_json
+from journal import AppendJournal, JournalCompactor
+from log_streams import filter_events, iter_yaml_items
+from loyalty_ledger import LoyaltyLedger, vault_rows
+from surge_pricing import SurgePriceTable
+
 try:
     import qrcode
 except ImportError:  # pragma: no cover
@@ -14,8 +24,29 @@ BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
 FLAVOR_LOG_PATH = os.path.join(BASE_DIR, "StripeFlavorLog.yaml")
 CHECKOUT_METADATA_PATH = os.path.join(BASE_DIR, "checkout_session_metadata.json")
 LOYALTY_VAULT_PATH = os.path.join(BASE_DIR, "ReflexLoyalty_Vault.yaml")
+LOYALTY_LEDGER_PATH = os.path.join(BASE_DIR, "ReflexLoyalty_Ledger.sqlite3")
 SURGE_PRICING_PATH = os.path.join(BASE_DIR, "StripeSurgePricing.json")
 SURGE_LOG_PATH = os.path.join(BASE_DIR, "SurgeLog_WeekendPeachMint.yaml")
+FLAVOR_JOURNAL_PATH = os.path.join(BASE_DIR, "StripeFlavorLog.journal.jsonl")
+SURGE_JOURNAL_PATH = os.path.join(BASE_DIR, "SurgeLog_WeekendPeachMint.journal.jsonl")
+
+# "journal" appends one JSON line per checkout; "yaml" rewrites the whole log.
+FLAVOR_LOG_MODE = os.environ.get("HOOKAHPLUS_FLAVOR_LOG_MODE", "journal")
+# One of "always", "interval" or "never" (see journal.AppendJournal).
+JOURNAL_FSYNC = os.environ.get("HOOKAHPLUS_JOURNAL_FSYNC", "interval")
+TRUST_ARC_THRESHOLD = 6.0
+# "sqlite" records loyalty in the indexed ledger; "yaml" appends to the vault.
+LOYALTY_BACKEND = os.environ.get("HOOKAHPLUS_LOYALTY_BACKEND", "sqlite")
+# "memory" serves surge prices from a write-behind table; "file" rewrites per call.
+SURGE_PRICING_MODE = os.environ.get("HOOKAHPLUS_SURGE_PRICING_MODE", "memory")
+SURGE_FLUSH_INTERVAL = float(os.environ.get("HOOKAHPLUS_SURGE_FLUSH_INTERVAL", "5"))
+SURGE_FLUSH_THRESHOLD = int(os.environ.get("HOOKAHPLUS_SURGE_FLUSH_THRESHOLD", "100"))
+
+_ledgers = {}
+_journals = {}
+_surge_tables = {}
+_flavor_listeners = []
+_loyalty_listeners = []
 
 
 def _load_yaml(path, default):
@@ -28,100 +59,493 @@ def _load_yaml(path, default):
 
 
 def _write_yaml(path, data):
-    with open(path, "w") as f:
-        yaml.safe_dump(data, f)
+    atomic_write_yaml(path, data)
 
 
-def inject_flavor_metadata_stripe(flavor_combo: str, surge_active: bool = False):
-    """Inject flavor combo metadata into a Stripe Checkout session."""
+def _journal(path, target):
+    # One journal per path: the fsync interval is tracked per instance.
+    journal = _journals.get(path)
+    if journal is None:
+        journal = _journals[path] = AppendJournal(path, target, fsync=JOURNAL_FSYNC)
+    return journal
+
+
+def _flavor_journal():
+    return _journal(FLAVOR_JOURNAL_PATH, FLAVOR_LOG_PATH)
+
+
+def iter_flavor_log(since=None, until=None, flavor=None):
+    """Stream flavor events (compacted YAML log, then the journal tail) one at a time.
+
+    ``since``/``until`` bound the event timestamp and ``flavor`` keeps events
+    whose combo contains that flavor; see ``log_streams.filter_events``.
+    """
+
+    def events():
+        yield from iter_yaml_items(FLAVOR_LOG_PATH)
+        yield from _flavor_journal()
+
+    return filter_events(events(), since=since, until=until, flavor=flavor)
+
+
+def iter_flavor_log_since(cursor):
+    """Stream flavor events logged after ``cursor`` (a ``journal.JournalCursor``), advancing it.
+
+    Unlike counting through ``iter_flavor_log``, this seeks: the YAML log is
+    skipped once the cursor is past it and the journal is read from the
+    cursor's byte offset.
+    """
+    return _flavor_journal().iter_since(cursor, lambda skip: iter_yaml_items(FLAVOR_LOG_PATH, skip=skip))
+
+
+def load_flavor_log():
+    """Return every flavor event: the compacted YAML log plus the journal tail."""
+    return list(iter_flavor_log())
+
+
+def compact_flavor_log():
+    """Fold journaled flavor events into ``StripeFlavorLog.yaml``."""
+
+    def merge(records):
+        log = _load_yaml(FLAVOR_LOG_PATH, [])
+        log.extend(records)
+        _write_yaml(FLAVOR_LOG_PATH, log)
+        return len(log)
+
+    with file_lock(FLAVOR_LOG_PATH):
+        return _flavor_journal().compact(merge)
+
+
+def start_flavor_log_compactor(interval: float = 300.0):
+    """Compact the flavor journal in a background thread every ``interval`` seconds."""
+    compactor = JournalCompactor(compact_flavor_log, interval)
+    compactor.start()
+    return compactor
+
+
+def _write_checkout_metadata(flavor_combo, surge_active):
     metadata = {
         "flavor_combo": flavor_combo,
         "surge_active": str(surge_active).lower(),
     }
-    with open(CHECKOUT_METADATA_PATH, "w") as f:
-        json.dump(metadata, f, indent=2)
-
-    log = _load_yaml(FLAVOR_LOG_PATH, [])
-    log.append(
-        {
-            "timestamp": datetime.utcnow().isoformat(),
-            "flavor_combo": flavor_combo,
-            "surge_active": surge_active,
-        }
-    )
-    _write_yaml(FLAVOR_LOG_PATH, log)
+    atomic_write_json(CHECKOUT_METADATA_PATH, metadata)
+
+
+def _append_flavor_events(events):
+    if FLAVOR_LOG_MODE == "journal":
+        _flavor_journal().append_many(events)
+    else:
+        with file_lock(FLAVOR_LOG_PATH):
+            log = _load_yaml(FLAVOR_LOG_PATH, [])
+            log.extend(events)
+            _write_yaml(FLAVOR_LOG_PATH, log)
+    for listener in _flavor_listeners:
+        listener(events)
+
+
+def add_flavor_listener(listener):
+    """Call ``listener(events)`` with every batch of flavor events once it is logged."""
+    if listener not in _flavor_listeners:
+        _flavor_listeners.append(listener)
+
+
+def remove_flavor_listener(listener):
+    if listener in _flavor_listeners:
+        _flavor_listeners.remove(listener)
+
+
+def _flavor_event(flavor_combo, surge_active, lounge_id=None):
+    event = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "flavor_combo": flavor_combo,
+        "surge_active": surge_active,
+    }
+    if lounge_id:
+        event["lounge_id"] = lounge_id
+    return event
+
+
+def inject_flavor_metadata_stripe(flavor_combo: str, surge_active: bool = False, lounge_id: str = None):
+    """Inject flavor combo metadata into a Stripe Checkout session."""
+    _write_checkout_metadata(flavor_combo, surge_active)
+    _append_flavor_events([_flavor_event(flavor_combo, surge_active, lounge_id)])
     return f"Metadata injected for {flavor_combo} (surge_active={surge_active})"
 
 
+def get_loyalty_ledger():
+    """Open (once per path) the loyalty ledger, importing the YAML vault on first use."""
+    ledger = _ledgers.get(LOYALTY_LEDGER_PATH)
+    if ledger is None:
+        ledger = LoyaltyLedger(LOYALTY_LEDGER_PATH)
+        ledger.import_yaml_vault(LOYALTY_VAULT_PATH)
+        _ledgers[LOYALTY_LEDGER_PATH] = ledger
+    return ledger
+
+
+def get_loyalty_balance(user_id: str) -> float:
+    """Return a user's running loyalty balance from the ledger."""
+    return get_loyalty_ledger().balance(user_id)
+
+
+def get_loyalty_history(user_id: str, limit: int = None):
+    """Return a user's loyalty transactions, newest first."""
+    return get_loyalty_ledger().history(user_id, limit)
+
+
+def iter_loyalty_events(user: str = None, since=None, until=None):
+    """Stream loyalty transactions oldest first from the active backend.
+
+    With the SQLite backend rows are paged out of the ledger; with the YAML
+    backend the vault's ``transactions`` and legacy ``sessions`` are streamed.
+    """
+    if LOYALTY_BACKEND == "sqlite":
+        events = get_loyalty_ledger().iter_transactions(user)
+    else:
+        columns = ("user", "amount", "trust_arc", "loyalty_gain", "surge_active", "timestamp", "lounge_id")
+        events = (
+            {**dict(zip(columns, row)), "surge_active": bool(row[4])} for row in vault_rows(LOYALTY_VAULT_PATH)
+        )
+    return filter_events(events, since=since, until=until, user=user)
+
+
+def iter_loyalty_events_since(cursor):
+    """Stream loyalty transactions recorded after ``cursor`` (a ``loyalty_ledger.LedgerCursor``), advancing it.
+
+    The ledger is queried from the cursor's row id; the YAML vault is read
+    past the entries the cursor has counted in each section.
+    """
+    if LOYALTY_BACKEND == "sqlite":
+        for tx in get_loyalty_ledger().iter_transactions(after_id=cursor.last_id):
+            cursor.last_id = tx["id"]
+            yield tx
+    else:
+        columns = ("user", "amount", "trust_arc", "loyalty_gain", "surge_active", "timestamp", "lounge_id")
+        for row in vault_rows(LOYALTY_VAULT_PATH, cursor):
+            yield {**dict(zip(columns, row)), "surge_active": bool(row[4])}
+
+
+def _loyalty_gain(amount, surge_active):
+    return round(amount * 0.1 + (0.5 if surge_active else 0), 2)
+
+
+def _loyalty_message(user_id, loyalty_gain):
+    msg = f"Loyalty +{loyalty_gain} attached for user {user_id}"
+    if loyalty_gain >= 1.0:
+        msg += " | Whisper milestone triggered"
+    return msg
+
+
+def _record_loyalty(transactions):
+    if LOYALTY_BACKEND == "sqlite":
+        get_loyalty_ledger().record_many(transactions)
+    else:
+        with file_lock(LOYALTY_VAULT_PATH):
+            data = _load_yaml(LOYALTY_VAULT_PATH, {})
+            vault = data.get("transactions", [])
+            vault.extend(
+                {
+                    "user": tx["user"],
+                    "amount": tx["amount"],
+                    "trust_arc": tx["trust_arc"],
+                    "loyalty_gain": tx["loyalty_gain"],
+                    **({"lounge_id": tx["lounge_id"]} if tx.get("lounge_id") else {}),
+                }
+                for tx in transactions
+            )
+            data["transactions"] = vault
+            _write_yaml(LOYALTY_VAULT_PATH, data)
+    for listener in _loyalty_listeners:
+        listener(transactions)
+
+
+def add_loyalty_listener(listener):
+    """Call ``listener(transactions)`` with every batch of loyalty transactions once it is recorded."""
+    if listener not in _loyalty_listeners:
+        _loyalty_listeners.append(listener)
+
+
+def remove_loyalty_listener(listener):
+    if listener in _loyalty_listeners:
+        _loyalty_listeners.remove(listener)
+
+
 def attach_loyalty_to_stripe_events(
-    user_id: str, amount: float, trust_arc: float, surge_active: bool = False
+    user_id: str, amount: float, trust_arc: float, surge_active: bool = False, lounge_id: str = None
 ):
     """Attach loyalty gain to a Stripe payment event."""
-    if trust_arc < 6.0:
+    if trust_arc < TRUST_ARC_THRESHOLD:
         return "TrustArc below threshold; no loyalty delta applied."
 
-    loyalty_gain = round(amount * 0.1 + (0.5 if surge_active else 0), 2)
-    data = _load_yaml(LOYALTY_VAULT_PATH, {})
-    transactions = data.get("transactions", [])
-    transactions.append(
-        {
-            "user": user_id,
-            "amount": amount,
-            "trust_arc": trust_arc,
-            "loyalty_gain": loyalty_gain,
-        }
+    loyalty_gain = _loyalty_gain(amount, surge_active)
+    _record_loyalty(
+        [
+            {
+                "user": user_id,
+                "amount": amount,
+                "trust_arc": trust_arc,
+                "loyalty_gain": loyalty_gain,
+                "surge_active": surge_active,
+                "lounge_id": lounge_id,
+            }
+        ]
     )
-    data["transactions"] = transactions
-    _write_yaml(LOYALTY_VAULT_PATH, data)
+    return _loyalty_message(user_id, loyalty_gain)
+
+
+def ingest_stripe_events(events):
+    """Apply flavor metadata and loyalty rules to a burst of payment events.
+
+    Each event is a dict with any of ``flavor_combo``, ``user_id``,
+    ``amount``, ``trust_arc``, ``surge_active`` and ``lounge_id``. Flavor events are
+    appended in one journal write and loyalty gains in one ledger
+    transaction. Returns per-event results plus batch throughput.
+    """
+    start = time.perf_counter()
+    results = []
+    flavor_events = []
+    transactions = []
+    last_flavor = None
+
+    for event in events:
+        surge_active = bool(event.get("surge_active", False))
+        lounge_id = event.get("lounge_id")
+        result = {}
+        flavor_combo = event.get("flavor_combo")
+        if flavor_combo:
+            flavor_events.append(_flavor_event(flavor_combo, surge_active, lounge_id))
+            last_flavor = (flavor_combo, surge_active)
+            result["flavor"] = f"Metadata injected for {flavor_combo} (surge_active={surge_active})"
+
+        user_id = event.get("user_id")
+        if user_id is not None:
+            amount = float(event.get("amount", 0))
+            trust_arc = float(event.get("trust_arc", 0))
+            if trust_arc < TRUST_ARC_THRESHOLD:
+                result["loyalty"] = "TrustArc below threshold; no loyalty delta applied."
+            else:
+                loyalty_gain = _loyalty_gain(amount, surge_active)
+                transactions.append(
+                    {
+                        "user": user_id,
+                        "amount": amount,
+                        "trust_arc": trust_arc,
+                        "loyalty_gain": loyalty_gain,
+                        "surge_active": surge_active,
+                        "lounge_id": lounge_id,
+                    }
+                )
+                result["loyalty"] = _loyalty_message(user_id, loyalty_gain)
+        results.append(result)
+
+    if last_flavor:
+        _write_checkout_metadata(*last_flavor)
+    if flavor_events:
+        _append_flavor_events(flavor_events)
+    if transactions:
+        _record_loyalty(transactions)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "results": results,
+        "count": len(results),
+        "elapsed_seconds": elapsed,
+        "events_per_second": len(results) / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def _surge_journal():
+    return _journal(SURGE_JOURNAL_PATH, SURGE_LOG_PATH)
+
+
+def get_surge_price_table():
+    """Return the resident surge price table, starting its flusher on first use."""
+    table = _surge_tables.get(SURGE_PRICING_PATH)
+    if table is None:
+        table = SurgePriceTable(
+            SURGE_PRICING_PATH,
+            log_journal=_surge_journal(),
+            flush_interval=SURGE_FLUSH_INTERVAL,
+            flush_threshold=SURGE_FLUSH_THRESHOLD,
+        ).start()
+        _surge_tables[SURGE_PRICING_PATH] = table
+    return table
+
+
+def get_surge_price(flavor: str, default=None):
+    """Look up a flavor's current surge price without touching disk."""
+    if SURGE_PRICING_MODE == "memory":
+        return get_surge_price_table().get(flavor, default)
+    return read_json(SURGE_PRICING_PATH, {}).get(flavor, default)
+
+
+def flush_surge_pricing():
+    """Persist buffered surge prices and log entries now."""
+    table = _surge_tables.get(SURGE_PRICING_PATH)
+    return table.flush() if table is not None else 0
+
+
+def iter_surge_log(since=None, until=None, flavor=None):
+    """Stream surge log entries (compacted YAML, then the journal tail) one at a time."""
+
+    def entries():
+        yield from iter_yaml_items(SURGE_LOG_PATH)
+        yield from _surge_journal()
+
+    return filter_events(entries(), since=since, until=until, flavor=flavor)
+
+
+def load_surge_log():
+    """Return every surge log entry: the compacted YAML plus the journal tail."""
+    return list(iter_surge_log())
 
-    msg = f"Loyalty +{loyalty_gain} attached for user {user_id}"
-    if loyalty_gain >= 1.0:
-        msg += " | Whisper milestone triggered"
-    return msg
 
+def compact_surge_log():
+    """Fold journaled surge entries into the surge YAML log."""
 
-def add_surge_addon_to_stripe_price(flavor: str, base_price: float):
-    """Adjust flavor price with weekend surge add-on."""
+    def merge(records):
+        log = _load_yaml(SURGE_LOG_PATH, [])
+        log.extend(records)
+        _write_yaml(SURGE_LOG_PATH, log)
+        return len(log)
+
+    with file_lock(SURGE_LOG_PATH):
+        return _surge_journal().compact(merge)
+
+
+def add_surge_addon_to_stripe_price(flavor: str, base_price: float, lounge_id: str = None):
+    """Adjust flavor price with weekend surge add-on.
+
+    ``lounge_id`` tags the surge log entry so digests can break price
+    changes down per lounge; the price itself is shared by every lounge.
+    """
     is_weekend = datetime.utcnow().weekday() >= 5
     surge_price = base_price + 3 if is_weekend else base_price
+    entry = {
+        "flavor": flavor,
+        "base_price": base_price,
+        "surge_price": surge_price,
+        "weekend": is_weekend,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    if lounge_id:
+        entry["lounge_id"] = lounge_id
 
-    pricing = {}
-    if os.path.exists(SURGE_PRICING_PATH):
-        with open(SURGE_PRICING_PATH, "r") as f:
-            pricing = json.load(f)
-    pricing[flavor] = surge_price
-    with open(SURGE_PRICING_PATH, "w") as f:
-        json.dump(pricing, f, indent=2)
-
-    log = _load_yaml(SURGE_LOG_PATH, [])
-    log.append(
-        {
-            "flavor": flavor,
-            "base_price": base_price,
-            "surge_price": surge_price,
-            "weekend": is_weekend,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-    )
-    _write_yaml(SURGE_LOG_PATH, log)
+    if SURGE_PRICING_MODE == "memory":
+        get_surge_price_table().set(flavor, surge_price, entry)
+    else:
+        with file_lock(SURGE_PRICING_PATH):
+            pricing = read_json(SURGE_PRICING_PATH, {})
+            pricing[flavor] = surge_price
+            atomic_write_json(SURGE_PRICING_PATH, pricing)
+
+        with file_lock(SURGE_LOG_PATH):
+            log = _load_yaml(SURGE_LOG_PATH, [])
+            log.append(entry)
+            _write_yaml(SURGE_LOG_PATH, log)
 
     display = "🔥 Trending Mix +$3" if is_weekend else "No surge pricing applied"
     return f"{display} | {flavor} price: ${surge_price}"
 
 
+def _qr_dir():
+    return os.path.join(BASE_DIR, "public", "qr")
+
+
+def _qr_cache_path(checkout_url):
+    digest = hashlib.sha256(checkout_url.encode("utf-8")).hexdigest()
+    return os.path.join(_qr_dir(), ".cache", f"{digest}.png")
+
+
+def _render_qr_to_cache(checkout_url, cache_path):
+    """Render one QR PNG into the content-addressed cache (process-pool worker)."""
+    img = qrcode.make(checkout_url)
+    with atomic_path(cache_path) as tmp_path:
+        img.save(tmp_path)
+    return cache_path
+
+
+def _publish_qr(cache_path, file_path):
+    """Point ``file_path`` at a cached PNG, hard-linking when the filesystem allows."""
+    if os.path.exists(file_path) and os.path.samefile(cache_path, file_path):
+        return
+    with atomic_path(file_path) as tmp_path:
+        os.remove(tmp_path)
+        try:
+            os.link(cache_path, tmp_path)
+        except OSError:
+            shutil.copyfile(cache_path, tmp_path)
+
+
 def generate_stripe_qr(lounge_id: str, session_id: str, checkout_url: str):
-    """Generate a QR code pointing to a Stripe Checkout session."""
+    """Generate a QR code pointing to a Stripe Checkout session.
+
+    PNGs are cached under ``public/qr/.cache`` by the SHA-256 of the URL, so
+    an unchanged checkout URL is never rendered twice.
+    """
     if qrcode is None:
         return "qrcode library not installed"
 
-    qr_dir = os.path.join(BASE_DIR, "public", "qr")
-    os.makedirs(qr_dir, exist_ok=True)
-    file_path = os.path.join(qr_dir, f"{lounge_id}_{session_id}.png")
-    img = qrcode.make(checkout_url)
-    img.save(file_path)
+    cache_path = _qr_cache_path(checkout_url)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    file_path = os.path.join(_qr_dir(), f"{lounge_id}_{session_id}.png")
+    if not os.path.exists(cache_path):
+        _render_qr_to_cache(checkout_url, cache_path)
+    _publish_qr(cache_path, file_path)
     return f"QR code generated at {file_path}"
 
 
+def _print_qr_progress(done, total):
+    print(f"\r🔳 QR codes rendered: {done}/{total}", end="\n" if done == total else "", flush=True)
+
+
+def generate_lounge_qr_set(lounge_id: str, sessions, max_workers: int = None, progress=_print_qr_progress):
+    """Generate every QR code for a lounge, rendering uncached URLs in a process pool.
+
+    ``sessions`` maps session ids (e.g. ``"table-4_happy-hour"``) to checkout
+    URLs. ``progress(done, total)`` is called as renders finish; pass
+    ``None`` to silence it. Returns file paths plus render/cache counts and
+    timing.
+    """
+    if qrcode is None:
+        return {"error": "qrcode library not installed"}
+
+    start = time.perf_counter()
+    sessions = dict(sessions)
+    os.makedirs(os.path.join(_qr_dir(), ".cache"), exist_ok=True)
+
+    cache_paths = {url: _qr_cache_path(url) for url in set(sessions.values())}
+    missing = {url: path for url, path in cache_paths.items() if not os.path.exists(path)}
+
+    total = len(missing)
+    if missing:
+        if max_workers == 1 or total == 1:
+            for done, (url, path) in enumerate(missing.items(), 1):
+                _render_qr_to_cache(url, path)
+                if progress:
+                    progress(done, total)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_render_qr_to_cache, url, path) for url, path in missing.items()]
+                for done, future in enumerate(as_completed(futures), 1):
+                    future.result()
+                    if progress:
+                        progress(done, total)
+
+    files = {}
+    for session_id, url in sessions.items():
+        file_path = os.path.join(_qr_dir(), f"{lounge_id}_{session_id}.png")
+        _publish_qr(cache_paths[url], file_path)
+        files[session_id] = file_path
+
+    return {
+        "lounge_id": lounge_id,
+        "files": files,
+        "rendered": total,
+        "cached": len(cache_paths) - total,
+        "elapsed_seconds": time.perf_counter() - start,
+    }
+
+
 def link_stripe_to_whisper(user_id: str, message: str = None):
     """Trigger a Whisper prompt after checkout success."""
     if not message:
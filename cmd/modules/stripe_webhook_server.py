@@ -0,0 +1,426 @@
+"""Asyncio webhook ingestion service in front of stripe_integration.
+
+Stripe-style webhook payloads are accepted on ``POST /webhook`` into a
+bounded queue and micro-batched into ``stripe_integration``: flavor and
+loyalty rules go through ``ingest_stripe_events`` and surge pricing through
+``add_surge_addon_to_stripe_price``. When the queue is full the server
+answers ``503`` with ``Retry-After`` instead of buffering without bound.
+``GET /stats`` reports queue depth, throughput and latency percentiles.
+
+Events are acknowledged with ``202`` before they are ingested, so a batch
+that fails is retried with backoff and, if it still fails, spooled to an
+append-only journal. The spool is replayed the next time the server starts.
+Each event carries an ``event_id`` and the stages it finished are recorded
+in a progress journal, so a retry or replay only re-runs the stage that
+failed: loyalty is never credited twice for one event.
+
+Only the standard library is used, so the service (and
+``scripts/fake_stripe_sender.py``) runs on loopback with no network access.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+from collections import deque
+
+import stripe_integration
+from journal import AppendJournal
+
+MAX_BODY_BYTES = 1 << 20
+SIGNATURE_TOLERANCE_SECONDS = 300
+HANDLED_EVENT_TYPES = ("checkout.session.completed", "payment_intent.succeeded", "charge.succeeded")
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: int = None) -> str:
+    """Build a ``Stripe-Signature`` header value for ``payload``."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    digest = hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(payload: bytes, header: str, secret: str) -> bool:
+    parts = dict(item.split("=", 1) for item in (header or "").split(",") if "=" in item)
+    try:
+        timestamp = int(parts.get("t", ""))
+    except ValueError:
+        return False
+    if abs(time.time() - timestamp) > SIGNATURE_TOLERANCE_SECONDS:
+        return False
+    expected = sign_payload(payload, secret, timestamp).split("v1=", 1)[1]
+    return hmac.compare_digest(expected, parts.get("v1", ""))
+
+
+def _truthy(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def event_to_ingest(event: dict):
+    """Map a Stripe event to the flat dict ``ingest_stripe_events`` expects.
+
+    Returns ``None`` for event types this service does not handle. Amounts
+    arrive in cents, as Stripe sends them.
+    """
+    if event.get("type") not in HANDLED_EVENT_TYPES:
+        return None
+    obj = (event.get("data") or {}).get("object") or {}
+    metadata = obj.get("metadata") or {}
+    cents = obj.get("amount_total", obj.get("amount", 0)) or 0
+    ingest = {
+        "surge_active": _truthy(metadata.get("surge_active", False)),
+        "amount": cents / 100,
+    }
+    if metadata.get("flavor_combo"):
+        ingest["flavor_combo"] = metadata["flavor_combo"]
+    if metadata.get("lounge_id"):
+        ingest["lounge_id"] = metadata["lounge_id"]
+    user_id = metadata.get("user_id") or obj.get("customer")
+    if user_id and "trust_arc" in metadata:
+        ingest["user_id"] = user_id
+        ingest["trust_arc"] = float(metadata["trust_arc"])
+    if metadata.get("base_price") and metadata.get("flavor_combo"):
+        ingest["base_price"] = float(metadata["base_price"])
+    return ingest
+
+
+class _BadRequest(Exception):
+    """A request that gets an error response and closes the connection."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class WebhookIngestionServer:
+    """Bounded-queue HTTP front end that micro-batches webhook events."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8787,
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        batch_wait: float = 0.05,
+        webhook_secret: str = None,
+        ingest=None,
+        max_attempts: int = 3,
+        retry_backoff: float = 0.5,
+        spool_path: str = None,
+        progress_path: str = None,
+    ):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.webhook_secret = webhook_secret
+        self.ingest = ingest or self._ingest_batch
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.spool = AppendJournal(
+            spool_path or os.path.join(stripe_integration.BASE_DIR, "StripeWebhookSpool.journal.jsonl"),
+            fsync="always",
+        )
+        self.progress = AppendJournal(progress_path or self.spool.path + ".progress", fsync="always")
+        self._done = {(r["event_id"], r["stage"]) for r in self.progress}
+        self.queue = None
+        self._server = None
+        self._batcher = None
+        self._started_at = None
+        self._latencies = deque(maxlen=4096)
+        self._batch_seconds = deque(maxlen=256)
+        self.counters = {
+            "accepted": 0,
+            "ignored": 0,
+            "rejected_full": 0,
+            "rejected_invalid": 0,
+            "processed": 0,
+            "failed": 0,
+            "retried": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "batches": 0,
+        }
+
+    def _pending(self, events, stage):
+        return [e for e in events if (e.get("event_id"), stage) not in self._done]
+
+    def _mark_done(self, events, stage):
+        done = [(e["event_id"], stage) for e in events if e.get("event_id")]
+        self.progress.append_many({"event_id": event_id, "stage": stage} for event_id, stage in done)
+        self._done.update(done)
+
+    def _ingest_batch(self, events):
+        """Run the ingest and surge stages, skipping events that already finished a stage.
+
+        Surge progress is recorded even when a later add-on call raises, so a
+        retry resumes after the last one that went through.
+        """
+        pending = self._pending(events, "ingest")
+        result = stripe_integration.ingest_stripe_events(pending) if pending else None
+        self._mark_done(pending, "ingest")
+        surged = []
+        try:
+            for event in self._pending([e for e in events if "base_price" in e], "surge"):
+                stripe_integration.add_surge_addon_to_stripe_price(
+                    event["flavor_combo"], event["base_price"], event.get("lounge_id")
+                )
+                surged.append(event)
+        finally:
+            self._mark_done(surged, "surge")
+        return result
+
+    def _forget_progress(self):
+        """Drop stage markers once no spooled event can be replayed against them."""
+        if os.path.exists(self.spool.path) or os.path.exists(self.spool.compacting_path):
+            return
+        self._done.clear()
+        try:
+            os.remove(self.progress.path)
+        except FileNotFoundError:
+            pass
+
+    async def start(self):
+        await self.replay_spool()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._started_at = time.monotonic()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._batcher = asyncio.create_task(self._run_batches())
+        return self
+
+    async def stop(self, drain: bool = True):
+        """Stop accepting connections, optionally drain the queue, then stop batching."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if drain and self.queue is not None:
+            await self.queue.join()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        await asyncio.to_thread(stripe_integration.flush_surge_pricing)
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"🔌 Stripe webhook ingestion listening on http://{self.host}:{self.port}/webhook")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    # -- batching -----------------------------------------------------------
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _ingest_with_retry(self, events):
+        """Ingest one batch, retrying with backoff; returns the last error, or ``None`` on success."""
+        for attempt in range(max(1, self.max_attempts)):
+            if attempt:
+                self.counters["retried"] += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                await asyncio.to_thread(self.ingest, events)
+                return None
+            except Exception as e:  # keep serving; the failure is visible in /stats
+                error = e
+        return error
+
+    async def replay_spool(self):
+        """Ingest events spooled by failed batches; returns how many were replayed.
+
+        If ingestion fails again the spool is kept for the next start.
+        """
+        try:
+            replayed = await asyncio.to_thread(self.spool.compact, self.ingest)
+        except Exception as e:
+            print(f"❌ Replaying spooled webhook events failed, keeping them: {e}")
+            return 0
+        self._forget_progress()
+        self.counters["replayed"] += replayed
+        return replayed
+
+    async def _run_batches(self):
+        while True:
+            batch = await self._next_batch()
+            started = time.monotonic()
+            events = [event for _, event in batch]
+            try:
+                error = await self._ingest_with_retry(events)
+                if error is None:
+                    self.counters["processed"] += len(batch)
+                    if self._done:
+                        await asyncio.to_thread(self._forget_progress)
+                else:
+                    # The events were already acknowledged: keep them for replay.
+                    self.counters["failed"] += len(batch)
+                    await asyncio.to_thread(self.spool.append_many, events)
+                    self.counters["spooled"] += len(batch)
+                    print(f"❌ Webhook batch of {len(batch)} failed {self.max_attempts} times, spooled: {error}")
+            finally:
+                done = time.monotonic()
+                self._batch_seconds.append(done - started)
+                self._latencies.extend(done - enqueued for enqueued, _ in batch)
+                self.counters["batches"] += 1
+                for _ in batch:
+                    self.queue.task_done()
+
+    # -- HTTP ---------------------------------------------------------------
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _BadRequest as e:
+                    # The body was not read, so the connection cannot be reused.
+                    await self._write_response(writer, e.status, {"error": str(e)}, None, False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, extra = self._route(method, path, headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, status, payload, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise _BadRequest(400, "invalid Content-Length") from None
+        if length < 0:
+            raise _BadRequest(400, "invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise _BadRequest(413, f"body larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+
+    @staticmethod
+    async def _write_response(writer, status, payload, extra_headers, keep_alive):
+        reasons = {200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized",
+                   404: "Not Found", 413: "Payload Too Large", 503: "Service Unavailable"}
+        body = json.dumps(payload).encode("utf-8")
+        headers = [
+            f"HTTP/1.1 {status} {reasons.get(status, 'OK')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        headers.extend(f"{k}: {v}" for k, v in (extra_headers or {}).items())
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    def _route(self, method, path, headers, body):
+        if method == "POST" and path == "/webhook":
+            return self._accept_webhook(headers, body)
+        if method == "GET" and path == "/stats":
+            return 200, self.stats(), None
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}, None
+        return 404, {"error": "not found"}, None
+
+    def _accept_webhook(self, headers, body):
+        if self.webhook_secret and not verify_signature(body, headers.get("stripe-signature"), self.webhook_secret):
+            self.counters["rejected_invalid"] += 1
+            return 401, {"error": "invalid signature"}, None
+        try:
+            event = json.loads(body)
+            ingest = event_to_ingest(event)
+        except (ValueError, TypeError, AttributeError):
+            self.counters["rejected_invalid"] += 1
+            return 400, {"error": "invalid payload"}, None
+        if ingest is None:
+            self.counters["ignored"] += 1
+            return 200, {"status": "ignored"}, None
+        ingest["event_id"] = str(event.get("id") or uuid.uuid4().hex)
+        try:
+            self.queue.put_nowait((time.monotonic(), ingest))
+        except asyncio.QueueFull:
+            self.counters["rejected_full"] += 1
+            return 503, {"error": "queue full"}, {"Retry-After": "1"}
+        self.counters["accepted"] += 1
+        return 202, {"status": "queued", "queue_depth": self.queue.qsize()}, None
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+        batches = sorted(self._batch_seconds)
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_capacity": self.queue_size,
+            "uptime_seconds": round(uptime, 3),
+            "events_per_second": round(self.counters["processed"] / uptime, 1) if uptime else 0.0,
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 50) * 1e3, 3),
+                "p90": round(_percentile(latencies, 90) * 1e3, 3),
+                "p99": round(_percentile(latencies, 99) * 1e3, 3),
+            },
+            "batch_ms_p50": round(_percentile(batches, 50) * 1e3, 3),
+            **self.counters,
+        }
+
+
+def run_webhook_server(host: str = "127.0.0.1", port: int = 8787):
+    """Run the ingestion service until interrupted."""
+    server = WebhookIngestionServer(
+        host=host,
+        port=int(port),
+        queue_size=int(os.environ.get("HOOKAHPLUS_WEBHOOK_QUEUE_SIZE", "10000")),
+        batch_size=int(os.environ.get("HOOKAHPLUS_WEBHOOK_BATCH_SIZE", "500")),
+        webhook_secret=os.environ.get("STRIPE_WEBHOOK_SECRET"),
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return "Stripe webhook ingestion stopped"
+
+
+if __name__ == "__main__":
+    run_webhook_server()
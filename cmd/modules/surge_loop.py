@@ -1,12 +1,21 @@
 """Surge Add-On logic for quarterly rotations."""
 
 
-def run_quarterly_surge_rotation():
-    """Evaluate the quarterly Surge Add-On rotation."""
-    rotation = {
-        "Peach + Mint": "Active",
-        "Strawberry + Lemon": "In Review",
-        "Apple + Grape": "Pending",
-    }
-    print("🔁 Surge rotation processed for the quarter.")
-    return rotation
+def run_quarterly_surge_rotation(quarter: str = None):
+    """Evaluate the quarterly Surge Add-On rotation.
+
+    Returns ``{lounge_id: {combo: "Active" | "In Review" | "Pending"}}``.
+    """
+    from surge_rotation import run_rotation
+
+    run = run_rotation(quarter)
+    if "error" in run:
+        return run
+    if run["default"]:
+        print(f"🔁 Surge rotation for {run['quarter']}: no checkouts yet, keeping the default rotation.")
+    else:
+        print(
+            f"🔁 Surge rotation processed for {run['quarter']}: {len(run['rotations'])} lounges, "
+            f"{len(run['rescored'])} rescored (+{run['events_added']} events)."
+        )
+    return run["rotations"]
@@ -0,0 +1,106 @@
+"""Resident surge price table with write-behind persistence."""
+
+import atexit
+import threading
+import warnings
+
+from atomic_io import atomic_write_json, file_lock, read_json
+
+
+class SurgePriceTable:
+    """Serve surge prices from memory and persist them in the background.
+
+    ``set()`` only touches memory and a pending buffer. Dirty prices are
+    merged into ``pricing_path`` (and buffered log entries appended to
+    ``log_journal``) once ``flush_threshold`` updates pile up, every
+    ``flush_interval`` seconds while the flusher thread runs, and at
+    interpreter exit. Without a ``log_journal`` log entries are not kept;
+    the first one passed to ``set()`` raises a warning saying so.
+    """
+
+    def __init__(self, pricing_path: str, log_journal=None, flush_interval: float = 5.0, flush_threshold: int = 100):
+        self.pricing_path = pricing_path
+        self.log_journal = log_journal
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._lock = threading.RLock()
+        self._prices = dict(read_json(pricing_path, {}))
+        self._dirty = {}
+        self._pending_log = []
+        self._warned_no_log = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        atexit.register(self.close)
+
+    def get(self, flavor: str, default=None):
+        return self._prices.get(flavor, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._prices)
+
+    def set(self, flavor: str, price: float, log_entry: dict = None):
+        with self._lock:
+            self._prices[flavor] = price
+            self._dirty[flavor] = price
+            if log_entry is not None:
+                if self.log_journal is not None:
+                    self._pending_log.append(log_entry)
+                elif not self._warned_no_log:
+                    self._warned_no_log = True
+                    warnings.warn(f"SurgePriceTable({self.pricing_path!r}) has no log journal; "
+                                  "surge log entries are not recorded", RuntimeWarning, stacklevel=2)
+            pending = len(self._dirty) + len(self._pending_log)
+        if pending >= self.flush_threshold:
+            self.flush()
+
+    @property
+    def pending(self):
+        return len(self._dirty) + len(self._pending_log)
+
+    def flush(self):
+        """Write dirty prices and buffered log entries to disk; returns entries written."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            pending_log, self._pending_log = self._pending_log, []
+        if not dirty and not pending_log:
+            return 0
+        try:
+            if dirty:
+                # Merge with what is on disk so other workers' prices survive,
+                # then adopt the merged view.
+                with file_lock(self.pricing_path):
+                    pricing = read_json(self.pricing_path, {})
+                    pricing.update(dirty)
+                    atomic_write_json(self.pricing_path, pricing)
+                with self._lock:
+                    pricing.update(self._dirty)
+                    self._prices = pricing
+            if pending_log:
+                self.log_journal.append_many(pending_log)
+        except BaseException:
+            with self._lock:
+                self._dirty = {**dirty, **self._dirty}
+                self._pending_log = pending_log + self._pending_log
+            raise
+        return len(dirty) + len(pending_log)
+
+    def start(self):
+        """Start the interval flusher thread (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="surge-price-flusher")
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the flusher thread and flush whatever is still buffered."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+
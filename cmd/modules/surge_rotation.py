@@ -0,0 +1,216 @@
+"""Quarterly Surge Add-On rotation scored from checkout and burnout data.
+
+Checkouts are folded per quarter, lounge and flavor combo into four counts:
+checkouts in each of the quarter's three months plus surge checkouts. At
+rotation time, each lounge's combos are scored on:
+
+* ``sales``: log-scaled against the lounge's best-selling combo;
+* ``momentum``: the latest month against the quarter's monthly average;
+* ``surge``: the share of checkouts already taken with surge pricing;
+* ``burnout``: the mean catalog burnout of the combo's flavors, penalised.
+
+Scores are computed for every lounge at once as (lounges x combos) arrays.
+Combos are ranked and the top ``ROTATION_SLOTS`` become Active, In Review
+and Pending.
+
+The engine is pickled with a cursor into the flavor log, the lounges
+touched by new checkouts since the last rotation and the burnout each
+lounge was scored with, so a later run reads only new checkouts and
+re-scores only the lounges whose counts or flavors' burnout changed. The
+state lives in ``HOOKAHPLUS_STATE_DIR`` (default ``data/``).
+
+With no checkouts for the quarter, the standing ``DEFAULT_ROTATION`` is
+returned for ``unassigned`` so there is always something to run.
+"""
+
+import os
+import pickle
+import re
+import time
+from datetime import datetime, timezone
+
+from atomic_io import atomic_write, file_lock
+from journal import JournalCursor
+from log_streams import event_time, split_combo
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+STATE_DIR = os.environ.get("HOOKAHPLUS_STATE_DIR", os.path.join(BASE_DIR, "data"))
+STATE_PATH = os.path.join(STATE_DIR, "surge_rotation.state.pickle")
+STATE_VERSION = 2
+UNASSIGNED = "unassigned"
+ROTATION_SLOTS = (("Active", 1), ("In Review", 1), ("Pending", 1))
+DEFAULT_ROTATION = {
+    "Peach + Mint": "Active",
+    "Strawberry + Lemon": "In Review",
+    "Apple + Grape": "Pending",
+}
+DEFAULT_WEIGHTS = {"sales": 0.5, "momentum": 0.2, "surge": 0.1, "burnout": 0.3}
+
+
+def quarter_of(timestamp):
+    """Return ``("YYYY-Qn", month index 0-2)`` for a timestamp (UTC)."""
+    at = datetime.fromtimestamp(event_time(timestamp), timezone.utc)
+    return f"{at.year}-Q{(at.month - 1) // 3 + 1}", (at.month - 1) % 3
+
+
+class SurgeRotation:
+    """Per-quarter checkout counts and the last rotation computed for each lounge."""
+
+    def __init__(self):
+        self.counts = {}  # quarter -> lounge -> combo -> [month0, month1, month2, surge]
+        self.rotations = {}  # quarter -> lounge -> {"rotation", "scores", "burnout"}
+        self.dirty = {}  # quarter -> lounges with checkouts since their last scoring
+        self.contexts = {}  # quarter -> (month, weights, slots) of the last rotation
+        self.cursor = JournalCursor()  # how far into the flavor log catch_up has read
+
+    def record(self, event):
+        combo = event.get("flavor_combo")
+        if not combo or event.get("timestamp") is None:
+            return
+        quarter, month = quarter_of(event["timestamp"])
+        lounge = event.get("lounge_id") or UNASSIGNED
+        row = self.counts.setdefault(quarter, {}).setdefault(lounge, {}).setdefault(combo, [0, 0, 0, 0])
+        row[month] += 1
+        self.dirty.setdefault(quarter, set()).add(lounge)
+        if event.get("surge_active"):
+            row[3] += 1
+
+    def catch_up(self, events):
+        """Fold in new events from ``stripe_integration.iter_flavor_log_since(self.cursor)``."""
+        added = 0
+        for event in events:
+            self.record(event)
+            added += 1
+        return added
+
+    def rotate(self, quarter: str, catalog: dict, month: int = 2, weights: dict = None):
+        """Rank every lounge's combos for ``quarter``; returns ``(rotations, rescored lounges)``.
+
+        ``month`` is the latest month of the quarter with data (0-2) and
+        ``catalog`` maps flavor names to stats with a ``burnout`` value.
+        """
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        lounges = self.counts.get(quarter, {})
+        known = [stats["burnout"] for stats in catalog.values()]
+        default_burnout = sum(known) / len(known) if known else 0.0
+        stored = self.rotations.setdefault(quarter, {})
+        context = (month, tuple(sorted(weights.items())), ROTATION_SLOTS)
+        if self.contexts.get(quarter) != context:
+            changed = list(lounges)
+        else:
+            dirty = self.dirty.get(quarter, set())
+            changed = [
+                lounge for lounge in lounges
+                if lounge in dirty or lounge not in stored or any(
+                    catalog.get(name, {}).get("burnout", default_burnout) != value
+                    for name, value in stored[lounge]["burnout"].items()
+                )
+            ]
+        if changed:
+            scored = self._score(quarter, changed, catalog, default_burnout, month, weights)
+            for lounge, (rotation, scores) in zip(changed, scored):
+                burnout = {name: catalog.get(name, {}).get("burnout", default_burnout)
+                           for combo in lounges[lounge] for name in split_combo(combo)}
+                stored[lounge] = {"rotation": rotation, "scores": scores, "burnout": burnout}
+        self.contexts[quarter] = context
+        self.dirty.pop(quarter, None)
+        return {lounge: stored[lounge]["rotation"] for lounge in sorted(lounges)}, changed
+
+    def _score(self, quarter, lounges, catalog, default_burnout, month, weights):
+        combos = sorted({combo for lounge in lounges for combo in self.counts[quarter][lounge]})
+        column = {combo: i for i, combo in enumerate(combos)}
+        counts = np.zeros((len(lounges), len(combos), 4))
+        for row, lounge in enumerate(lounges):
+            for combo, values in self.counts[quarter][lounge].items():
+                counts[row, column[combo]] = values
+        burnout = np.array([
+            np.mean([catalog.get(name, {}).get("burnout", default_burnout) for name in split_combo(combo)] or [default_burnout])
+            for combo in combos
+        ])
+
+        monthly = counts[:, :, : month + 1]
+        sales = monthly.sum(axis=2)
+        sold = sales > 0
+        best = np.log1p(sales.max(axis=1, keepdims=True))
+        sales_score = np.divide(np.log1p(sales), best, out=np.zeros_like(sales), where=best > 0)
+        average = sales / (month + 1)
+        momentum = np.divide(monthly[:, :, -1], average, out=np.zeros_like(sales), where=average > 0)
+        surge_share = np.divide(counts[:, :, 3], sales, out=np.zeros_like(sales), where=sold)
+        score = (
+            weights["sales"] * sales_score
+            + weights["momentum"] * np.clip(momentum, 0, 2) / 2
+            + weights["surge"] * np.clip(surge_share, 0, 1)
+            - weights["burnout"] * burnout[None, :] / 10
+        )
+        score = np.where(sold, score, -np.inf)
+        # Highest score first, ties broken by combo name.
+        order = np.lexsort((np.broadcast_to(np.arange(len(combos)), score.shape), -score), axis=1)
+
+        states = [state for state, slots in ROTATION_SLOTS for _ in range(slots)]
+        results = []
+        for row in range(len(lounges)):
+            rotation, scores = {}, {}
+            for rank, col in enumerate(order[row, : len(states)]):
+                if not sold[row, col]:
+                    break
+                rotation[combos[col]] = states[rank]
+                scores[combos[col]] = round(float(score[row, col]), 4)
+            results.append((rotation, scores))
+        return results
+
+    def save(self, path: str = STATE_PATH):
+        payload = pickle.dumps({"version": STATE_VERSION, "rotation": self}, pickle.HIGHEST_PROTOCOL)
+        with file_lock(path):
+            atomic_write(path, payload)
+        return path
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH):
+        """Return the saved engine, or a fresh one if there is no usable state."""
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return cls()
+        if state.get("version") != STATE_VERSION:
+            return cls()
+        return state["rotation"]
+
+
+def current_quarter():
+    now = datetime.now(timezone.utc)
+    return f"{now.year}-Q{(now.month - 1) // 3 + 1}", (now.month - 1) % 3
+
+
+def run_rotation(quarter: str = None, weights: dict = None, state_path: str = STATE_PATH):
+    """Fold new checkouts into the saved engine and rotate ``quarter`` (``YYYY-Qn``, default: current)."""
+    import stripe_integration
+    from flavor_mix_optimizer import load_catalog
+
+    if np is None:
+        return {"error": "numpy library not installed"}
+    if quarter is not None and not re.fullmatch(r"\d{4}-Q[1-4]", quarter):
+        return {"error": f"Invalid quarter {quarter!r}: expected YYYY-Qn, e.g. 2025-Q3"}
+    start = time.perf_counter()
+    this_quarter, this_month = current_quarter()
+    quarter = quarter or this_quarter
+    # A finished quarter is scored on all three months; the running one up to this month.
+    month = this_month if quarter == this_quarter else 2
+    engine = SurgeRotation.load(state_path)
+    added = engine.catch_up(stripe_integration.iter_flavor_log_since(engine.cursor))
+    rotations, rescored = engine.rotate(quarter, load_catalog(), month=month, weights=weights)
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    engine.save(state_path)
+    return {
+        "quarter": quarter,
+        "rotations": rotations or {UNASSIGNED: dict(DEFAULT_ROTATION)},
+        "default": not rotations,
+        "rescored": rescored,
+        "events_added": added,
+        "elapsed_seconds": time.perf_counter() - start,
+    }
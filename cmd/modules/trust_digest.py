@@ -0,0 +1,283 @@
+"""Monthly owner trust digests, one row set per lounge.
+
+The export runs in three steps:
+
+1. One streaming pass over the flavor log, the surge log and the loyalty
+   events for the period. Each event is cut down to a short tuple and
+   appended to its lounge's partition file (``lounge_id`` on the event,
+   else ``unassigned``). Rows are buffered and flushed in blocks, so memory
+   stays bounded no matter how long the logs are.
+2. Partitions are aggregated in parallel worker processes.
+3. Results are written column-per-field as ``digest_summary.csv`` (one row
+   per lounge) and ``digest_daily.csv`` (one row per lounge and day), plus
+   Parquet (pyarrow) or ``.npz`` (NumPy) copies when ``binary`` is set.
+
+``loyalty_revenue`` sums the amounts of loyalty transactions only: checkout
+flavor events carry no amount, so it is not a lounge's total revenue.
+"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from atomic_io import atomic_path
+from log_streams import event_time
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+EXPORT_DIR = os.path.join(BASE_DIR, "exports", "trust_digest")
+UNASSIGNED = "unassigned"
+FLUSH_ROWS = 50000
+BINARY_FORMATS = ("parquet", "npz")
+
+SUMMARY_COLUMNS = (
+    "lounge_id", "checkouts", "surge_checkouts", "top_flavor", "top_flavor_checkouts",
+    "loyalty_transactions", "unique_users", "loyalty_revenue", "loyalty_gain", "avg_trust_arc",
+    "surge_price_changes", "avg_surge_uplift", "first_event", "last_event",
+)
+DAILY_COLUMNS = (
+    "lounge_id", "date", "checkouts", "surge_checkouts", "loyalty_transactions",
+    "unique_users", "loyalty_revenue", "loyalty_gain", "avg_trust_arc",
+)
+
+
+def month_bounds(month: str = None):
+    """Return ``(since, until)`` datetimes for ``YYYY-MM`` (default: the current month)."""
+    start = datetime.strptime(month, "%Y-%m") if month else datetime.utcnow().replace(day=1)
+    start = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    until = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, until
+
+
+class _Partitioner:
+    """Buffer compact rows per lounge and append them to one file per lounge."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}  # lounge_id -> path
+        self._buffers = {}
+        self._buffered = 0
+
+    def add(self, lounge_id, row):
+        self._buffers.setdefault(lounge_id or UNASSIGNED, []).append(row)
+        self._buffered += 1
+        if self._buffered >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        for lounge_id, rows in self._buffers.items():
+            path = self.files.get(lounge_id)
+            if path is None:
+                path = self.files[lounge_id] = os.path.join(self.directory, f"part-{len(self.files):05d}.jsonl")
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+        self._buffers.clear()
+        self._buffered = 0
+
+
+def partition_events(directory, flavor_events, surge_entries, loyalty_events):
+    """Stream every source once into per-lounge partition files; returns ``{lounge_id: path}``."""
+    partitioner = _Partitioner(directory)
+    for event in flavor_events:
+        partitioner.add(event.get("lounge_id"), [
+            "f", event_time(event["timestamp"]), event.get("flavor_combo"), bool(event.get("surge_active")),
+        ])
+    for entry in surge_entries:
+        partitioner.add(entry.get("lounge_id"), [
+            "s", event_time(entry["timestamp"]), entry.get("flavor"),
+            float(entry.get("base_price") or 0), float(entry.get("surge_price") or 0),
+        ])
+    for tx in loyalty_events:
+        partitioner.add(tx.get("lounge_id"), [
+            "l", event_time(tx["timestamp"]), str(tx["user"]), float(tx.get("amount") or 0),
+            tx.get("trust_arc"), float(tx.get("loyalty_gain") or 0),
+        ])
+    partitioner.flush()
+    return partitioner.files
+
+
+def _day(at):
+    return datetime.fromtimestamp(at, timezone.utc).date().isoformat()
+
+
+def aggregate_partition(job):
+    """Fold one lounge's partition file into its summary row and daily rows (worker)."""
+    lounge_id, path = job
+    flavors = Counter()
+    days = {}
+    users = set()
+    summary = dict.fromkeys(SUMMARY_COLUMNS[1:], 0)
+    trust_sum = trust_n = uplift_sum = 0.0
+    first = last = None
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            kind, at = row[0], row[1]
+            first = at if first is None or at < first else first
+            last = at if last is None or at > last else last
+            if kind == "s":
+                summary["surge_price_changes"] += 1
+                uplift_sum += row[4] - row[3]
+                continue
+            day = days.get(_day(at))
+            if day is None:
+                day = days[_day(at)] = {"checkouts": 0, "surge_checkouts": 0, "loyalty_transactions": 0,
+                                        "users": set(), "loyalty_revenue": 0.0, "loyalty_gain": 0.0,
+                                        "trust_sum": 0.0, "trust_n": 0}
+            if kind == "f":
+                summary["checkouts"] += 1
+                day["checkouts"] += 1
+                if row[3]:
+                    summary["surge_checkouts"] += 1
+                    day["surge_checkouts"] += 1
+                if row[2]:
+                    flavors[row[2]] += 1
+            else:
+                _, _, user, amount, trust_arc, gain = row
+                summary["loyalty_transactions"] += 1
+                summary["loyalty_revenue"] += amount
+                summary["loyalty_gain"] += gain
+                users.add(user)
+                day["loyalty_transactions"] += 1
+                day["users"].add(user)
+                day["loyalty_revenue"] += amount
+                day["loyalty_gain"] += gain
+                if trust_arc is not None:
+                    trust_sum += trust_arc
+                    trust_n += 1
+                    day["trust_sum"] += trust_arc
+                    day["trust_n"] += 1
+
+    top = flavors.most_common(1)
+    summary.update(
+        lounge_id=lounge_id,
+        top_flavor=top[0][0] if top else "",
+        top_flavor_checkouts=top[0][1] if top else 0,
+        unique_users=len(users),
+        loyalty_revenue=round(summary["loyalty_revenue"], 2),
+        loyalty_gain=round(summary["loyalty_gain"], 2),
+        avg_trust_arc=round(trust_sum / trust_n, 2) if trust_n else "",
+        avg_surge_uplift=round(uplift_sum / summary["surge_price_changes"], 2) if summary["surge_price_changes"] else "",
+        first_event=datetime.fromtimestamp(first, timezone.utc).isoformat() if first is not None else "",
+        last_event=datetime.fromtimestamp(last, timezone.utc).isoformat() if last is not None else "",
+    )
+    daily = [
+        {
+            "lounge_id": lounge_id,
+            "date": date,
+            "checkouts": day["checkouts"],
+            "surge_checkouts": day["surge_checkouts"],
+            "loyalty_transactions": day["loyalty_transactions"],
+            "unique_users": len(day["users"]),
+            "loyalty_revenue": round(day["loyalty_revenue"], 2),
+            "loyalty_gain": round(day["loyalty_gain"], 2),
+            "avg_trust_arc": round(day["trust_sum"] / day["trust_n"], 2) if day["trust_n"] else "",
+        }
+        for date, day in sorted(days.items())
+    ]
+    return summary, daily
+
+
+def _write_csv(path, columns, rows):
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+    return path
+
+
+def _columns(columns, rows):
+    return {name: [row[name] if row[name] != "" else None for row in rows] for name in columns}
+
+
+def _write_binary(path_base, columns, rows, binary):
+    if binary == "parquet":
+        path = path_base + ".parquet"
+        with atomic_path(path) as tmp_path:
+            pyarrow.parquet.write_table(pyarrow.table(_columns(columns, rows)), tmp_path, compression="zstd")
+        return path
+    if binary == "npz":
+        path = path_base + ".npz"
+        arrays = {}
+        for name, values in _columns(columns, rows).items():
+            if all(isinstance(v, (int, float)) or v is None for v in values):
+                arrays[name] = np.array([np.nan if v is None else v for v in values], dtype=float)
+            else:
+                arrays[name] = np.array(["" if v is None else str(v) for v in values])
+        with atomic_path(path) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **arrays)
+        return path
+    raise ValueError(f"Unknown binary format: {binary} (expected {' or '.join(BINARY_FORMATS)})")
+
+
+def export_trust_digest(month: str = None, output_dir: str = None, binary: str = None, workers: int = None):
+    """Export the digest for ``month`` (``YYYY-MM``); returns paths and row counts."""
+    import stripe_integration
+
+    if binary and binary not in BINARY_FORMATS:
+        return {"error": f"Unknown binary format: {binary} (expected {' or '.join(BINARY_FORMATS)})"}
+    if binary == "parquet" and pyarrow is None:
+        return {"error": "pyarrow library not installed"}
+    if binary == "npz" and np is None:
+        return {"error": "numpy library not installed"}
+    try:
+        since, until = month_bounds(month)
+    except ValueError:
+        return {"error": f"Invalid month: {month!r} (expected YYYY-MM)"}
+    start = time.perf_counter()
+    label = since.strftime("%Y-%m")
+    output_dir = output_dir or os.path.join(EXPORT_DIR, label)
+    os.makedirs(output_dir, exist_ok=True)
+
+    scratch = tempfile.mkdtemp(prefix=".partitions-", dir=output_dir)
+    try:
+        partitions = partition_events(
+            scratch,
+            stripe_integration.iter_flavor_log(since=since, until=until),
+            stripe_integration.iter_surge_log(since=since, until=until),
+            stripe_integration.iter_loyalty_events(since=since, until=until),
+        )
+        jobs = sorted(partitions.items())
+        if len(jobs) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                aggregated = list(pool.map(aggregate_partition, jobs))
+        else:
+            aggregated = [aggregate_partition(job) for job in jobs]
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    summaries = [summary for summary, _ in aggregated]
+    daily = [row for _, rows in aggregated for row in rows]
+    files = [
+        _write_csv(os.path.join(output_dir, "digest_summary.csv"), SUMMARY_COLUMNS, summaries),
+        _write_csv(os.path.join(output_dir, "digest_daily.csv"), DAILY_COLUMNS, daily),
+    ]
+    if binary:
+        files.append(_write_binary(os.path.join(output_dir, "digest_summary"), SUMMARY_COLUMNS, summaries, binary))
+        files.append(_write_binary(os.path.join(output_dir, "digest_daily"), DAILY_COLUMNS, daily, binary))
+    return {
+        "month": label,
+        "lounges": len(summaries),
+        "daily_rows": len(daily),
+        "files": files,
+        "elapsed_seconds": time.perf_counter() - start,
+    }
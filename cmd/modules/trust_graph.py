@@ -0,0 +1,239 @@
+"""In-memory, indexed view of ``reflex_memory/TrustGraph.yaml``.
+
+Agents are keyed by their YAML name (``deployment_agent``). ``connections``
+become forward and reverse adjacency sets, ``trust_relationships`` give
+per-edge trust (edges without one use the target's reflex score), and
+agents are indexed by ``status``, ``type`` and ``trust_level``.
+
+* ``affected_by(agent)`` walks the reverse edges: everyone who relies on
+  ``agent`` directly or through others, with their distance.
+* ``trust_path(a, b)`` is the route from ``a`` to ``b`` with the least total
+  distrust (``100 - trust`` per hop) and its weakest link.
+* ``set_score(agent, score)`` updates the running sums behind every
+  agent's ``network_score`` (own score blended with its connections') and
+  the overall health score in O(degree), not O(graph).
+
+Reachability sets and shortest-path trees are cached until the next mutation.
+"""
+
+import heapq
+import os
+from collections import deque
+
+import yaml
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+TRUST_GRAPH_PATH = os.path.join(BASE_DIR, "reflex_memory", "TrustGraph.yaml")
+DEFAULT_THRESHOLDS = {"critical": 50, "warning": 70, "good": 87, "excellent": 92, "optimal": 95}
+NEIGHBOR_WEIGHT = 0.5
+
+
+class TrustGraph:
+    """Agents, adjacency indexes and incrementally maintained scores."""
+
+    def __init__(self, agents: dict, relationships=(), thresholds: dict = None):
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self.agents = {}
+        self.out = {}  # agent -> agents it connects to
+        self.inn = {}  # agent -> agents connecting to it
+        self.edge_trust = {}  # (from, to) -> explicit trust score
+        self.by_status, self.by_type, self.by_trust_level = {}, {}, {}
+        self._neighbor_sum = {}  # agent -> sum of its connections' reflex scores
+        self._score_total = 0.0
+        self._cache = {}
+        for name, attrs in agents.items():
+            self.add_agent(name, attrs)
+        for name, attrs in agents.items():
+            for other in attrs.get("connections") or ():
+                self.connect(name, other)
+        for rel in relationships:
+            self.edge_trust[(rel["from"], rel["to"])] = float(rel["trust_score"])
+
+    @classmethod
+    def from_yaml(cls, path: str = TRUST_GRAPH_PATH):
+        with open(path, "r") as f:
+            doc = yaml.safe_load(f) or {}
+        return cls(doc.get("agents") or {}, doc.get("trust_relationships") or (), doc.get("thresholds"))
+
+    # -- indexes -------------------------------------------------------------
+
+    @staticmethod
+    def _index(index, key, name, add=True):
+        members = index.setdefault(key, set())
+        if add:
+            members.add(name)
+        else:
+            members.discard(name)
+
+    def _reindex(self, name, add):
+        agent = self.agents[name]
+        self._index(self.by_status, agent.get("status"), name, add)
+        self._index(self.by_type, agent.get("type"), name, add)
+        self._index(self.by_trust_level, agent.get("trust_level"), name, add)
+
+    def add_agent(self, name, attrs):
+        agent = {k: v for k, v in attrs.items() if k != "connections"}
+        agent["reflex_score"] = float(agent.get("reflex_score") or 0)
+        self.agents[name] = agent
+        self.out.setdefault(name, set())
+        self.inn.setdefault(name, set())
+        self._neighbor_sum.setdefault(name, 0.0)
+        self._score_total += agent["reflex_score"]
+        self._reindex(name, True)
+        self._cache.clear()
+
+    def connect(self, a, b):
+        """Add the edge ``a -> b`` (``a`` relies on ``b``)."""
+        for name in (a, b):
+            if name not in self.agents:
+                self.add_agent(name, {"status": "unknown"})
+        if b in self.out[a]:
+            return
+        self.out[a].add(b)
+        self.inn[b].add(a)
+        self._neighbor_sum[a] += self.agents[b]["reflex_score"]
+        self._cache.clear()
+
+    def disconnect(self, a, b):
+        if b not in self.out.get(a, ()):
+            return
+        self.out[a].discard(b)
+        self.inn[b].discard(a)
+        self._neighbor_sum[a] -= self.agents[b]["reflex_score"]
+        self._cache.clear()
+
+    def find(self, status=None, type=None, trust_level=None):
+        """Agents matching every given attribute, answered from the indexes."""
+        sets = [index.get(key, set()) for index, key in
+                ((self.by_status, status), (self.by_type, type), (self.by_trust_level, trust_level))
+                if key is not None]
+        return set.intersection(*sets) if sets else set(self.agents)
+
+    # -- scores --------------------------------------------------------------
+
+    def trust_level_for(self, score):
+        if score <= 0:
+            return "unknown"
+        if score >= self.thresholds["good"]:
+            return "high"
+        if score >= self.thresholds["critical"]:
+            return "medium"
+        return "low"
+
+    def network_score(self, name):
+        """Own reflex score blended with the mean score of the agents it connects to."""
+        own = self.agents[name]["reflex_score"]
+        degree = len(self.out[name])
+        if not degree:
+            return own
+        return (1 - NEIGHBOR_WEIGHT) * own + NEIGHBOR_WEIGHT * self._neighbor_sum[name] / degree
+
+    @property
+    def overall_score(self):
+        return self._score_total / len(self.agents) if self.agents else 0.0
+
+    def set_score(self, name, score):
+        """Change one agent's reflex score; returns the agents whose network score moved."""
+        agent = self.agents[name]
+        delta = float(score) - agent["reflex_score"]
+        if not delta:
+            return set()
+        self._reindex(name, False)
+        agent["reflex_score"] = float(score)
+        agent["trust_level"] = self.trust_level_for(agent["reflex_score"])
+        self._reindex(name, True)
+        self._score_total += delta
+        for dependant in self.inn[name]:
+            self._neighbor_sum[dependant] += delta
+        self._cache.clear()
+        return {name} | self.inn[name]
+
+    def set_status(self, name, status, reason=None):
+        self._reindex(name, False)
+        self.agents[name]["status"] = status
+        if reason:
+            self.agents[name]["escalation_reason"] = reason
+        self._reindex(name, True)
+
+    def escalate(self, name, reason=None):
+        """Mark ``name`` escalated and return who it affects."""
+        self.set_status(name, "escalated", reason)
+        return self.affected_by(name)
+
+    # -- queries -------------------------------------------------------------
+
+    def affected_by(self, name, max_depth: int = None):
+        """Return ``{agent: hops}`` for every agent relying on ``name``, directly or transitively."""
+        key = ("affected", name, max_depth)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        seen = {name: 0}
+        queue = deque([name])
+        while queue:
+            current = queue.popleft()
+            depth = seen[current]
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for dependant in self.inn[current]:
+                if dependant not in seen:
+                    seen[dependant] = depth + 1
+                    queue.append(dependant)
+        del seen[name]
+        self._cache[key] = seen
+        return seen
+
+    def trust(self, a, b):
+        """Trust of the edge ``a -> b``: the explicit relationship, else ``b``'s score."""
+        return self.edge_trust.get((a, b), self.agents[b]["reflex_score"])
+
+    def _tree(self, source):
+        """Least-distrust predecessors from ``source`` to every reachable agent (Dijkstra)."""
+        key = ("tree", source)
+        previous = self._cache.get(key)
+        if previous is not None:
+            return previous
+        best = {source: 0.0}
+        previous = {source: None}
+        heap = [(0.0, source)]
+        while heap:
+            cost, current = heapq.heappop(heap)
+            if cost > best[current]:
+                continue
+            for nxt in self.out[current]:
+                step = cost + max(0.0, 100.0 - self.trust(current, nxt))
+                if step < best.get(nxt, float("inf")):
+                    best[nxt] = step
+                    previous[nxt] = current
+                    heapq.heappush(heap, (step, nxt))
+        self._cache[key] = previous
+        return previous
+
+    def trust_path(self, source, target):
+        """Return ``(path, weakest_trust)`` for the least-distrust route, or ``(None, None)``.
+
+        The first query from ``source`` builds its whole shortest-path tree;
+        later queries from the same agent only walk the tree back from ``target``.
+        """
+        previous = self._tree(source)
+        if target not in previous:
+            return None, None
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        path.reverse()
+        weakest = min((self.trust(a, b) for a, b in zip(path, path[1:])), default=None)
+        return path, weakest
+
+
+def describe_escalation(agent: str, path: str = TRUST_GRAPH_PATH):
+    """Report who is affected if ``agent`` escalates (dispatcher entry point)."""
+    graph = TrustGraph.from_yaml(path)
+    if agent not in graph.agents:
+        return f"Unknown agent: {agent}"
+    affected = graph.escalate(agent)
+    if not affected:
+        return f"🕸️ Escalating {agent} affects no other agents"
+    listed = ", ".join(f"{name} ({hops} hop{'s' if hops > 1 else ''})"
+                       for name, hops in sorted(affected.items(), key=lambda item: (item[1], item[0])))
+    return f"🕸️ Escalating {agent} affects {len(affected)} agents: {listed}"
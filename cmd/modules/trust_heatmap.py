@@ -0,0 +1,226 @@
+"""Lounge x hour-of-week trust and activity heatmaps kept as dense arrays.
+
+Rows are lounges (``lounge_id`` on the event, else ``unassigned``) and the
+168 columns are UTC hours of the week (Monday 00:00 = 0). Checkout counts,
+surge checkouts, loyalty transaction counts, summed TrustArc and summed
+loyalty gain are NumPy arrays updated with ``np.add.at`` one batch of
+events at a time, so refreshing only folds in events logged since the last
+run. The state keeps a cursor into each log (journal offset for flavor
+events, ledger row id for loyalty) and reads resume from there.
+
+``save`` writes the arrays as a compressed ``.npz``; ``write_snapshot``
+writes the JSON the dashboards fetch from ``public/heatmaps``.
+"""
+
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from itertools import islice
+
+from atomic_io import atomic_path, atomic_write, file_lock
+from journal import JournalCursor
+from log_streams import event_time
+from loyalty_ledger import LedgerCursor
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+STATE_PATH = os.path.join(BASE_DIR, "data", "trust_heatmap.state.npz")
+SNAPSHOT_PATH = os.path.join(BASE_DIR, "public", "heatmaps", "trust_heatmap.json")
+HOURS = 7 * 24
+UNASSIGNED = "unassigned"
+# The lounge slug pattern, also allowing the upper case and underscores of ids like "HOPE_GLOBAL_FORUM".
+LOUNGE_ID_RE = re.compile(r"[A-Za-z0-9]+(?:[-_][A-Za-z0-9]+)*")
+METRICS = {
+    "checkouts": "int64",
+    "surge_checkouts": "int64",
+    "loyalty_transactions": "int64",
+    "trust_sum": "float64",
+    "loyalty_gain": "float64",
+}
+
+
+def hour_of_week(timestamp):
+    at = datetime.fromtimestamp(event_time(timestamp), timezone.utc)
+    return at.weekday() * 24 + at.hour
+
+
+class TrustHeatmap:
+    """Per-lounge 168-hour arrays for every metric in ``METRICS``."""
+
+    def __init__(self, capacity: int = 16):
+        self.lounges = {}  # lounge_id -> row
+        self.arrays = {name: np.zeros((capacity, HOURS), dtype=dtype) for name, dtype in METRICS.items()}
+        self.flavor_cursor = JournalCursor()
+        self.loyalty_cursor = LedgerCursor()
+
+    def _rows(self, lounge_ids):
+        rows = []
+        for lounge_id in lounge_ids:
+            row = self.lounges.get(lounge_id)
+            if row is None:
+                row = self.lounges[lounge_id] = len(self.lounges)
+                capacity = len(self.arrays["checkouts"])
+                if row >= capacity:
+                    for name, array in self.arrays.items():
+                        grown = np.zeros((capacity * 2, HOURS), dtype=array.dtype)
+                        grown[:capacity] = array
+                        self.arrays[name] = grown
+            rows.append(row)
+        return np.array(rows, dtype=np.intp)
+
+    def add_checkouts(self, events):
+        """Fold flavor events (``timestamp``, ``surge_active``, ``lounge_id``) in one batch."""
+        lounges, hours, surge = [], [], []
+        for event in events:
+            if event.get("timestamp") is None:
+                continue
+            lounges.append(event.get("lounge_id") or UNASSIGNED)
+            hours.append(hour_of_week(event["timestamp"]))
+            surge.append(1 if event.get("surge_active") else 0)
+        if lounges:
+            index = (self._rows(lounges), np.array(hours, dtype=np.intp))
+            np.add.at(self.arrays["checkouts"], index, 1)
+            np.add.at(self.arrays["surge_checkouts"], index, np.array(surge, dtype=np.int64))
+        return len(lounges)
+
+    def add_loyalty(self, transactions):
+        """Fold loyalty transactions (``timestamp``, ``trust_arc``, ``loyalty_gain``, ``lounge_id``)."""
+        lounges, hours, trust, gain = [], [], [], []
+        for tx in transactions:
+            if tx.get("timestamp") is None:
+                continue
+            lounges.append(tx.get("lounge_id") or UNASSIGNED)
+            hours.append(hour_of_week(tx["timestamp"]))
+            trust.append(float(tx.get("trust_arc") or 0))
+            gain.append(float(tx.get("loyalty_gain") or 0))
+        if lounges:
+            index = (self._rows(lounges), np.array(hours, dtype=np.intp))
+            np.add.at(self.arrays["loyalty_transactions"], index, 1)
+            np.add.at(self.arrays["trust_sum"], index, np.array(trust))
+            np.add.at(self.arrays["loyalty_gain"], index, np.array(gain))
+        return len(lounges)
+
+    def catch_up(self, flavor_events, loyalty_events, batch_size: int = 10000):
+        """Fold in new events from iterators that advance this heatmap's cursors.
+
+        Pass ``stripe_integration.iter_flavor_log_since(self.flavor_cursor)``
+        and ``iter_loyalty_events_since(self.loyalty_cursor)``.
+        """
+        added = 0
+        for fresh, add in ((iter(flavor_events), self.add_checkouts), (iter(loyalty_events), self.add_loyalty)):
+            while True:
+                batch = list(islice(fresh, batch_size))
+                if not batch:
+                    break
+                added += add(batch)
+        return added
+
+    def view(self, metric: str):
+        """Return the ``(lounges, 168)`` array for ``metric`` (``avg_trust`` is derived)."""
+        n = len(self.lounges)
+        if metric == "avg_trust":
+            count = self.arrays["loyalty_transactions"][:n]
+            return np.divide(self.arrays["trust_sum"][:n], count, out=np.zeros((n, HOURS)), where=count > 0)
+        return self.arrays[metric][:n]
+
+    def save(self, path: str = STATE_PATH):
+        n = len(self.lounges)
+        lounges = sorted(self.lounges, key=self.lounges.get)
+        with file_lock(path):
+            with atomic_path(path) as tmp_path:
+                with open(tmp_path, "wb") as f:
+                    np.savez_compressed(
+                        f,
+                        lounges=np.array(lounges, dtype=str),
+                        cursors=np.array(json.dumps({"flavor": vars(self.flavor_cursor), "loyalty": vars(self.loyalty_cursor)})),
+                        **{name: array[:n] for name, array in self.arrays.items()},
+                    )
+        return path
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH):
+        """Return the saved heatmap, or an empty one if there is no usable state."""
+        heatmap = cls()
+        if not os.path.exists(path):
+            return heatmap
+        try:
+            with np.load(path) as state:
+                lounges = [str(name) for name in state["lounges"]]
+                arrays = {name: state[name] for name in METRICS}
+                cursors = json.loads(str(state["cursors"]))
+        except (OSError, KeyError, ValueError):
+            return heatmap
+        heatmap._rows(lounges)
+        for name, array in arrays.items():
+            heatmap.arrays[name][: len(lounges)] = array
+        vars(heatmap.flavor_cursor).update(cursors["flavor"])
+        vars(heatmap.loyalty_cursor).update(cursors["loyalty"])
+        if heatmap.flavor_cursor.segment is not None:
+            heatmap.flavor_cursor.segment = tuple(heatmap.flavor_cursor.segment)
+        return heatmap
+
+    def write_snapshot(self, path: str = SNAPSHOT_PATH, lounge_ids=None):
+        """Write the dashboard JSON: one 168-value row per lounge and metric."""
+        lounges = sorted(self.lounges, key=self.lounges.get)
+        rows = [self.lounges[l] for l in lounges if lounge_ids is None or l in lounge_ids]
+        metrics = {
+            "checkouts": self.view("checkouts")[rows].tolist(),
+            "surge_checkouts": self.view("surge_checkouts")[rows].tolist(),
+            "loyalty_transactions": self.view("loyalty_transactions")[rows].tolist(),
+            "avg_trust": np.round(self.view("avg_trust")[rows], 2).tolist(),
+            "loyalty_gain": np.round(self.view("loyalty_gain")[rows], 2).tolist(),
+        }
+        snapshot = {
+            "generated_at": datetime.utcnow().isoformat(),
+            "hours": HOURS,
+            "hour_origin": "monday-00-utc",
+            "lounges": [lounge for lounge in lounges if lounge_ids is None or lounge in lounge_ids],
+            "metrics": metrics,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        atomic_write(path, json.dumps(snapshot, separators=(",", ":")))
+        return path
+
+
+def refresh_trust_heatmap(state_path: str = STATE_PATH, snapshot_path: str = SNAPSHOT_PATH):
+    """Fold new checkout and loyalty events into the saved heatmap, save it, and write the snapshot."""
+    import stripe_integration
+
+    if np is None:
+        return {"error": "numpy library not installed"}
+    start = time.perf_counter()
+    heatmap = TrustHeatmap.load(state_path)
+    added = heatmap.catch_up(
+        stripe_integration.iter_flavor_log_since(heatmap.flavor_cursor),
+        stripe_integration.iter_loyalty_events_since(heatmap.loyalty_cursor),
+    )
+    heatmap.save(state_path)
+    heatmap.write_snapshot(snapshot_path)
+    return {
+        "lounges": len(heatmap.lounges),
+        "events_added": added,
+        "snapshot": snapshot_path,
+        "elapsed_seconds": time.perf_counter() - start,
+    }
+
+
+def write_heatmap_snapshot(lounge_id: str = None, state_path: str = STATE_PATH):
+    """Write a dashboard snapshot from the saved heatmap without reading any logs.
+
+    With ``lounge_id`` only that lounge is written, to ``public/heatmaps/<lounge_id>.json``.
+    """
+    if np is None:
+        return {"error": "numpy library not installed"}
+    if lounge_id is not None and not LOUNGE_ID_RE.fullmatch(lounge_id):
+        return {"error": f"invalid lounge_id {lounge_id!r}"}
+    heatmap = TrustHeatmap.load(state_path)
+    if lounge_id is None:
+        return {"lounges": len(heatmap.lounges), "snapshot": heatmap.write_snapshot()}
+    path = os.path.join(os.path.dirname(SNAPSHOT_PATH), f"{lounge_id}.json")
+    return {"lounges": int(lounge_id in heatmap.lounges), "snapshot": heatmap.write_snapshot(path, {lounge_id})}
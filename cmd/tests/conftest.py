@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+MODULE_PATH = os.path.join(os.path.dirname(__file__), "..", "modules")
+if MODULE_PATH not in sys.path:
+    sys.path.insert(0, MODULE_PATH)
+
+
+@pytest.fixture
+def stripe_dir(tmp_path, monkeypatch):
+    """Point every stripe_integration data file at a scratch directory (journal + SQLite modes)."""
+    import stripe_integration as si
+
+    paths = {
+        "BASE_DIR": "",
+        "FLAVOR_LOG_PATH": "StripeFlavorLog.yaml",
+        "FLAVOR_JOURNAL_PATH": "StripeFlavorLog.journal.jsonl",
+        "CHECKOUT_METADATA_PATH": "checkout_session_metadata.json",
+        "LOYALTY_VAULT_PATH": "ReflexLoyalty_Vault.yaml",
+        "LOYALTY_LEDGER_PATH": "ReflexLoyalty_Ledger.sqlite3",
+        "SURGE_PRICING_PATH": "StripeSurgePricing.json",
+        "SURGE_LOG_PATH": "SurgeLog_WeekendPeachMint.yaml",
+        "SURGE_JOURNAL_PATH": "SurgeLog_WeekendPeachMint.journal.jsonl",
+    }
+    for name, filename in paths.items():
+        monkeypatch.setattr(si, name, str(tmp_path / filename))
+    monkeypatch.setattr(si, "FLAVOR_LOG_MODE", "journal")
+    monkeypatch.setattr(si, "LOYALTY_BACKEND", "sqlite")
+    monkeypatch.setattr(si, "SURGE_PRICING_MODE", "file")
+    monkeypatch.setattr(si, "JOURNAL_FSYNC", "never")
+    for cache in ("_journals", "_ledgers", "_surge_tables", "_flavor_listeners", "_loyalty_listeners"):
+        monkeypatch.setattr(si, cache, type(getattr(si, cache))())
+    yield tmp_path
+    for ledger in si._ledgers.values():
+        ledger.close()
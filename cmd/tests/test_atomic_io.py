@@ -0,0 +1,56 @@
+import json
+import multiprocessing
+import os
+import stat
+
+import pytest
+
+from atomic_io import atomic_path, atomic_write, atomic_write_json, file_lock, read_json
+
+
+def _increment(path, times):
+    for _ in range(times):
+        with file_lock(path):
+            count = read_json(path, {"count": 0})["count"]
+            atomic_write_json(path, {"count": count + 1})
+
+
+def test_file_lock_serializes_read_modify_write_across_processes(tmp_path):
+    path = str(tmp_path / "counter.json")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_increment, args=(path, 50)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert read_json(path, None) == {"count": 200}
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / "data.json"
+    atomic_write_json(str(path), {"v": 1})
+    with pytest.raises(RuntimeError):
+        with atomic_path(str(path)) as tmp:
+            with open(tmp, "w") as f:
+                f.write('{"v": ')
+            raise RuntimeError("crashed mid-write")
+    assert json.loads(path.read_text()) == {"v": 1}
+    assert sorted(os.listdir(tmp_path)) == ["data.json"]
+
+
+def test_replacement_keeps_permissions_and_temp_suffix(tmp_path):
+    path = tmp_path / "qr.png"
+    atomic_write(str(path), b"old")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
+    path.chmod(0o600)
+    with atomic_path(str(path)) as tmp:
+        assert tmp.endswith(".png")
+        with open(tmp, "wb") as f:
+            f.write(b"new")
+    assert path.read_bytes() == b"new"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_read_json_default(tmp_path):
+    assert read_json(str(tmp_path / "missing.json"), {"a": 1}) == {"a": 1}
@@ -0,0 +1,36 @@
+import importlib.util
+import os
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "bench_stripe_integration.py")
+
+
+@pytest.fixture
+def bench(stripe_dir):
+    spec = importlib.util.spec_from_file_location("bench_stripe_integration", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+def test_bench_size_times_every_hot_path(bench, legacy):
+    result = bench.bench_size(40, 5, legacy)
+    assert result["size"] == 40
+    assert list(result["paths"]) == list(bench.HOT_PATHS)
+    for stats in result["paths"].values():
+        assert stats["iterations"] == 5
+        assert stats["p50_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert not bench.stripe_integration._ledgers and not bench.stripe_integration._surge_tables
+
+
+def test_compare_prints_p50_change(bench, capsys):
+    stats = {"p50_ms": 2.0}
+    previous = {"results": [{"size": 10, "paths": {"inject_flavor_metadata_stripe": {"p50_ms": 1.0}}}]}
+    current = {"results": [{"size": 10, "paths": {"inject_flavor_metadata_stripe": stats,
+                                                  "add_surge_addon_to_stripe_price": stats}}]}
+    bench.compare(current, previous)
+    out = capsys.readouterr().out
+    assert "inject_flavor_metadata_stripe" in out and "+100.0%" in out
+    assert "add_surge_addon_to_stripe_price" not in out
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+import command_batch
+import command_metrics
+from command_batch import parse_batch, parse_command_line, run_batch, summarize
+from command_metrics import CommandMetrics
+from command_registry import LazyCommandRegistry
+
+
+@pytest.fixture
+def metrics(tmp_path, monkeypatch):
+    metrics = CommandMetrics(str(tmp_path / "metrics.prom"))
+    monkeypatch.setattr(command_metrics, "ENABLED", True)
+    monkeypatch.setattr(command_batch, "METRICS", metrics)
+    return metrics
+
+
+def test_parse_command_line_styles():
+    assert parse_command_line("switchDomain example.com") == ("switchDomain", ("example.com",))
+    assert parse_command_line("cmd.switchDomain 'a b' c") == ("switchDomain", ("a b", "c"))
+    assert parse_command_line('cmd.addSurge("Peach", 30.5);') == ("addSurge", ("Peach", 30.5))
+    assert parse_command_line("listLounges()") == ("listLounges", ())
+    assert parse_command_line("  # comment") is None
+    assert parse_command_line("") is None
+    with pytest.raises(ValueError):
+        parse_command_line("cmd.switchDomain(foo bar)")
+    with pytest.raises(ValueError):
+        parse_command_line("switchDomain 'unbalanced")
+
+
+def test_parse_batch_stages_and_errors():
+    lines = [
+        "# setup", "---", "a 1", "b(2)", "---", "---", "cmd.c(oops", "d 'open", "---", "e",
+    ]
+    stages = parse_batch(lines)
+    assert [[entry[:3] for entry in stage] for stage in stages] == [
+        [(3, "a", ("1",)), (4, "b", (2,))],
+        [(7, "c", ()), (8, "d", ())],
+        [(10, "e", ())],
+    ]
+    assert stages[0][0][3] is None
+    assert stages[1][0][3].startswith("Parse error on line 7:")
+    assert stages[1][1][3].startswith("Parse error on line 8:")
+
+
+def test_commands_run_sequentially_by_default(metrics):
+    state, active = {}, []
+
+    def put(key, value):
+        active.append(key)
+        assert len(active) == 1, "commands overlapped"
+        time.sleep(0.02)
+        state[key] = value
+        active.remove(key)
+        return value
+
+    commands = LazyCommandRegistry({"put": put, "get": state.get})
+    lines = ["put domain example.com", "put cert ok", "get domain", "get cert"]
+    results = run_batch(parse_batch(lines), commands, workers=4, out=None)
+    assert [r["ok"] for r in results] == [True] * 4
+    assert [r["result"] for r in results[2:]] == ["example.com", "ok"]
+
+
+def test_stages_run_in_order_and_failures_are_reported(metrics):
+    seen = []
+    lock = threading.Lock()
+
+    def append(value):
+        with lock:
+            seen.append(value)
+        return len(seen)
+
+    def boom():
+        raise RuntimeError("no lounge")
+
+    commands = LazyCommandRegistry({"append": append, "boom": boom, "join": "posixpath:join"})
+    stages = parse_batch(["append x", "append y", "---", "append z", "boom", "join a b", "nope", "bad(", "---", "append w"])
+    output = []
+    results = run_batch(stages, commands, workers=4, out=output.append, parallel=True)
+
+    assert [r["line"] for r in results] == [1, 2, 4, 5, 6, 7, 8, 10]
+    assert sorted(seen[:2]) == ["x", "y"] and seen[2:] == ["z", "w"]
+    by_line = {r["line"]: r for r in results}
+    assert by_line[5] == {**by_line[5], "ok": False, "error": "RuntimeError: no lounge"}
+    assert by_line[6]["result"] == "a/b"
+    assert by_line[7]["error"] == "Unknown command: nope"
+    assert by_line[8]["error"].startswith("Parse error on line 8:")
+    assert len(output) == 8 and output[3].startswith("❌")
+    assert summarize(results, 0.01).startswith("5/8 commands succeeded")
+    assert metrics._pending["append"]["ok"] == 4 and metrics._pending["boom"]["error"] == 1
+
+
+def test_process_pool_runs_import_path_commands(metrics):
+    commands = LazyCommandRegistry({"join": "posixpath:join", "sqrt": "math:sqrt"})
+    stages = parse_batch(["join a b", "sqrt(16)", "sqrt(-1)"])
+    results = run_batch(stages, commands, workers=2, processes=True, out=None, parallel=True)
+    assert [r["ok"] for r in results] == [True, True, False]
+    assert results[1]["result"] == 4.0
+    assert results[2]["error"] == "ValueError: math domain error"
+    # Samples come back from the workers and are counted in the parent.
+    assert metrics._pending["sqrt"]["ok"] == 1 and metrics._pending["sqrt"]["error"] == 1
@@ -0,0 +1,91 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+import command_metrics
+from command_metrics import BUCKETS, CommandMetrics, render_prometheus, track
+
+
+@pytest.fixture
+def metrics(tmp_path, monkeypatch):
+    metrics = CommandMetrics(str(tmp_path / "metrics" / "cmd.prom"))
+    monkeypatch.setattr(command_metrics, "ENABLED", True)
+    monkeypatch.setattr(command_metrics, "METRICS", metrics)
+    return metrics
+
+
+def _sample(command, ok=True, wall=0.02, cpu=0.01, rss=1000):
+    return {"command": command, "ok": ok, "wall_seconds": wall, "cpu_seconds": cpu, "peak_rss_bytes": rss}
+
+
+def test_wrapped_commands_record_outcomes(metrics):
+    def fail():
+        raise RuntimeError("boom")
+
+    ok = metrics.wrap("ok", lambda x: x * 2)
+    assert ok(21) == 42
+    with pytest.raises(RuntimeError):
+        metrics.wrap("fail", fail)()
+    assert (metrics._pending["ok"]["ok"], metrics._pending["fail"]["error"]) == (1, 1)
+    assert metrics._pending["ok"]["wall"]["count"] == 1
+
+
+def test_recording_is_off_by_default(tmp_path, monkeypatch):
+    env = {k: v for k, v in os.environ.items() if k != "HOOKAHPLUS_METRICS"}
+    probe = subprocess.run([sys.executable, "-c", "import command_metrics; print(command_metrics.ENABLED)"],
+                           cwd=os.path.dirname(command_metrics.__file__), env=env, capture_output=True, text=True)
+    assert probe.stdout.strip() == "False"
+    monkeypatch.setattr(command_metrics, "ENABLED", False)
+    metrics = CommandMetrics(str(tmp_path / "metrics" / "cmd.prom"))
+    fn = lambda: 1  # noqa: E731
+    assert metrics.wrap("ok", fn) is fn
+    metrics.record(_sample("ok"))
+    assert metrics.flush() is None and not (tmp_path / "metrics").exists()
+
+
+def test_flush_merges_totals_from_several_processes(metrics, tmp_path):
+    other = CommandMetrics(metrics.path)  # another process's recorder, same files
+    metrics.record(_sample("deploy", wall=0.004, rss=1000))
+    other.record(_sample("deploy", ok=False, wall=2.0, rss=5000))
+    other.record(_sample("a\"b", wall=400.0))
+    assert metrics.flush() == metrics.path
+    other.flush()
+    assert metrics.flush() is None  # nothing pending
+
+    with open(metrics.state_path) as f:
+        totals = json.load(f)
+    deploy = totals["deploy"]
+    assert (deploy["ok"], deploy["error"], deploy["wall"]["count"], deploy["peak_rss_bytes"]) == (1, 1, 2, 5000)
+    assert deploy["wall"]["sum"] == pytest.approx(2.004)
+    with open(metrics.path) as f:
+        assert f.read() == render_prometheus(totals)
+
+
+def test_prometheus_histograms_are_cumulative():
+    entry = command_metrics._empty_entry()
+    for value in (0.004, 0.3, 0.3, 400.0):
+        command_metrics._observe(entry["wall"], value)
+    text = render_prometheus({'say "hi"': entry})
+    buckets = re.findall(r'hookahplus_command_duration_seconds_bucket\{command="say \\"hi\\"",le="([^"]+)"\} (\d+)', text)
+    counts = dict(buckets)
+    assert len(buckets) == len(BUCKETS) + 1
+    assert (counts["0.005"], counts["0.25"], counts["0.5"], counts["300.0"], counts["+Inf"]) == ("1", "1", "3", "3", "4")
+    assert 'hookahplus_command_calls_total{command="say \\"hi\\"",status="ok"} 0' in text
+
+
+def test_opt_in_profilers_write_reports(metrics, tmp_path, monkeypatch):
+    monkeypatch.setattr(command_metrics, "PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(command_metrics, "PROFILERS", {"cprofile", "tracemalloc"})
+    monkeypatch.setattr(command_metrics, "PROFILE_COMMANDS", {"heavy"})
+    with track("heavy") as heavy:
+        blob = [bytes(1000) for _ in range(100)]
+    assert blob and heavy["python_peak_bytes"] >= 100_000
+    assert os.path.exists(heavy["cprofile"]) and os.path.exists(heavy["tracemalloc"])
+    with track("light") as light:
+        pass
+    assert "cprofile" not in light and "python_peak_bytes" not in light
+    assert metrics._pending["heavy"]["python_peak_bytes"] == heavy["python_peak_bytes"]
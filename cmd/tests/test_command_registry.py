@@ -0,0 +1,27 @@
+import sys
+
+from command_registry import LazyCommandRegistry
+
+
+def test_registry_imports_lazily_and_wraps_once(tmp_path, monkeypatch):
+    (tmp_path / "lazy_cmd_module.py").write_text("def hello(name):\n    return f'hi {name}'\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_cmd_module", raising=False)
+    wrapped = []
+    registry = LazyCommandRegistry({"hello": "lazy_cmd_module:hello", "broken": "no_such_module:fn"},
+                                   wrap=lambda name, fn: wrapped.append(name) or fn)
+    assert "hello" in registry and "broken" in registry and "missing" not in registry
+    assert "lazy_cmd_module" not in sys.modules
+    assert registry.spec("hello") == "lazy_cmd_module:hello"
+    assert registry["hello"]("there") == "hi there"
+    assert registry["hello"] is registry["hello"] and wrapped == ["hello"]
+
+    registry.register("hello", lambda name: f"yo {name}")
+    assert registry["hello"]("there") == "yo there" and wrapped == ["hello", "hello"]
+    assert list(registry) == ["hello", "broken"] and len(registry) == 2
+
+
+def test_preload_resolves_every_command():
+    registry = LazyCommandRegistry({"join": "posixpath:join", "upper": str.upper})
+    assert registry.preload() is registry
+    assert registry["join"]("a", "b") == "a/b" and registry["upper"]("x") == "X"
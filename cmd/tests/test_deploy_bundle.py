@@ -0,0 +1,59 @@
+import os
+import zipfile
+
+from deploy_bundle import build_deploy_kit
+
+
+def _tree(tmp_path):
+    src = tmp_path / "kit"
+    (src / "configs").mkdir(parents=True)
+    (src / "README.md").write_text("# Hookah+ deploy kit\n" * 50)
+    (src / "configs" / "lounge.yaml").write_text("lounge_name: Test\nseat_count: 10\n")
+    (src / "configs" / "menü.yaml").write_text("flavors: [Mint, Peach]\n")
+    (src / "empty.txt").write_text("")
+    return src
+
+
+def _contents(bundle):
+    with zipfile.ZipFile(bundle) as zf:
+        assert zf.testzip() is None
+        return {info.filename: zf.read(info) for info in zf.infolist()}
+
+
+def _expected(src):
+    return {
+        path.relative_to(src.parent).as_posix(): path.read_bytes()
+        for path in src.rglob("*") if path.is_file()
+    }
+
+
+def test_bundle_round_trips_through_zipfile(tmp_path):
+    src = _tree(tmp_path)
+    bundle = str(tmp_path / "out" / "kit.zip")
+    stats = build_deploy_kit([str(src)], bundle, workers=2)
+    assert stats["files"] == 4 and stats["compressed"] == 4
+    assert _contents(bundle) == _expected(src)
+
+
+def test_incremental_build_reuses_unchanged_entries(tmp_path):
+    src = _tree(tmp_path)
+    bundle = str(tmp_path / "kit.zip")
+    build_deploy_kit([str(src)], bundle)
+    (src / "configs" / "lounge.yaml").write_text("lounge_name: Test\nseat_count: 12\n")
+    os.utime(src / "README.md")  # touched but unchanged: matched by hash
+
+    stats = build_deploy_kit([str(src)], bundle)
+    assert stats["compressed"] == 1 and stats["reused"] == 3
+    assert _contents(bundle) == _expected(src)
+
+
+def test_stale_manifest_falls_back_to_a_full_build(tmp_path):
+    src = _tree(tmp_path)
+    bundle = str(tmp_path / "kit.zip")
+    build_deploy_kit([str(src)], bundle)
+    with open(bundle, "ab") as f:
+        f.write(b"not part of the manifest's ZIP")
+
+    stats = build_deploy_kit([str(src)], bundle)
+    assert stats["reused"] == 0 and stats["compressed"] == 4
+    assert _contents(bundle) == _expected(src)
@@ -0,0 +1,77 @@
+import math
+
+import pytest
+import yaml
+
+import flavor_bloom
+from flavor_bloom import DEFAULT_MODEL, load_forecast, simulate_region, simulate_regions
+
+FORECAST = {
+    "forecast": {
+        "city": "Atlanta",
+        "avg_daily_sessions": [45, 52],
+        "avg_price_per_session": 28.5,
+        "refill_rate": 1.3,
+        "surge_add_on": {"flavor": "Peach + Mint", "amount": 3},
+    }
+}
+
+
+def _write(tmp_path, name, forecast=FORECAST):
+    path = tmp_path / name
+    path.write_text(yaml.safe_dump(forecast))
+    return str(path)
+
+
+def _expected(params, days):
+    """Closed-form mean sessions and revenue over ``days`` under the default model."""
+    p = DEFAULT_MODEL["bloom_probability"]
+    lift = DEFAULT_MODEL["bloom_lift"] * math.exp(DEFAULT_MODEL["bloom_sigma"] ** 2 / 2)
+    base = (params["sessions_low"] + params["sessions_high"]) / 2
+    sessions = base * (1 - p + p * lift)
+    bloom_sessions = base * p * lift
+    revenue = (
+        sessions * params["price"] * (1 + (params["refill_rate"] - 1) * DEFAULT_MODEL["refill_share"])
+        + bloom_sessions * DEFAULT_MODEL["surge_share"] * params["surge_amount"]
+    )
+    return sessions * days, revenue * days
+
+
+def test_load_forecast(tmp_path):
+    params = load_forecast(_write(tmp_path, "SimForecast_ATL_14D.yaml"))
+    assert params == {
+        "region": "Atlanta", "days": 14, "sessions_low": 45.0, "sessions_high": 52.0, "price": 28.5,
+        "refill_rate": 1.3, "surge_flavor": "Peach + Mint", "surge_amount": 3.0,
+    }
+    bare = load_forecast(_write(tmp_path, "SimForecast_NYC_7D.yaml", {"forecast": {}}))
+    assert (bare["region"], bare["days"], bare["sessions_low"], bare["price"]) == ("NYC", 7, 40.0, 30.0)
+
+
+@pytest.mark.parametrize("engine, scenarios, tolerance", [("numpy", 20000, 0.01), ("python", 2000, 0.03)])
+def test_simulation_means_match_the_model(tmp_path, monkeypatch, engine, scenarios, tolerance):
+    if engine == "python":
+        monkeypatch.setattr(flavor_bloom, "np", None)
+    params = load_forecast(_write(tmp_path, "SimForecast_ATL_7D.yaml"))
+    result = simulate_region(params, scenarios=scenarios, seed=1)
+    sessions, revenue = _expected(params, 7)
+    assert result["engine"] == engine
+    assert result["sessions"]["mean"] == pytest.approx(sessions, rel=tolerance)
+    assert result["revenue"]["mean"] == pytest.approx(revenue, rel=tolerance)
+    assert result["bloom_days_mean"] == pytest.approx(7 * DEFAULT_MODEL["bloom_probability"], rel=0.05)
+    band = result["revenue"]
+    assert band["p5"] <= band["p25"] <= band["p50"] <= band["p75"] <= band["p95"]
+
+
+def _without_timing(result):
+    return {key: value for key, value in result.items() if key != "elapsed_seconds"}
+
+
+def test_seeded_runs_are_reproducible(tmp_path):
+    paths = [_write(tmp_path, "SimForecast_ATL_7D.yaml"), _write(tmp_path, "SimForecast_NYC_7D.yaml", {"forecast": {}})]
+    first = simulate_regions(paths, scenarios=500, seed=42, workers=1)
+    again = simulate_regions(paths, scenarios=500, seed=42, workers=1)
+    assert [_without_timing(r) for r in first] == [_without_timing(r) for r in again]
+    assert [r["region"] for r in first] == ["Atlanta", "NYC"]
+    # Region i draws from seed + i.
+    nyc = simulate_region(load_forecast(paths[1]), scenarios=500, seed=43)
+    assert _without_timing(first[1]) == _without_timing(nyc)
@@ -0,0 +1,70 @@
+import pytest
+
+import flavor_leaderboard
+import stripe_integration as si
+from flavor_leaderboard import FlavorLeaderboard
+from journal import AppendJournal
+
+T0 = 1_699_999_200.0  # a bucket boundary for every window
+
+
+def test_rankings_all_time_and_per_window():
+    board = FlavorLeaderboard()
+    board.record("Peach + Mint", T0)
+    board.record("Mint", T0 + 60)
+    board.record("Blueberry", T0 + 2 * 3600)
+    assert board.top(2) == [("Mint", 2), ("Blueberry", 1)]
+    assert board.count("Peach") == 1
+    now = T0 + 2 * 3600 + 1
+    assert board.top(10, "hour", now=now) == [("Blueberry", 1)]
+    assert board.top(10, "day", now=now) == [("Mint", 2), ("Blueberry", 1), ("Peach", 1)]
+    # Buckets expire as the window slides; all-time counts stay.
+    assert board.top(10, "day", now=T0 + 86400 + 1) == [("Blueberry", 1)]
+    assert board.count("Mint", "week", now=T0 + 86400 + 1) == 2
+    assert board.count("Mint") == 2
+
+
+def test_unknown_window():
+    with pytest.raises(ValueError, match="month"):
+        FlavorLeaderboard().top(3, "month")
+
+
+def test_catch_up_reads_only_new_events_across_compaction(stripe_dir):
+    board = FlavorLeaderboard()
+    si.inject_flavor_metadata_stripe("Peach + Mint")
+    si.inject_flavor_metadata_stripe("Mint")
+    assert board.catch_up(si.iter_flavor_log_since(board.cursor)) == 2
+
+    si.compact_flavor_log()
+    si.inject_flavor_metadata_stripe("Blueberry + Mint")
+    assert board.catch_up(si.iter_flavor_log_since(board.cursor)) == 1
+    assert board.top(3) == [("Mint", 3), ("Blueberry", 1), ("Peach", 1)]
+    assert board.catch_up(si.iter_flavor_log_since(board.cursor)) == 0
+
+
+def test_saved_board_resumes_from_its_cursor(stripe_dir):
+    path = str(stripe_dir / "board.state.pickle")
+    board = FlavorLeaderboard()
+    si.inject_flavor_metadata_stripe("Peach")
+    board.catch_up(si.iter_flavor_log_since(board.cursor))
+    board.save(path)
+
+    si.inject_flavor_metadata_stripe("Peach + Mint")
+    restored = FlavorLeaderboard.load(path)
+    assert restored.catch_up(si.iter_flavor_log_since(restored.cursor)) == 1
+    assert restored.top(2) == [("Peach", 2), ("Mint", 1)]
+
+
+def test_listener_follows_the_log_including_other_writers(stripe_dir, monkeypatch):
+    monkeypatch.setattr(flavor_leaderboard, "_board", FlavorLeaderboard())
+    si.add_flavor_listener(flavor_leaderboard._follow_flavor_log)
+    si.inject_flavor_metadata_stripe("Peach")
+
+    # Another process appends without calling this process's listeners.
+    other = AppendJournal(si.FLAVOR_JOURNAL_PATH, si.FLAVOR_LOG_PATH, fsync="never")
+    other.append({"timestamp": "2025-01-01T10:00:00", "flavor_combo": "Mint"})
+    si.inject_flavor_metadata_stripe("Peach")
+
+    board = flavor_leaderboard._board
+    assert board.top(2) == [("Peach", 2), ("Mint", 1)]
+    assert board.cursor.count == 3
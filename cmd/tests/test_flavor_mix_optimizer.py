@@ -0,0 +1,99 @@
+import itertools
+import random
+
+import pytest
+
+from flavor_mix_optimizer import FlavorMixOptimizer
+
+NOTES = ["mint cool", "peach sweet", "berry tart", "citrus zest", "vanilla cream", "rose floral", "cola fizz"]
+
+
+def _catalog(n, seed=7):
+    rng = random.Random(seed)
+    return {
+        f"Flavor{i}": {
+            "sales": rng.uniform(0, 500),
+            "loyalty": rng.uniform(0, 10),
+            "burnout": rng.uniform(0, 10),
+            "notes": " ".join(rng.sample(NOTES, 2)),
+        }
+        for i in range(n)
+    }
+
+
+def _brute_force(optimizer, size, top_n):
+    n_pairs = size * (size - 1) // 2
+    ranked = []
+    for mix in itertools.combinations(sorted(optimizer.catalog), size):
+        unary = sum(optimizer._unary[name] for name in mix) / size
+        pairs = sum(optimizer.pair(a, b) for a, b in itertools.combinations(mix, 2)) / n_pairs
+        ranked.append((unary + pairs, mix))
+    return sorted(ranked, reverse=True)[:top_n]
+
+
+def _assert_matches_brute_force(optimizer, results):
+    for size in optimizer.sizes:
+        expected = _brute_force(FlavorMixOptimizer(optimizer.catalog, optimizer.sizes, optimizer.top_n,
+                                                   sales_scale=optimizer.sales_scale), size, optimizer.top_n)
+        assert [mix for _, mix in results[size]] == [mix for _, mix in expected]
+        assert [score for score, _ in results[size]] == pytest.approx([score for score, _ in expected])
+
+
+def test_optimize_matches_brute_force():
+    optimizer = FlavorMixOptimizer(_catalog(14), top_n=5)
+    _assert_matches_brute_force(optimizer, optimizer.optimize())
+    # Pruning means far fewer pair scores than there are 3-flavor mixes.
+    assert optimizer.stats["pair_evaluations"] < len(list(itertools.combinations(range(14), 3)))
+
+
+def test_incremental_updates_match_a_fresh_search():
+    optimizer = FlavorMixOptimizer(_catalog(12), top_n=4, reserve=2)
+    optimizer.optimize()
+    rng = random.Random(11)
+    for _ in range(15):
+        name = f"Flavor{rng.randrange(12)}"
+        results = optimizer.update_flavor(name, sales=rng.uniform(0, 500), burnout=rng.uniform(0, 10))
+        _assert_matches_brute_force(optimizer, results)
+    results = optimizer.update_flavor("Newcomer", sales=450.0, loyalty=9.5, burnout=0.5, notes="lychee")
+    _assert_matches_brute_force(optimizer, results)
+    _assert_matches_brute_force(optimizer, optimizer.remove_flavor("Flavor3"))
+
+
+def test_updates_that_move_the_best_seller_match_a_fresh_run():
+    optimizer = FlavorMixOptimizer(_catalog(10), top_n=4, reserve=2)
+    optimizer.optimize()
+
+    def assert_fresh(results):
+        expected = FlavorMixOptimizer(optimizer.catalog, top_n=4, reserve=2).optimize()
+        for size in optimizer.sizes:
+            assert [mix for _, mix in results[size]] == [mix for _, mix in expected[size]]
+            assert [score for score, _ in results[size]] == pytest.approx([score for score, _ in expected[size]])
+
+    assert_fresh(optimizer.update_flavor("Flavor4", sales=5000.0))
+    assert optimizer.sales_scale == 5000.0
+    assert_fresh(optimizer.update_flavor("Newcomer", sales=9000.0, loyalty=2.0, burnout=1.0, notes="lychee"))
+    # Removing the best seller shrinks the scale again.
+    assert_fresh(optimizer.remove_flavor("Newcomer"))
+    assert optimizer.sales_scale == 5000.0
+
+
+def test_sync_catalog_reports_changes_and_state_round_trips(tmp_path):
+    catalog = _catalog(8)
+    optimizer = FlavorMixOptimizer(catalog, top_n=3)
+    optimizer.optimize()
+    path = str(tmp_path / "mix.state.pickle")
+    optimizer.save(path)
+
+    restored = FlavorMixOptimizer.load(path)
+    assert restored.results() == optimizer.results()
+    catalog = {**catalog, "Flavor2": {**catalog["Flavor2"], "loyalty": 10.0}}
+    del catalog["Flavor5"]
+    assert sorted(restored.sync_catalog(catalog)) == ["Flavor2", "Flavor5"]
+    _assert_matches_brute_force(restored, restored.results())
+
+
+def test_load_rejects_a_missing_or_corrupt_state(tmp_path):
+    path = tmp_path / "mix.state.pickle"
+    assert FlavorMixOptimizer.load(str(path)) is None
+    path.write_bytes(b"not a pickle")
+    assert FlavorMixOptimizer.load(str(path)) is None
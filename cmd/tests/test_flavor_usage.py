@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from flavor_usage import FlavorUsageAggregator, UsageRing, latest_base_prices, latest_surcharges, push_price_nudges
+from journal import AppendJournal
+from surge_pricing import SurgePriceTable
+
+T0 = 1_699_999_200.0  # a whole hour
+
+
+def test_ring_total_matches_a_naive_count():
+    rng = random.Random(3)
+    ring, seen = UsageRing(10), []
+    index = 100
+    for _ in range(500):
+        index += rng.choice([0, 0, 1, 2, 15])
+        at = index - rng.randrange(12)  # some events arrive late, a few too late
+        if ring.add(at):
+            seen.append(at)
+        live = [i for i in seen if i > ring.head - 10]
+        assert ring.total == len(live)
+
+
+def test_rates_per_hour_and_short_history():
+    usage = FlavorUsageAggregator("minute", recent_buckets=15, baseline_buckets=120)
+    for minute in range(120):
+        usage.record("Peach + Mint", T0 + minute * 60, count=2 if minute >= 105 else 1)
+    recent, baseline = usage.rates("Peach", now=T0 + 119 * 60)
+    assert recent == pytest.approx(120.0)
+    assert baseline == pytest.approx(135 / 2)
+    # One minute of history is not diluted across the whole baseline window.
+    fresh = FlavorUsageAggregator("minute")
+    fresh.record("Cola", T0)
+    assert fresh.rates("Cola", now=T0) == (60.0, 60.0)
+    assert fresh.rates("Unknown") == (0.0, 0.0)
+
+
+def test_bad_windows():
+    with pytest.raises(ValueError, match="fortnight"):
+        FlavorUsageAggregator("fortnight")
+    with pytest.raises(ValueError):
+        FlavorUsageAggregator("hour", recent_buckets=10, baseline_buckets=5)
+
+
+def test_nudges_are_clamped_and_need_history():
+    usage = FlavorUsageAggregator("minute", recent_buckets=10, baseline_buckets=100)
+    for minute in range(100):
+        usage.record("Peach", T0 + minute * 60, count=10 if minute >= 90 else 1)
+        usage.record("Mint", T0 + minute * 60, count=0 if minute >= 90 else 1)
+    usage.record("Cola", T0)
+    nudges = usage.nudges(now=T0 + 99 * 60, max_surge=0.3, max_discount=0.1)
+    assert set(nudges) == {"Peach", "Mint"}
+    assert nudges["Peach"][1] == 0.3
+    assert nudges["Mint"][0] == 0.0 and nudges["Mint"][1] == -0.1
+
+
+def test_push_price_nudges_uses_each_keys_own_base_price(tmp_path):
+    usage = FlavorUsageAggregator("minute", recent_buckets=10, baseline_buckets=100)
+    for minute in range(100):
+        usage.record("Peach", T0 + minute * 60, count=10 if minute >= 90 else 1)
+    journal = AppendJournal(str(tmp_path / "surge.journal.jsonl"), fsync="never")
+    table = SurgePriceTable(str(tmp_path / "pricing.json"), log_journal=journal)
+    table.set("Peach", 30.0)
+    table.set("Peach + Mint", 40.0)
+    now = T0 + 99 * 60
+
+    changed = push_price_nudges(usage, table, {"Peach": 25.0}, now=now)
+    assert changed == {"Peach": 32.5, "Peach + Mint": 52.0}
+    # Re-running against the logged base prices does not compound the nudge.
+    table.flush()
+    base_prices = latest_base_prices(journal.read())
+    assert base_prices == {"Peach": 25.0, "Peach + Mint": 40.0}
+    assert push_price_nudges(usage, table, base_prices, now=now) == {}
+    assert table.snapshot() == {"Peach": 32.5, "Peach + Mint": 52.0}
+    table.close()
+
+
+def test_push_price_nudges_keeps_the_weekend_surcharge(tmp_path):
+    usage = FlavorUsageAggregator("minute", recent_buckets=10, baseline_buckets=100)
+    for minute in range(100):
+        usage.record("Peach", T0 + minute * 60, count=10 if minute >= 90 else 1)
+    journal = AppendJournal(str(tmp_path / "surge.journal.jsonl"), fsync="never")
+    table = SurgePriceTable(str(tmp_path / "pricing.json"), log_journal=journal)
+    # What add_surge_addon_to_stripe_price logs on a weekend.
+    table.set("Peach", 28.0, {"flavor": "Peach", "base_price": 25.0, "surge_price": 28.0, "weekend": True})
+    now = T0 + 99 * 60
+
+    def sync():
+        table.flush()
+        log = journal.read()
+        return push_price_nudges(usage, table, latest_base_prices(log), now=now, surcharges=latest_surcharges(log))
+
+    assert sync() == {"Peach": 35.5}  # 25 * 1.3 + 3
+    assert sync() == {}
+    assert journal.read()[-1]["surcharge"] == 3.0
+    # A weekday add-on drops the surcharge again.
+    table.set("Peach", 25.0, {"flavor": "Peach", "base_price": 25.0, "surge_price": 25.0, "weekend": False})
+    assert sync() == {"Peach": 32.5}
+    table.close()
@@ -0,0 +1,153 @@
+import json
+import os
+
+import pytest
+import yaml
+
+from atomic_io import atomic_write_yaml
+from journal import AppendJournal, JournalCursor
+from log_streams import iter_yaml_items
+
+
+def _journal(tmp_path, **kwargs):
+    return AppendJournal(str(tmp_path / "log.journal.jsonl"), str(tmp_path / "log.yaml"), fsync="never", **kwargs)
+
+
+def _merge_into(path):
+    def merge(records):
+        log = (yaml.safe_load(open(path)) if os.path.exists(path) else None) or []
+        log.extend(records)
+        atomic_write_yaml(path, log)
+        return len(log)
+    return merge
+
+
+def _read_since(journal, cursor):
+    return list(journal.iter_since(cursor, lambda skip: iter_yaml_items(journal.target, skip=skip)))
+
+
+def test_append_and_read_round_trip(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append({"n": 1})
+    journal.append_many([{"n": 2}, {"n": 3, "text": "Peach + Mint"}])
+    assert journal.read() == [{"n": 1}, {"n": 2}, {"n": 3, "text": "Peach + Mint"}]
+
+
+def test_torn_final_line_is_skipped(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append_many([{"n": 1}, {"n": 2}])
+    with open(journal.path, "a") as f:
+        f.write('{"n": 3')
+    assert journal.read() == [{"n": 1}, {"n": 2}]
+
+
+def test_unknown_fsync_policy():
+    with pytest.raises(ValueError):
+        AppendJournal("unused", fsync="sometimes")
+
+
+def test_interval_policy_batches_fsyncs(tmp_path, monkeypatch):
+    calls = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: calls.append(fd) or real_fsync(fd))
+    journal = AppendJournal(str(tmp_path / "j.jsonl"), fsync="interval", fsync_interval=60)
+    for n in range(20):
+        journal.append({"n": n})
+    assert len(calls) == 1
+
+
+def test_compact_merges_and_empties_the_journal(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append_many([{"n": 1}, {"n": 2}])
+    assert journal.compact(_merge_into(journal.target)) == 2
+    journal.append({"n": 3})
+    assert yaml.safe_load(open(journal.target)) == [{"n": 1}, {"n": 2}]
+    assert journal.read() == [{"n": 3}]
+    assert not os.path.exists(journal.compacting_path)
+
+
+def test_crash_after_merge_does_not_merge_twice(tmp_path, monkeypatch):
+    journal = _journal(tmp_path)
+    journal.append_many([{"n": 1}, {"n": 2}])
+    real_remove = os.remove
+
+    def crash(path):
+        raise KeyboardInterrupt("killed between merge and cleanup")
+
+    monkeypatch.setattr(os, "remove", crash)
+    with pytest.raises(KeyboardInterrupt):
+        journal.compact(_merge_into(journal.target))
+    monkeypatch.setattr(os, "remove", real_remove)
+    assert os.path.exists(journal.compacting_path)
+    # Readers do not see the merged-but-not-removed records twice either.
+    assert list(journal) == []
+
+    journal.compact(_merge_into(journal.target))
+    assert yaml.safe_load(open(journal.target)) == [{"n": 1}, {"n": 2}]
+    assert not os.path.exists(journal.compacting_path)
+
+
+def test_crash_before_merge_merges_on_next_run(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append_many([{"n": 1}, {"n": 2}])
+
+    def failing_merge(records):
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        journal.compact(failing_merge)
+    journal.append({"n": 3})
+    assert journal.read() == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+    assert journal.compact(_merge_into(journal.target)) == 2
+    assert yaml.safe_load(open(journal.target)) == [{"n": 1}, {"n": 2}]
+    assert journal.read() == [{"n": 3}]
+
+
+def test_cursor_reads_only_new_records(tmp_path):
+    journal = _journal(tmp_path)
+    cursor = JournalCursor()
+    journal.append_many([{"n": 1}, {"n": 2}])
+    assert _read_since(journal, cursor) == [{"n": 1}, {"n": 2}]
+    journal.append({"n": 3})
+    assert _read_since(journal, cursor) == [{"n": 3}]
+    assert _read_since(journal, cursor) == []
+    assert cursor.count == 3
+
+
+def test_cursor_survives_compaction_without_reading_the_target(tmp_path):
+    journal = _journal(tmp_path)
+    cursor = JournalCursor()
+    journal.append_many([{"n": 1}, {"n": 2}])
+    assert len(_read_since(journal, cursor)) == 2
+    journal.compact(_merge_into(journal.target))
+    journal.append({"n": 3})
+
+    def unread_target(skip):
+        raise AssertionError("the compacted log should have been skipped")
+
+    assert list(journal.iter_since(cursor, unread_target)) == [{"n": 3}]
+
+
+def test_cursor_behind_compaction_resumes_inside_the_target(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append_many([{"n": 1}, {"n": 2}, {"n": 3}])
+    cursor = JournalCursor()
+    first = journal.iter_since(cursor, lambda skip: iter_yaml_items(journal.target, skip=skip))
+    assert next(first) == {"n": 1}
+    first.close()
+    journal.compact(_merge_into(journal.target))
+    journal.append({"n": 4})
+    assert _read_since(journal, cursor) == [{"n": 2}, {"n": 3}, {"n": 4}]
+
+
+def test_cursor_state_is_json_serializable(tmp_path):
+    journal = _journal(tmp_path)
+    cursor = JournalCursor()
+    journal.append({"n": 1})
+    _read_since(journal, cursor)
+    restored = JournalCursor()
+    vars(restored).update(json.loads(json.dumps(vars(cursor))))
+    restored.segment = tuple(restored.segment)
+    journal.append({"n": 2})
+    assert _read_since(journal, restored) == [{"n": 2}]
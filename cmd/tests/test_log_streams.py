@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+import yaml
+
+from log_streams import event_time, filter_events, iter_yaml_items, split_combo
+
+ITEMS = [
+    {"timestamp": f"2025-01-0{i % 9 + 1}T10:00:00", "flavor_combo": combo, "meta": {"tags": ["a", "b"], "n": i}}
+    for i, combo in enumerate(["Peach + Mint", "Mint", "Blueberry & Lime", "Cola", "Peach", "Grape, Mint", ""])
+]
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 500])
+@pytest.mark.parametrize("skip", [0, 3, 7, 10])
+def test_block_list_matches_safe_load(tmp_path, batch_size, skip):
+    path = tmp_path / "log.yaml"
+    path.write_text("# comment\n" + yaml.safe_dump(ITEMS, sort_keys=False))
+    assert list(iter_yaml_items(str(path), batch_size=batch_size, skip=skip)) == ITEMS[skip:]
+
+
+@pytest.mark.parametrize("skip", [0, 2])
+def test_list_under_a_key(tmp_path, skip):
+    path = tmp_path / "vault.yaml"
+    path.write_text(yaml.safe_dump({"rewards": {"tier": 1}, "transactions": ITEMS[:4], "sessions": ITEMS[4:]}))
+    assert list(iter_yaml_items(str(path), "transactions", batch_size=2, skip=skip)) == ITEMS[skip:4]
+    assert list(iter_yaml_items(str(path), "sessions", skip=skip)) == ITEMS[4 + skip:]
+    assert list(iter_yaml_items(str(path), "missing")) == []
+
+
+@pytest.mark.parametrize("skip", [0, 2])
+def test_flow_style_falls_back_to_the_event_parser(tmp_path, skip):
+    path = tmp_path / "log.yaml"
+    path.write_text(yaml.safe_dump(ITEMS, default_flow_style=True))
+    assert list(iter_yaml_items(str(path), skip=skip)) == ITEMS[skip:]
+    path.write_text(yaml.safe_dump({"transactions": ITEMS}, default_flow_style=True))
+    assert list(iter_yaml_items(str(path), "transactions", skip=skip)) == ITEMS[skip:]
+
+
+def test_missing_or_empty_file(tmp_path):
+    assert list(iter_yaml_items(str(tmp_path / "missing.yaml"))) == []
+    (tmp_path / "empty.yaml").write_text("")
+    assert list(iter_yaml_items(str(tmp_path / "empty.yaml"))) == []
+
+
+def test_split_combo():
+    assert split_combo("Peach + Mint") == ["Peach", "Mint"]
+    assert split_combo("Blueberry & Lime/Mint, Lime") == ["Blueberry", "Lime", "Mint"]
+    assert split_combo(None) == []
+
+
+def test_event_time_treats_naive_timestamps_as_utc():
+    expected = datetime(2025, 1, 1, 10, tzinfo=timezone.utc).timestamp()
+    assert event_time("2025-01-01T10:00:00") == expected
+    assert event_time("2025-01-01T12:00:00+02:00") == expected
+    assert event_time(datetime(2025, 1, 1, 10)) == expected
+    assert event_time(expected) == expected
+
+
+def test_filter_events():
+    events = ITEMS + [{"flavor": "Mint", "user": 7}, "not an event"]
+    mint = list(filter_events(events, flavor="Mint"))
+    assert [e.get("flavor_combo") for e in mint] == ["Peach + Mint", "Mint", "Grape, Mint", None]
+    ranged = list(filter_events(events, since="2025-01-02", until=datetime(2025, 1, 4, tzinfo=timezone.utc)))
+    assert [e["meta"]["n"] for e in ranged] == [1, 2]
+    assert list(filter_events(events, user="7")) == [{"flavor": "Mint", "user": 7}]
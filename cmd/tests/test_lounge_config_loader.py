@@ -0,0 +1,67 @@
+import os
+
+import yaml
+
+from lounge_config_loader import LoungeConfigCache
+
+
+def _write(directory, slug, **config):
+    path = directory / f"{slug}.yaml"
+    path.write_text(yaml.dump({"lounge_name": slug.title(), **config}))
+    return path
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_refresh_reparses_only_changed_files(tmp_path):
+    _write(tmp_path, "cloud-nine", seat_count=10)
+    ember = _write(tmp_path, "ember", seat_count=8)
+    (tmp_path / "index.yaml").write_text(yaml.dump({"lounges": {}}))
+    cache = LoungeConfigCache(str(tmp_path))
+    assert sorted(cache.refresh()) == ["cloud-nine", "ember"]
+    assert cache.stats["parsed"] == 2 and len(cache) == 2
+
+    _bump_mtime(ember)  # touched, same bytes: hashed, not parsed
+    assert cache.refresh() == [] and cache.stats["hash_hits"] == 1
+    _write(tmp_path, "ember", seat_count=12)
+    _bump_mtime(ember)
+    assert cache.refresh() == ["ember"]
+    assert cache.get("ember")["seat_count"] == 12 and cache.stats["parsed"] == 3
+
+    os.remove(ember)
+    assert cache.refresh() == ["ember"]
+    assert cache.get("ember", "gone") == "gone"
+    assert cache.get("index") is None
+    (tmp_path / "secrets.yaml").write_text(yaml.dump({"token": "x"}))
+    nested = tmp_path / "nested"
+    nested.mkdir()
+    assert LoungeConfigCache(str(nested)).get("../secrets", "nope") == "nope"
+
+
+def test_snapshot_spares_a_new_process_the_parsing(tmp_path):
+    _write(tmp_path, "cloud-nine", seat_count=10)
+    _write(tmp_path, "ember", seat_count=8)
+    LoungeConfigCache(str(tmp_path)).refresh()
+
+    cold = LoungeConfigCache(str(tmp_path))
+    assert cold.stats["snapshot_loaded"]
+    assert cold.all()["ember"]["seat_count"] == 8
+    assert cold.stats["parsed"] == 0
+
+    (tmp_path / ".snapshot.pickle").write_bytes(b"garbage")
+    fresh = LoungeConfigCache(str(tmp_path))
+    assert not fresh.stats["snapshot_loaded"]
+    assert fresh.get("cloud-nine")["seat_count"] == 10
+
+
+def test_all_rescans_at_most_every_interval(tmp_path):
+    _write(tmp_path, "cloud-nine")
+    cache = LoungeConfigCache(str(tmp_path), rescan_interval=3600)
+    assert list(cache.all()) == ["cloud-nine"]
+    _write(tmp_path, "ember")
+    assert list(cache.all()) == ["cloud-nine"]
+    cache.rescan_interval = 0
+    assert sorted(cache.all()) == ["cloud-nine", "ember"]
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+import yaml
+
+from lounge_onboarding import load_index, register_lounges_bulk, update_index, validate_row
+
+CSV = """lounge_name,session_price,flavor_addons,seat_count,sections,slug
+Cloud Nine,35,Mint Blast:2;Peach:2.5,12,Main|Patio,
+Ember Room,,"{""Blue Ice"": 1}",,"[""Main""]",
+Cloud  Nine!,40,,8,,
+,30,,10,,
+Index Bar,30,,10,,index
+Bad Seats,30,,0,,
+"""
+
+
+def _index(directory):
+    with open(directory / "index.yaml") as f:
+        return yaml.safe_load(f)["lounges"]
+
+
+def test_validate_row_parses_csv_and_json_shapes():
+    config = validate_row({"lounge_name": "Cloud Nine", "session_price": "35.0", "flavor_addons": "Mint:2;Peach:2.5",
+                           "seat_count": "12", "sections": "Main|Patio"})
+    assert config == {"lounge_name": "Cloud Nine", "slug": "cloud-nine", "session_price": 35,
+                      "flavor_addons": {"Mint": 2, "Peach": 2.5}, "sections": ["Main", "Patio"],
+                      "seat_count": 12, "reflex_enabled": True}
+    from_json = validate_row('{"lounge_name": "Ember", "flavor_addons": {"Blue Ice": 1}, "section_names": ["VIP"]}')
+    assert (from_json["flavor_addons"], from_json["sections"], from_json["session_price"]) == ({"Blue Ice": 1}, ["VIP"], 30)
+
+
+@pytest.mark.parametrize("row, message", [
+    ({"lounge_name": ""}, "lounge_name is required"),
+    ({"lounge_name": "A", "session_price": -1}, "session_price"),
+    ({"lounge_name": "A", "seat_count": 0}, "seat_count"),
+    ({"lounge_name": "A", "slug": "Not A Slug"}, "invalid slug"),
+    ({"lounge_name": "Index"}, "reserved"),
+    ({"lounge_name": "A", "flavor_addons": "Mint"}, "Name:price"),
+    ("[1, 2]", "JSON object"),
+    ('{"lounge_name": ', "Expecting value"),
+])
+def test_validate_row_rejects(row, message):
+    with pytest.raises(ValueError, match=message):
+        validate_row(row)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_csv_import_reports_bad_rows_and_suffixes_collisions(tmp_path, workers):
+    source = tmp_path / "lounges.csv"
+    source.write_text(CSV)
+    out = tmp_path / "lounges"
+    result = register_lounges_bulk(str(source), str(out), on_conflict="suffix", workers=workers)
+
+    assert result["written"] == 3
+    assert [e["line"] for e in result["errors"]] == [5, 6, 7]
+    assert "reserved" in result["errors"][1]["error"]
+    assert sorted(_index(out)) == ["cloud-nine", "cloud-nine-2", "ember-room"]
+    with open(out / "cloud-nine-2.yaml") as f:
+        assert yaml.safe_load(f)["lounge_name"] == "Cloud  Nine!"
+
+
+def test_conflict_policies_against_an_earlier_run(tmp_path):
+    out = tmp_path / "lounges"
+    first = tmp_path / "first.jsonl"
+    first.write_text(json.dumps({"lounge_name": "Cloud Nine"}) + "\n")
+    register_lounges_bulk(str(first), str(out))
+
+    again = tmp_path / "again.jsonl"
+    again.write_text("\n".join([
+        json.dumps({"lounge_name": "Cloud Nine", "seat_count": 20}),  # same lounge: updated in place
+        json.dumps({"lounge_name": "Other", "slug": "cloud-nine"}),
+        "not json",
+        json.dumps(["a", "list"]),
+    ]) + "\n")
+    errors = register_lounges_bulk(str(again), str(out), on_conflict="error")["errors"]
+    assert [e["line"] for e in errors] == [2, 3, 4]
+    assert errors[0]["error"] == "slug collision: cloud-nine"
+    with open(out / "cloud-nine.yaml") as f:
+        assert yaml.safe_load(f)["seat_count"] == 20
+
+    other = tmp_path / "other.jsonl"
+    other.write_text(json.dumps({"lounge_name": "Other", "slug": "cloud-nine"}) + "\n")
+    assert register_lounges_bulk(str(other), str(out), on_conflict="overwrite")["written"] == 1
+    assert _index(out)["cloud-nine"]["lounge_name"] == "Other"
+    with pytest.raises(ValueError):
+        register_lounges_bulk(str(other), str(out), on_conflict="skip")
+
+
+def test_index_is_rebuilt_from_existing_configs(tmp_path):
+    out = tmp_path / "lounges"
+    out.mkdir()
+    (out / "ember-room.yaml").write_text(yaml.dump({"lounge_name": "Ember Room", "slug": "ember-room"}))
+    assert load_index(str(out)) == {"ember-room": {"file": "ember-room.yaml", "lounge_name": "Ember Room"}}
+    update_index({"slug": "cloud-nine", "lounge_name": "Cloud Nine"}, str(out))
+    assert sorted(_index(out)) == ["cloud-nine", "ember-room"]
@@ -0,0 +1,132 @@
+import loyalty_coach
+import stripe_integration as si
+from loyalty_coach import CoachHintIndex, HintCache, LoyaltyCoach
+from loyalty_ledger import LoyaltyLedger
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hint_cache_evicts_least_recently_used():
+    cache = HintCache(maxsize=2, ttl=60)
+    cache.put(("u1", None), "a")
+    cache.put(("u2", None), "b")
+    assert cache.get(("u1", None)) == "a"
+    cache.put(("u3", None), "c")
+    assert cache.get(("u2", None)) is None
+    assert cache.get(("u1", None)) == "a" and cache.get(("u3", None)) == "c"
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_hint_cache_expires_entries(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(loyalty_coach.time, "monotonic", clock)
+    cache = HintCache(maxsize=10, ttl=30)
+    cache.put(("u1", None), "a")
+    clock.now += 29
+    assert cache.get(("u1", None)) == "a"
+    clock.now += 1
+    assert cache.get(("u1", None)) is None
+    assert len(cache) == 0
+
+
+def test_hint_cache_invalidates_one_user():
+    cache = HintCache(maxsize=10, ttl=60)
+    cache.put(("u1", None), "a")
+    cache.put(("u1", "L1"), "b")
+    cache.put(("u2", None), "c")
+    cache.invalidate_user("u1")
+    assert cache.get(("u1", None)) is None and cache.get(("u1", "L1")) is None
+    assert cache.get(("u2", None)) == "c"
+
+
+def test_index_totals_per_lounge_and_merged():
+    index = CoachHintIndex()
+    changed = index.consume([
+        {"user": "u1", "amount": 20.0, "trust_arc": 8.0, "loyalty_gain": 2.0, "lounge_id": "L1",
+         "timestamp": "2025-01-01T10:00:00Z"},
+        {"user": "u1", "amount": 10.0, "trust_arc": 9.0, "loyalty_gain": 1.5, "surge_active": True,
+         "timestamp": "2025-01-02T10:00:00Z"},
+    ])
+    assert changed == {"u1"}
+    assert index.balance("u1") == 3.5
+    assert index.summary("u1", "L1")[:6] == [1, 20.0, 2.0, 8.0, 1, 0]
+    assert index.summary("u1")[:6] == [2, 30.0, 3.5, 17.0, 2, 1]
+    assert index.summary("u2") is None
+
+
+def test_coach_catches_up_from_the_ledger_on_a_miss(stripe_dir):
+    coach = LoyaltyCoach(cache=HintCache(maxsize=10, ttl=3600), catch_up_interval=0)
+    si.add_loyalty_listener(coach.refresh)
+    assert coach.hints("u1") is None
+
+    si.attach_loyalty_to_stripe_events("u1", 20.0, 9.5, lounge_id="L1")
+    first = coach.hints("u1")
+    assert first["visits"] == 1 and first["balance"] == 2.0
+    assert coach.hints("u1") is first
+
+    # Another process writes to the same ledger: nothing calls the listener,
+    # but a miss for a new key reads past the cursor.
+    other = LoyaltyLedger(si.LOYALTY_LEDGER_PATH)
+    other.record("u2", 30.0, 7.5, 3.0)
+    other.close()
+    assert coach.hints("u2")["balance"] == 3.0
+
+    # This process records again: the listener drops u1's cached hints.
+    si.attach_loyalty_to_stripe_events("u1", 10.0, 9.0, lounge_id="L1")
+    assert coach.hints("u1")["visits"] == 2
+    assert coach.hints("u1", "L1")["visits"] == 2
+    assert coach.index.cursor.last_id == 3
+
+
+def test_unknown_guests_are_cached_and_catch_up_is_rate_limited(stripe_dir, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(loyalty_coach.time, "monotonic", clock)
+    reads = []
+    real_since = si.iter_loyalty_events_since
+    monkeypatch.setattr(si, "iter_loyalty_events_since", lambda cursor: reads.append(1) or real_since(cursor))
+    coach = LoyaltyCoach(cache=HintCache(maxsize=10, ttl=3600), catch_up_interval=10)
+
+    assert [coach.hints("ghost") for _ in range(3)] == [None] * 3
+    assert coach.hints("other") is None
+    assert len(reads) == 1
+
+    other = LoyaltyLedger(si.LOYALTY_LEDGER_PATH)
+    other.record("newcomer", 30.0, 7.5, 3.0)
+    other.close()
+    assert coach.hints("newcomer") is None  # within the interval: no rescan
+    clock.now += 10
+    assert coach.hints("newcomer")["balance"] == 3.0
+    assert len(reads) == 2
+    # Reading the ghost's first transaction drops its cached "unknown".
+    si.add_loyalty_listener(coach.refresh)
+    si.attach_loyalty_to_stripe_events("ghost", 20.0, 9.5)
+    assert coach.hints("ghost")["visits"] == 1
+
+
+def test_rows_without_a_timestamp_have_no_visit_time():
+    index = CoachHintIndex()
+    index.consume([{"user": "u1", "amount": 5.0, "loyalty_gain": 0.5}])
+    assert index.summary("u1")[loyalty_coach.FIRST:] == [None, None]
+    index.consume([{"user": "u1", "amount": 5.0, "loyalty_gain": 0.5, "timestamp": "2025-01-02T10:00:00Z"}])
+    assert index.summary("u1")[loyalty_coach.LAST] == 1735812000.0
+    hints = loyalty_coach.render_hints([2, 10.0, 1.0, 0.0, 0, 0, None, None], 1.0)
+    assert hints["last_visit"] is None and hints["visits"] == 2
+
+
+def test_refresh_coach_index_saves_and_resumes(stripe_dir):
+    state_path = str(stripe_dir / "coach.state.pickle")
+    si.attach_loyalty_to_stripe_events("u1", 20.0, 9.5)
+    index, changed = loyalty_coach.refresh_coach_index(state_path)
+    assert changed == {"u1"}
+
+    si.attach_loyalty_to_stripe_events("u2", 10.0, 8.0)
+    index, changed = loyalty_coach.refresh_coach_index(state_path)
+    assert changed == {"u2"}
+    assert index.balance("u1") == 2.0 and index.balance("u2") == 1.0
@@ -0,0 +1,80 @@
+import yaml
+
+from loyalty_ledger import LedgerCursor, LoyaltyLedger, vault_rows
+
+VAULT = {
+    "transactions": [
+        {"user": "u1", "amount": 20.0, "trust_arc": 8.0, "loyalty_gain": 2.0, "timestamp": "2025-01-01T10:00:00"},
+        {"user": "u2", "amount": 10.0, "trust_arc": 9.5, "loyalty_gain": 1.5, "surge_active": True,
+         "timestamp": "2025-01-01T11:00:00", "lounge_id": "L1"},
+    ],
+    "sessions": [
+        {"user": "u1", "points": 3, "timestamp": "2024-12-01T09:00:00"},
+        {"note": "entries without a user are skipped"},
+    ],
+}
+
+
+def _ledger(tmp_path):
+    return LoyaltyLedger(str(tmp_path / "ledger.sqlite3"))
+
+
+def test_record_round_trip_and_balances(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.record("u1", 20.0, 8.0, 2.0, lounge_id="L1")
+    ledger.record_many([
+        {"user": "u1", "amount": 5.0, "trust_arc": 7.0, "loyalty_gain": 0.5, "surge_active": True},
+        {"user": "u2", "amount": 10.0, "trust_arc": 9.0, "loyalty_gain": 1.0},
+    ])
+    assert ledger.balance("u1") == 2.5
+    assert ledger.balances() == {"u1": 2.5, "u2": 1.0}
+    history = ledger.history("u1")
+    assert [tx["loyalty_gain"] for tx in history] == [0.5, 2.0]
+    assert history[0]["surge_active"] is True
+    assert history[1]["lounge_id"] == "L1"
+    ledger.close()
+
+
+def test_state_survives_reopening(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.record("u1", 20.0, 8.0, 2.0)
+    ledger.close()
+    ledger = _ledger(tmp_path)
+    assert ledger.balance("u1") == 2.0
+    assert len(list(ledger.iter_transactions())) == 1
+    ledger.close()
+
+
+def test_iter_transactions_pages_from_after_id(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.record_many({"user": f"u{i % 3}", "loyalty_gain": i} for i in range(10))
+    rows = list(ledger.iter_transactions(batch_size=3))
+    assert [tx["loyalty_gain"] for tx in rows] == list(range(10))
+    later = list(ledger.iter_transactions(batch_size=3, after_id=rows[6]["id"]))
+    assert [tx["loyalty_gain"] for tx in later] == [7, 8, 9]
+    assert [tx["loyalty_gain"] for tx in ledger.iter_transactions("u1", after_id=rows[1]["id"])] == [4, 7]
+    ledger.close()
+
+
+def test_import_yaml_vault_once(tmp_path):
+    vault = tmp_path / "vault.yaml"
+    vault.write_text(yaml.safe_dump(VAULT))
+    ledger = _ledger(tmp_path)
+    assert ledger.import_yaml_vault(str(vault)) == 3
+    assert ledger.import_yaml_vault(str(vault)) == 0
+    assert ledger.balances() == {"u1": 5.0, "u2": 1.5}
+    ledger.close()
+
+
+def test_vault_cursor_counts_each_section(tmp_path):
+    vault = tmp_path / "vault.yaml"
+    vault.write_text(yaml.safe_dump(VAULT))
+    cursor = LedgerCursor()
+    assert len(list(vault_rows(str(vault), cursor))) == 3
+    assert (cursor.transactions, cursor.sessions) == (2, 2)
+
+    # A new transaction lands before the sessions list: only it is read next time.
+    grown = {**VAULT, "transactions": VAULT["transactions"] + [{"user": "u3", "loyalty_gain": 1.0}]}
+    vault.write_text(yaml.safe_dump(grown))
+    assert [row[0] for row in vault_rows(str(vault), cursor)] == ["u3"]
+    assert (cursor.transactions, cursor.sessions) == (3, 2)
@@ -0,0 +1,64 @@
+import json
+import os
+
+from reflex_event_store import ReflexEventStore, migrate_reflex_log
+
+
+def _events(n, start=0):
+    return [
+        {
+            "type": "surge" if i % 3 == 0 else "loyalty",
+            "trigger": f"t{i}",
+            "message": f"event {i}",
+            "timestamp": f"2025-01-01T{i // 60:02d}:{i % 60:02d}:00Z",
+        }
+        for i in range(start, start + n)
+    ]
+
+
+def test_append_and_query_round_trip_across_segments(tmp_path):
+    store = ReflexEventStore(str(tmp_path), segment_events=4)
+    events = _events(10)
+    assert store.append_many(events) == 10
+    manifest = store.manifest()
+    assert [s["count"] for s in manifest["segments"]] == [4, 4, 2]
+    assert [s["sealed"] for s in manifest["segments"]] == [True, True, False]
+    assert list(store) == events
+    assert store.count() == 10
+    assert store.count("surge") == 4
+
+
+def test_indexed_queries_match_a_full_scan(tmp_path):
+    store = ReflexEventStore(str(tmp_path), segment_events=4)
+    events = _events(25)
+    store.append_many(events)
+    since, until = "2025-01-01T00:05:00Z", "2025-01-01T00:17:00Z"
+    expected = [e for e in events if e["type"] == "surge" and since <= e["timestamp"] < until]
+    assert list(store.query("surge", since=since, until=until)) == expected
+    assert list(store.query(since=since)) == [e for e in events if e["timestamp"] >= since]
+    # Segments whose time range cannot match are never opened.
+    assert len(store.segments_for(since="2025-01-01T00:20:00Z")) == 2
+
+
+def test_interrupted_append_is_invisible_and_truncated(tmp_path):
+    store = ReflexEventStore(str(tmp_path), segment_events=100)
+    store.append_many(_events(3))
+    segment = store.manifest()["segments"][0]
+    with open(os.path.join(str(tmp_path), segment["name"]), "ab") as f:
+        f.write(b'{"type":"surge","trigger":"torn"')
+    assert len(list(store)) == 3
+
+    store.append(_events(1, start=3)[0])
+    assert list(store) == _events(4)
+    with open(os.path.join(str(tmp_path), segment["name"]), "rb") as f:
+        assert b"torn" not in f.read()
+
+
+def test_migrate_reflex_log_runs_once(tmp_path):
+    legacy = tmp_path / "ReflexLog.json"
+    legacy.write_text(json.dumps(_events(5)))
+    directory = str(tmp_path / "store")
+    assert migrate_reflex_log(str(legacy), directory)["migrated"] == 5
+    again = migrate_reflex_log(str(legacy), directory)
+    assert again["already_migrated"] and again["events"] == 5
+    assert list(ReflexEventStore(directory)) == _events(5)
@@ -0,0 +1,53 @@
+import json
+
+import stripe_integration as si
+
+
+def _burst():
+    return [
+        {"flavor_combo": "Peach + Mint", "user_id": "u1", "amount": 20.0, "trust_arc": 8.0, "lounge_id": "L1"},
+        {"flavor_combo": "Mint", "surge_active": True},
+        {"user_id": "u2", "amount": 50.0, "trust_arc": 5.0},
+        {"user_id": "u1", "amount": 10.0, "trust_arc": 9.0, "surge_active": True},
+        {},
+    ]
+
+
+def test_batch_matches_one_call_per_event(stripe_dir):
+    batch = si.ingest_stripe_events(_burst())
+    assert batch["count"] == 5
+    assert batch["results"][0] == {
+        "flavor": "Metadata injected for Peach + Mint (surge_active=False)",
+        "loyalty": "Loyalty +2.0 attached for user u1 | Whisper milestone triggered",
+    }
+    assert batch["results"][2] == {"loyalty": "TrustArc below threshold; no loyalty delta applied."}
+    assert batch["results"][4] == {}
+    assert [e["flavor_combo"] for e in si.load_flavor_log()] == ["Peach + Mint", "Mint"]
+    assert si.get_loyalty_balance("u1") == 3.5 and si.get_loyalty_balance("u2") == 0
+    # The checkout metadata reflects the last flavor event, as per-event calls would leave it.
+    with open(si.CHECKOUT_METADATA_PATH) as f:
+        assert json.load(f) == {"flavor_combo": "Mint", "surge_active": "true"}
+
+
+def test_batch_writes_each_store_once(stripe_dir, monkeypatch):
+    flavor_batches, loyalty_batches = [], []
+    si.add_flavor_listener(flavor_batches.append)
+    si.add_loyalty_listener(loyalty_batches.append)
+    appends = []
+    journal = si._flavor_journal()
+    real_append_many = journal.append_many
+    monkeypatch.setattr(journal, "append_many", lambda records: appends.append(len(records)) or real_append_many(records))
+
+    si.ingest_stripe_events(_burst())
+    assert appends == [2]
+    assert [len(batch) for batch in flavor_batches] == [2]
+    assert [[tx["user"] for tx in batch] for batch in loyalty_batches] == [["u1", "u1"]]
+    assert loyalty_batches[0][0]["lounge_id"] == "L1"
+
+
+def test_yaml_backends_store_the_same_batch(stripe_dir, monkeypatch):
+    monkeypatch.setattr(si, "FLAVOR_LOG_MODE", "yaml")
+    monkeypatch.setattr(si, "LOYALTY_BACKEND", "yaml")
+    si.ingest_stripe_events(_burst())
+    assert [e["flavor_combo"] for e in si.iter_flavor_log()] == ["Peach + Mint", "Mint"]
+    assert [(tx["user"], tx["loyalty_gain"]) for tx in si.iter_loyalty_events()] == [("u1", 2.0), ("u1", 1.5)]
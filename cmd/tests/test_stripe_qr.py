@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+import stripe_integration as si
+
+pytest.importorskip("qrcode")
+
+
+def _sessions(n):
+    return {f"table-{i}": f"https://checkout.stripe.com/c/pay/cs_test_{i % 3}" for i in range(n)}
+
+
+def test_single_qr_is_cached_by_url(stripe_dir, monkeypatch):
+    renders = []
+    real_render = si._render_qr_to_cache
+    monkeypatch.setattr(si, "_render_qr_to_cache", lambda url, path: renders.append(url) or real_render(url, path))
+    url = "https://checkout.stripe.com/c/pay/cs_test_a"
+    first = si.generate_stripe_qr("L1", "table-1", url)
+    si.generate_stripe_qr("L1", "table-2", url)
+    assert renders == [url]
+    path = first.rsplit(" ", 1)[1]
+    assert open(path, "rb").read(8) == b"\x89PNG\r\n\x1a\n"
+    assert os.path.samefile(path, os.path.join(si._qr_dir(), "L1_table-2.png"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_lounge_set_renders_each_distinct_url_once(stripe_dir, workers):
+    progress = []
+    result = si.generate_lounge_qr_set("L1", _sessions(6), max_workers=workers,
+                                       progress=lambda done, total: progress.append((done, total)))
+    assert (result["rendered"], result["cached"]) == (3, 0)
+    assert progress[-1] == (3, 3)
+    assert sorted(result["files"]) == [f"table-{i}" for i in range(6)]
+    assert os.path.samefile(result["files"]["table-0"], result["files"]["table-3"])
+
+    again = si.generate_lounge_qr_set("L1", _sessions(7), max_workers=workers, progress=None)
+    assert (again["rendered"], again["cached"]) == (0, 3)
+    assert os.path.exists(again["files"]["table-6"])
+
+
+def test_missing_qrcode_library(stripe_dir, monkeypatch):
+    monkeypatch.setattr(si, "qrcode", None)
+    assert si.generate_stripe_qr("L1", "t", "https://x") == "qrcode library not installed"
+    assert si.generate_lounge_qr_set("L1", {"t": "https://x"}) == {"error": "qrcode library not installed"}
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+
+from stripe_webhook_server import MAX_BODY_BYTES, WebhookIngestionServer, event_to_ingest, sign_payload, verify_signature
+
+
+def _event(flavor="Peach + Mint", **metadata):
+    return {
+        "type": "checkout.session.completed",
+        "data": {"object": {"amount_total": 3250, "customer": "cus_1",
+                            "metadata": {"flavor_combo": flavor, "surge_active": "true", **metadata}}},
+    }
+
+
+async def _request(port, method, path, body=b"", headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    head = {"Content-Length": str(len(body)), "Connection": "close", **(headers or {})}
+    lines = [f"{method} {path} HTTP/1.1"] + [f"{k}: {v}" for k, v in head.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b"\r\n")
+    return int(status_line.split()[1]), json.loads(rest.split(b"\r\n\r\n", 1)[1])
+
+
+def _server(tmp_path, ingest, **kwargs):
+    return WebhookIngestionServer(port=0, batch_wait=0.01, ingest=ingest, retry_backoff=0.01,
+                                  spool_path=str(tmp_path / "spool.journal.jsonl"), **kwargs)
+
+
+def test_event_mapping_and_signatures():
+    assert event_to_ingest(_event(lounge_id="L1", trust_arc="8.5", base_price="30")) == {
+        "surge_active": True, "amount": 32.5, "flavor_combo": "Peach + Mint", "lounge_id": "L1",
+        "user_id": "cus_1", "trust_arc": 8.5, "base_price": 30.0,
+    }
+    assert event_to_ingest({"type": "customer.created"}) is None
+    header = sign_payload(b"{}", "whsec")
+    assert verify_signature(b"{}", header, "whsec")
+    assert not verify_signature(b"{ }", header, "whsec")
+    assert not verify_signature(b"{}", sign_payload(b"{}", "whsec", timestamp=0), "whsec")
+
+
+def test_accepts_batches_and_rejects_bad_requests(tmp_path, stripe_dir):
+    batches = []
+
+    async def scenario():
+        server = await _server(tmp_path, batches.append, webhook_secret="whsec").start()
+        for flavor in ("Peach", "Mint"):
+            body = json.dumps(_event(flavor)).encode()
+            status, _ = await _request(server.port, "POST", "/webhook", body,
+                                       {"Stripe-Signature": sign_payload(body, "whsec")})
+            assert status == 202
+        assert (await _request(server.port, "POST", "/webhook", b"{}", {"Stripe-Signature": "t=1,v1=x"}))[0] == 401
+        assert (await _request(server.port, "POST", "/webhook", b"", {"Content-Length": "ten"}))[0] == 400
+        assert (await _request(server.port, "POST", "/webhook", b"",
+                               {"Content-Length": str(MAX_BODY_BYTES + 1)}))[0] == 413
+        assert (await _request(server.port, "GET", "/nowhere"))[0] == 404
+        await server.stop()
+        return server.stats()
+
+    stats = asyncio.run(scenario())
+    assert [event["flavor_combo"] for batch in batches for event in batch] == ["Peach", "Mint"]
+    assert (stats["accepted"], stats["processed"], stats["rejected_invalid"]) == (2, 2, 1)
+
+
+def test_failed_batches_are_retried_spooled_and_replayed(tmp_path, stripe_dir):
+    calls, replayed = [], []
+
+    def flaky(events):
+        calls.append(events)
+        raise RuntimeError("ledger locked")
+
+    async def first_run():
+        server = await _server(tmp_path, flaky, max_attempts=3).start()
+        status, _ = await _request(server.port, "POST", "/webhook", json.dumps(_event()).encode())
+        assert status == 202
+        await server.stop()
+        return server.stats()
+
+    stats = asyncio.run(first_run())
+    assert len(calls) == 3
+    assert (stats["failed"], stats["retried"], stats["spooled"]) == (1, 2, 1)
+
+    async def second_run():
+        server = await _server(tmp_path, replayed.extend).start()
+        await server.stop()
+        return server.stats()
+
+    assert asyncio.run(second_run())["replayed"] == 1
+    assert [event["flavor_combo"] for event in replayed] == ["Peach + Mint"]
+    # Replayed events are not replayed again.
+    assert asyncio.run(second_run())["replayed"] == 0
+
+
+def test_retries_and_replays_only_rerun_the_failed_stage(tmp_path, stripe_dir, monkeypatch):
+    import stripe_integration as si
+
+    real_surge = si.add_surge_addon_to_stripe_price
+    failures = iter([True, False, True])
+
+    def flaky_surge(*args):
+        if next(failures, False):
+            raise RuntimeError("price table busy")
+        return real_surge(*args)
+
+    monkeypatch.setattr(si, "add_surge_addon_to_stripe_price", flaky_surge)
+
+    async def run(max_attempts, *users):
+        server = await _server(tmp_path, None, max_attempts=max_attempts).start()
+        for user in users:
+            body = json.dumps(_event(trust_arc="8.5", base_price="30", user_id=user)).encode()
+            assert (await _request(server.port, "POST", "/webhook", body))[0] == 202
+        await server.stop()
+        return server
+
+    # Fails once, succeeds on the retry.
+    stats = asyncio.run(run(3, "u1")).stats()
+    assert (stats["processed"], stats["retried"]) == (1, 1)
+    # Fails its only attempt and is spooled; the next start replays it.
+    assert asyncio.run(run(1, "u2")).stats()["spooled"] == 1
+    server = asyncio.run(run(1))
+    assert server.stats()["replayed"] == 1
+
+    assert si.get_loyalty_balance("u1") == si.get_loyalty_balance("u2") == 3.75
+    assert [e["flavor_combo"] for e in si.load_flavor_log()] == ["Peach + Mint", "Peach + Mint"]
+    # A replay that died before the spool was cleared is a no-op the second time.
+    events = [event_to_ingest(_event(trust_arc="8.5", user_id="u3")) | {"event_id": "evt_3"}]
+    server._ingest_batch(events)
+    server._ingest_batch(events)
+    assert si.get_loyalty_balance("u3") == 3.75
+    # Markers are dropped once nothing is left to replay.
+    server._forget_progress()
+    assert not server._done and not os.path.exists(server.progress.path)
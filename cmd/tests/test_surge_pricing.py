@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+import surge_pricing
+from journal import AppendJournal
+from surge_pricing import SurgePriceTable
+
+
+def _table(tmp_path, **kwargs):
+    journal = AppendJournal(str(tmp_path / "surge.journal.jsonl"), fsync="never")
+    return SurgePriceTable(str(tmp_path / "pricing.json"), log_journal=journal, **kwargs)
+
+
+def _on_disk(tmp_path):
+    path = tmp_path / "pricing.json"
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def test_set_is_served_from_memory_until_flushed(tmp_path):
+    table = _table(tmp_path, flush_threshold=100)
+    table.set("Peach", 33.0, {"flavor": "Peach", "surge_price": 33.0})
+    assert table.get("Peach") == 33.0
+    assert table.pending == 2
+    assert _on_disk(tmp_path) == {}
+
+    assert table.flush() == 2
+    assert _on_disk(tmp_path) == {"Peach": 33.0}
+    assert table.log_journal.read() == [{"flavor": "Peach", "surge_price": 33.0}]
+    assert table.flush() == 0
+
+
+def test_threshold_triggers_a_flush(tmp_path):
+    table = _table(tmp_path, flush_threshold=3)
+    table.set("Peach", 33.0)
+    table.set("Mint", 30.0)
+    assert _on_disk(tmp_path) == {}
+    table.set("Cola", 28.0)
+    assert _on_disk(tmp_path) == {"Peach": 33.0, "Mint": 30.0, "Cola": 28.0}
+    assert table.pending == 0
+
+
+def test_flush_keeps_other_writers_prices(tmp_path):
+    (tmp_path / "pricing.json").write_text(json.dumps({"Peach": 30.0}))
+    table = _table(tmp_path)
+    assert table.get("Peach") == 30.0
+    (tmp_path / "pricing.json").write_text(json.dumps({"Peach": 30.0, "Mint": 31.0}))
+    table.set("Peach", 33.0)
+    table.flush()
+    assert _on_disk(tmp_path) == {"Peach": 33.0, "Mint": 31.0}
+    assert table.snapshot() == {"Peach": 33.0, "Mint": 31.0}
+
+
+def test_failed_flush_requeues_the_buffer(tmp_path, monkeypatch):
+    table = _table(tmp_path)
+    table.set("Peach", 33.0, {"flavor": "Peach"})
+
+    def disk_full(path, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(surge_pricing, "atomic_write_json", disk_full)
+    with pytest.raises(OSError):
+        table.flush()
+    assert table.pending == 2
+
+    monkeypatch.undo()
+    assert table.flush() == 2
+    assert _on_disk(tmp_path) == {"Peach": 33.0}
+
+
+def test_close_stops_the_flusher_and_flushes(tmp_path):
+    table = _table(tmp_path, flush_interval=3600).start()
+    table.set("Mint", 30.0, {"flavor": "Mint"})
+    table.close()
+    assert not table._thread.is_alive()
+    assert _on_disk(tmp_path) == {"Mint": 30.0}
+    assert table.log_journal.read() == [{"flavor": "Mint"}]
+
+
+def test_log_entries_without_a_journal_warn_instead_of_buffering(tmp_path):
+    table = SurgePriceTable(str(tmp_path / "pricing.json"))
+    with pytest.warns(RuntimeWarning, match="no log journal"):
+        table.set("Peach", 33.0, {"flavor": "Peach", "surge_price": 33.0})
+    table.set("Mint", 30.0, {"flavor": "Mint", "surge_price": 30.0})  # warned once
+    assert table.pending == 2 and table.flush() == 2
+    assert _on_disk(tmp_path) == {"Peach": 33.0, "Mint": 30.0}
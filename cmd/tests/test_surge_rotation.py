@@ -0,0 +1,79 @@
+import os
+
+import flavor_mix_optimizer
+import stripe_integration as si
+from surge_rotation import DEFAULT_ROTATION, SurgeRotation, quarter_of, run_rotation
+
+CATALOG = {"Peach": {"burnout": 2.0}, "Mint": {"burnout": 3.0}, "Cola": {"burnout": 9.0}}
+
+
+def _event(combo, month, lounge="L1", surge=False):
+    return {"timestamp": f"2025-{month:02d}-10T20:00:00Z", "flavor_combo": combo,
+            "lounge_id": lounge, "surge_active": surge}
+
+
+def _engine(*events):
+    engine = SurgeRotation()
+    engine.catch_up(events)
+    return engine
+
+
+def test_quarter_of():
+    assert quarter_of("2025-01-01T00:00:00Z") == ("2025-Q1", 0)
+    assert quarter_of("2025-08-31T23:59:59Z") == ("2025-Q3", 1)
+    assert quarter_of("2025-12-31T23:59:59+00:00") == ("2025-Q4", 2)
+
+
+def test_rotation_ranks_each_lounge():
+    engine = _engine(
+        *[_event("Peach + Mint", 3) for _ in range(5)],
+        *[_event("Cola", 3) for _ in range(6)],
+        _event("Mint", 1),
+        _event("Peach", 2, lounge="L2"),
+    )
+    rotations, rescored = engine.rotate("2025-Q1", CATALOG)
+    assert sorted(rescored) == ["L1", "L2"]
+    # Cola sells more but burns out: it drops behind Peach + Mint.
+    assert rotations["L1"] == {"Peach + Mint": "Active", "Cola": "In Review", "Mint": "Pending"}
+    assert rotations["L2"] == {"Peach": "Active"}
+
+
+def test_rotate_rescores_only_changed_lounges():
+    engine = _engine(_event("Peach", 3), _event("Mint", 3, lounge="L2"))
+    engine.rotate("2025-Q1", CATALOG)
+    assert engine.rotate("2025-Q1", CATALOG)[1] == []
+
+    engine.catch_up([_event("Cola", 3, lounge="L2")])
+    assert engine.rotate("2025-Q1", CATALOG)[1] == ["L2"]
+    assert engine.rotate("2025-Q1", {**CATALOG, "Peach": {"burnout": 8.0}})[1] == ["L1"]
+    # A different month or weights invalidates every lounge.
+    assert sorted(engine.rotate("2025-Q1", CATALOG, month=1)[1]) == ["L1", "L2"]
+
+
+def test_run_rotation_rejects_a_malformed_quarter():
+    assert "Invalid quarter" in run_rotation("2025-Q5")["error"]
+    assert "Invalid quarter" in run_rotation("Q1-2025")["error"]
+
+
+def test_run_rotation_reads_only_new_checkouts(stripe_dir, monkeypatch):
+    monkeypatch.setattr(flavor_mix_optimizer, "load_catalog", lambda: CATALOG)
+    state_path = str(stripe_dir / "rotation.state.pickle")
+    si._flavor_journal().append_many([_event("Peach", 1), _event("Mint", 2)])
+    first = run_rotation("2025-Q1", state_path=state_path)
+    assert first["events_added"] == 2
+    assert first["rotations"]["L1"] == {"Peach": "Active", "Mint": "In Review"}
+
+    si.compact_flavor_log()
+    si._flavor_journal().append_many([_event("Mint", 3, lounge="L2")])
+    second = run_rotation("2025-Q1", state_path=state_path)
+    assert second["events_added"] == 1
+    assert second["rescored"] == ["L2"]
+    assert second["rotations"]["L2"] == {"Mint": "Active"}
+
+
+def test_run_rotation_falls_back_to_the_default_combos(stripe_dir, monkeypatch):
+    monkeypatch.setattr(flavor_mix_optimizer, "load_catalog", lambda: CATALOG)
+    state_path = str(stripe_dir / "state" / "rotation.state.pickle")
+    run = run_rotation("2025-Q1", state_path=state_path)
+    assert run["default"] and run["rotations"] == {"unassigned": DEFAULT_ROTATION}
+    assert os.path.exists(state_path)
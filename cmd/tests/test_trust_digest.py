@@ -0,0 +1,89 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+import stripe_integration as si
+import trust_digest
+from trust_digest import export_trust_digest, month_bounds
+
+
+def _rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _log_march(stripe_dir):
+    si._flavor_journal().append_many([
+        {"timestamp": "2025-03-01T20:00:00", "flavor_combo": "Peach + Mint", "surge_active": True, "lounge_id": "L1"},
+        {"timestamp": "2025-03-01T21:00:00", "flavor_combo": "Peach + Mint", "lounge_id": "L1"},
+        {"timestamp": "2025-03-02T20:00:00", "flavor_combo": "Mint", "lounge_id": "L1"},
+        {"timestamp": "2025-03-31T23:59:59", "flavor_combo": "Cola"},
+        {"timestamp": "2025-04-01T00:00:00", "flavor_combo": "Cola", "lounge_id": "L1"},  # next month
+    ])
+    si._surge_journal().append_many([
+        {"timestamp": "2025-03-01T19:00:00", "flavor": "Peach + Mint", "base_price": 30.0, "surge_price": 33.0,
+         "lounge_id": "L1"},
+    ])
+    si.get_loyalty_ledger().record_many([
+        {"user": "u1", "amount": 20.0, "trust_arc": 8.0, "loyalty_gain": 2.0, "timestamp": "2025-03-01T20:05:00",
+         "lounge_id": "L1"},
+        {"user": "u2", "amount": 10.0, "trust_arc": 9.0, "loyalty_gain": 1.0, "timestamp": "2025-03-02T20:05:00",
+         "lounge_id": "L1"},
+        {"user": "u1", "amount": 5.0, "trust_arc": 7.0, "loyalty_gain": 0.5, "timestamp": "2025-02-28T20:00:00",
+         "lounge_id": "L1"},  # previous month
+    ])
+
+
+def test_month_bounds():
+    assert [d.isoformat() for d in month_bounds("2025-12")] == ["2025-12-01T00:00:00", "2026-01-01T00:00:00"]
+    with pytest.raises(ValueError):
+        month_bounds("2025-13")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_groups_by_lounge_and_day(stripe_dir, monkeypatch, workers):
+    monkeypatch.setattr(trust_digest, "FLUSH_ROWS", 2)  # force several partition flushes
+    _log_march(stripe_dir)
+    output = str(stripe_dir / "digest")
+    result = export_trust_digest("2025-03", output, workers=workers)
+    assert (result["month"], result["lounges"], result["daily_rows"]) == ("2025-03", 2, 3)
+    assert not [name for name in os.listdir(output) if name.startswith(".partitions-")]
+
+    summary = {row["lounge_id"]: row for row in _rows(os.path.join(output, "digest_summary.csv"))}
+    l1 = summary["L1"]
+    assert (l1["checkouts"], l1["surge_checkouts"], l1["top_flavor"], l1["top_flavor_checkouts"]) == ("3", "1", "Peach + Mint", "2")
+    assert (l1["loyalty_transactions"], l1["unique_users"], l1["loyalty_revenue"], l1["avg_trust_arc"]) == ("2", "2", "30.0", "8.5")
+    assert (l1["surge_price_changes"], l1["avg_surge_uplift"]) == ("1", "3.0")
+    assert l1["first_event"] == "2025-03-01T19:00:00+00:00"
+    assert (summary["unassigned"]["checkouts"], summary["unassigned"]["avg_trust_arc"]) == ("1", "")
+
+    daily = [(row["lounge_id"], row["date"], row["checkouts"], row["loyalty_revenue"])
+             for row in _rows(os.path.join(output, "digest_daily.csv"))]
+    assert daily == [("L1", "2025-03-01", "2", "20.0"), ("L1", "2025-03-02", "1", "10.0"),
+                     ("unassigned", "2025-03-31", "1", "0.0")]
+
+
+def test_npz_export_and_missing_pyarrow(stripe_dir, monkeypatch):
+    _log_march(stripe_dir)
+    output = str(stripe_dir / "digest")
+    result = export_trust_digest("2025-03", output, binary="npz", workers=1)
+    with np.load(os.path.join(output, "digest_summary.npz")) as summary:
+        assert list(summary["lounge_id"]) == ["L1", "unassigned"]
+        assert np.isnan(summary["avg_trust_arc"][1])
+    assert len(result["files"]) == 4
+
+    monkeypatch.setattr(trust_digest, "pyarrow", None)
+    assert export_trust_digest("2025-03", output, binary="parquet") == {"error": "pyarrow library not installed"}
+
+
+@pytest.mark.parametrize("month, binary, error", [
+    ("2025-13", None, "Invalid month: '2025-13' (expected YYYY-MM)"),
+    ("Oct", None, "Invalid month: 'Oct' (expected YYYY-MM)"),
+    ("2025-03", "feather", "Unknown binary format: feather (expected parquet or npz)"),
+])
+def test_bad_arguments_are_rejected_before_writing(stripe_dir, month, binary, error):
+    output = stripe_dir / "digest"
+    assert export_trust_digest(month, str(output), binary=binary) == {"error": error}
+    assert not output.exists()
@@ -0,0 +1,111 @@
+import itertools
+import random
+
+import pytest
+import yaml
+
+from trust_graph import NEIGHBOR_WEIGHT, TrustGraph, describe_escalation
+
+
+def _random_graph(seed, n=12, edges=30):
+    rng = random.Random(seed)
+    names = [f"agent{i}" for i in range(n)]
+    agents = {name: {"reflex_score": rng.randint(40, 100), "status": rng.choice(["active", "idle"]),
+                     "type": rng.choice(["core", "edge"]), "connections": []} for name in names}
+    for a, b in rng.sample(list(itertools.permutations(names, 2)), edges):
+        agents[a]["connections"].append(b)
+    relationships = [{"from": a, "to": b, "trust_score": rng.randint(50, 100)}
+                     for a in names for b in agents[a]["connections"] if rng.random() < 0.3]
+    return TrustGraph(agents, relationships), rng
+
+
+def _naive_costs(graph, source):
+    """Bellman-Ford over the same distrust weights."""
+    cost = {source: 0.0}
+    for _ in range(len(graph.agents)):
+        for a in list(cost):
+            for b in graph.out[a]:
+                step = cost[a] + max(0.0, 100.0 - graph.trust(a, b))
+                if step < cost.get(b, float("inf")):
+                    cost[b] = step
+    return cost
+
+
+def _naive_affected(graph, name):
+    affected, frontier, hops = {}, {name}, 0
+    while frontier:
+        hops += 1
+        frontier = {a for a in graph.agents for b in frontier if b in graph.out[a]} - set(affected) - {name}
+        affected.update((a, hops) for a in frontier)
+    return affected
+
+
+def _naive_network_score(graph, name):
+    own = graph.agents[name]["reflex_score"]
+    neighbours = [graph.agents[b]["reflex_score"] for b in graph.out[name]]
+    if not neighbours:
+        return own
+    return (1 - NEIGHBOR_WEIGHT) * own + NEIGHBOR_WEIGHT * sum(neighbours) / len(neighbours)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_queries_match_naive_searches(seed):
+    graph, _ = _random_graph(seed)
+    for source in graph.agents:
+        costs = _naive_costs(graph, source)
+        for target in graph.agents:
+            path, weakest = graph.trust_path(source, target)
+            if target not in costs:
+                assert path is None
+                continue
+            hops = list(zip(path, path[1:]))
+            assert all(b in graph.out[a] for a, b in hops)
+            assert sum(max(0.0, 100.0 - graph.trust(a, b)) for a, b in hops) == pytest.approx(costs[target])
+            assert weakest == min((graph.trust(a, b) for a, b in hops), default=None)
+        assert graph.affected_by(source) == _naive_affected(graph, source)
+
+
+def test_incremental_scores_and_caches_follow_mutations():
+    graph, rng = _random_graph(9)
+    names = list(graph.agents)
+    for _ in range(200):
+        a, b = rng.sample(names, 2)
+        graph.affected_by(a)
+        graph.trust_path(a, b)
+        action = rng.random()
+        if action < 0.5:
+            graph.set_score(a, rng.randint(0, 100))
+        elif action < 0.75:
+            graph.connect(a, b)
+        else:
+            graph.disconnect(a, b)
+        assert graph.affected_by(b) == _naive_affected(graph, b)
+        path, _ = graph.trust_path(a, b)
+        assert (path is None) == (b not in _naive_costs(graph, a))
+    for name in names:
+        assert graph.network_score(name) == pytest.approx(_naive_network_score(graph, name))
+    expected_total = sum(agent["reflex_score"] for agent in graph.agents.values())
+    assert graph.overall_score == pytest.approx(expected_total / len(names))
+
+
+def test_indexes_follow_score_and_status_changes():
+    graph = TrustGraph({"a": {"reflex_score": 90, "status": "active", "type": "core", "trust_level": "high"},
+                        "b": {"reflex_score": 60, "status": "active", "type": "edge", "connections": ["a"]}})
+    assert graph.find(status="active") == {"a", "b"}
+    graph.set_score("a", 40)
+    assert graph.find(trust_level="low") == {"a"} and graph.find(trust_level="high") == set()
+    assert graph.escalate("a", "score dropped") == {"b": 1}
+    assert graph.find(status="escalated", type="core") == {"a"}
+    assert graph.agents["a"]["escalation_reason"] == "score dropped"
+
+
+def test_describe_escalation(tmp_path):
+    path = tmp_path / "TrustGraph.yaml"
+    path.write_text(yaml.safe_dump({"agents": {
+        "db": {"reflex_score": 95},
+        "api": {"reflex_score": 90, "connections": ["db"]},
+        "ui": {"reflex_score": 88, "connections": ["api"]},
+    }}))
+    assert describe_escalation("db", str(path)) == "🕸️ Escalating db affects 2 agents: api (1 hop), ui (2 hops)"
+    assert describe_escalation("ui", str(path)) == "🕸️ Escalating ui affects no other agents"
+    assert describe_escalation("nobody", str(path)) == "Unknown agent: nobody"
@@ -0,0 +1,95 @@
+import json
+import os
+
+import numpy as np
+
+import stripe_integration as si
+from loyalty_ledger import LoyaltyLedger
+import trust_heatmap
+from trust_heatmap import TrustHeatmap, hour_of_week, refresh_trust_heatmap, write_heatmap_snapshot
+
+MONDAY_9 = "2025-01-06T09:30:00Z"
+SUNDAY_23 = "2025-01-12T23:59:00Z"
+
+
+def test_hour_of_week():
+    assert hour_of_week("2025-01-06T00:00:00Z") == 0
+    assert hour_of_week(MONDAY_9) == 9
+    assert hour_of_week(SUNDAY_23) == 167
+
+
+def test_batches_aggregate_and_rows_grow():
+    heatmap = TrustHeatmap(capacity=2)
+    assert heatmap.add_checkouts([
+        {"timestamp": MONDAY_9, "lounge_id": "L1", "surge_active": True},
+        {"timestamp": MONDAY_9, "lounge_id": "L1"},
+        {"timestamp": SUNDAY_23},
+        {"timestamp": SUNDAY_23, "lounge_id": "L3"},
+        {"flavor_combo": "no timestamp, skipped"},
+    ]) == 4
+    heatmap.add_loyalty([
+        {"timestamp": MONDAY_9, "lounge_id": "L1", "trust_arc": 8.0, "loyalty_gain": 2.0},
+        {"timestamp": MONDAY_9, "lounge_id": "L1", "trust_arc": 9.0, "loyalty_gain": 1.0},
+    ])
+    assert heatmap.lounges == {"L1": 0, "unassigned": 1, "L3": 2}
+    assert heatmap.view("checkouts").shape == (3, 168)
+    assert heatmap.view("checkouts")[0, 9] == 2 and heatmap.view("surge_checkouts")[0, 9] == 1
+    assert heatmap.view("checkouts")[1, 167] == 1 and heatmap.view("checkouts")[2, 167] == 1
+    assert heatmap.view("avg_trust")[0, 9] == 8.5 and heatmap.view("avg_trust")[0, 10] == 0
+    assert heatmap.view("loyalty_gain").sum() == 3.0
+
+
+def test_state_and_cursors_round_trip(tmp_path):
+    path = str(tmp_path / "heatmap.state.npz")
+    heatmap = TrustHeatmap()
+    heatmap.add_checkouts([{"timestamp": MONDAY_9, "lounge_id": "L1"}])
+    heatmap.flavor_cursor.count, heatmap.flavor_cursor.segment, heatmap.flavor_cursor.offset = 5, (1, 2, 3), 99
+    heatmap.loyalty_cursor.last_id = 7
+    heatmap.save(path)
+
+    restored = TrustHeatmap.load(path)
+    assert restored.lounges == {"L1": 0}
+    np.testing.assert_array_equal(restored.view("checkouts"), heatmap.view("checkouts"))
+    assert vars(restored.flavor_cursor) == vars(heatmap.flavor_cursor)
+    assert restored.loyalty_cursor.last_id == 7
+
+    (tmp_path / "corrupt.npz").write_bytes(b"not an npz")
+    assert TrustHeatmap.load(str(tmp_path / "corrupt.npz")).lounges == {}
+
+
+def test_refresh_reads_only_new_events(stripe_dir):
+    state_path = str(stripe_dir / "heatmap.state.npz")
+    snapshot_path = str(stripe_dir / "heatmaps" / "trust_heatmap.json")
+    si.inject_flavor_metadata_stripe("Peach", lounge_id="L1")
+    si.attach_loyalty_to_stripe_events("u1", 20.0, 9.0, lounge_id="L1")
+    assert refresh_trust_heatmap(state_path, snapshot_path)["events_added"] == 2
+
+    si.compact_flavor_log()
+    si.inject_flavor_metadata_stripe("Mint", surge_active=True, lounge_id="L2")
+    other = LoyaltyLedger(si.LOYALTY_LEDGER_PATH)
+    other.record("u2", 10.0, 7.0, 1.0, lounge_id="L1")
+    other.close()
+    result = refresh_trust_heatmap(state_path, snapshot_path)
+    assert result["events_added"] == 2 and result["lounges"] == 2
+
+    with open(snapshot_path) as f:
+        snapshot = json.load(f)
+    assert snapshot["lounges"] == ["L1", "L2"]
+    assert [sum(row) for row in snapshot["metrics"]["checkouts"]] == [1, 1]
+    assert [sum(row) for row in snapshot["metrics"]["loyalty_transactions"]] == [2, 0]
+    assert [sum(row) for row in snapshot["metrics"]["surge_checkouts"]] == [0, 1]
+
+
+def test_lounge_snapshot_stays_in_the_heatmap_dir(tmp_path, monkeypatch):
+    heatmaps = tmp_path / "public" / "heatmaps"
+    monkeypatch.setattr(trust_heatmap, "SNAPSHOT_PATH", str(heatmaps / "trust_heatmap.json"))
+    state_path = str(tmp_path / "state.npz")
+    heatmap = TrustHeatmap()
+    heatmap.add_checkouts([{"timestamp": MONDAY_9, "lounge_id": "HOPE_GLOBAL_FORUM"}])
+    heatmap.save(state_path)
+
+    result = write_heatmap_snapshot("HOPE_GLOBAL_FORUM", state_path)
+    assert result["lounges"] == 1 and os.path.exists(heatmaps / "HOPE_GLOBAL_FORUM.json")
+    for bad in ("../../x", "a/b", "", ".hidden"):
+        assert write_heatmap_snapshot(bad, state_path) == {"error": f"invalid lounge_id {bad!r}"}
+    assert os.listdir(heatmaps) == ["HOPE_GLOBAL_FORUM.json"] and not (tmp_path / "x.json").exists()
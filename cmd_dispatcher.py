@@ -2,22 +2,24 @@
 
 import os
 import sys
-import zipfile
-import shutil
 
 # Ensure modules in ./cmd/modules can be imported without installing as a package
 MODULE_PATH = os.path.join(os.path.dirname(__file__), "cmd", "modules")
 if MODULE_PATH not in sys.path:
     sys.path.insert(0, MODULE_PATH)
 
-import reflex_ui
+from command_metrics import METRICS
+from command_registry import LazyCommandRegistry
 
 
-def bundleDeployKit():
+def bundleDeployKit(mode="incremental"):
     """
     Bundles the Hookah+ deploy kit: React UI, YAML configs, and Netlify-ready build.
-    Returns path to generated ZIP.
+    Unchanged files reuse their compressed bytes from the previous bundle
+    (pass mode="full" to recompress everything). Returns path to generated ZIP.
     """
+    from deploy_bundle import build_deploy_kit
+
     bundle_name = "hookahplus_deploy_kit.zip"
     output_dir = "dist"
     bundle_path = os.path.join(output_dir, bundle_name)
@@ -31,18 +33,13 @@ def bundleDeployKit():
         "README.md"
     ]
 
-    with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for item in files_to_include:
-            if os.path.isdir(item):
-                for root, _, files in os.walk(item):
-                    for file in files:
-                        full_path = os.path.join(root, file)
-                        arcname = os.path.relpath(full_path, os.path.dirname(item))
-                        zipf.write(full_path, arcname)
-            elif os.path.isfile(item):
-                zipf.write(item, os.path.basename(item))
-
-    return f"✅ Deploy kit bundled at: {bundle_path}"
+    stats = build_deploy_kit(files_to_include, bundle_path, incremental=mode != "full")
+    return (
+        f"✅ Deploy kit bundled at: {bundle_path} "
+        f"({stats['files']} files: {stats['compressed']} compressed, {stats['reused']} reused; "
+        f"{stats['bytes_read']:,} bytes read, {stats['bytes_written']:,} written; "
+        f"{stats['elapsed_seconds']:.2f}s, ~{stats['estimated_seconds_saved']:.2f}s saved)"
+    )
 
 
 def switchDomain(domain_name="hookahplus.net"):
@@ -180,43 +177,51 @@ def registerLoungeConfig(
 ):
     """Registers a YAML config for a new Hookah+ lounge."""
     import yaml
-    import os
-    from slugify import slugify
-
-    if flavor_addons is None:
-        flavor_addons = {
-            "Mint Blast": 2,
-            "Double Apple": 3,
-            "Blue Ice": 1
-        }
-
-    if section_names is None:
-        section_names = ["Main", "VIP"]
-
-    if not slug:
-        slug = slugify(lounge_name)
-
-    config = {
-        "lounge_name": lounge_name,
-        "slug": slug,
-        "session_price": session_price,
-        "flavor_addons": flavor_addons,
-        "sections": section_names,
-        "seat_count": seat_count,
-        "reflex_enabled": True
-    }
-
-    output_dir = "configs/lounges"
+    from lounge_onboarding import INDEX_NAME, LOUNGES_DIR, build_lounge_config, update_index
+
+    config = build_lounge_config(
+        lounge_name,
+        session_price=session_price,
+        flavor_addons=flavor_addons,
+        seat_count=seat_count,
+        section_names=section_names,
+        slug=slug,
+    )
+    if config["slug"] == os.path.splitext(INDEX_NAME)[0]:
+        return f"\u274c Slug '{config['slug']}' is reserved for {INDEX_NAME}"
+
+    output_dir = LOUNGES_DIR
     os.makedirs(output_dir, exist_ok=True)
-    config_path = os.path.join(output_dir, f"{slug}.yaml")
+    config_path = os.path.join(output_dir, f"{config['slug']}.yaml")
 
     try:
         with open(config_path, "w") as f:
             yaml.dump(config, f)
+        update_index(config, output_dir)
         return f"\u2705 Lounge config registered: {config_path}"
     except Exception as e:
         return f"\u274c Failed to write config: {str(e)}"
 
+
+def registerLoungeConfigsBulk(source, on_conflict="error", workers=None):
+    """Registers every lounge in a CSV/JSONL file and rebuilds configs/lounges/index.yaml."""
+    from lounge_onboarding import register_lounges_bulk
+
+    try:
+        report = register_lounges_bulk(
+            source, on_conflict=on_conflict, workers=int(workers) if workers else None
+        )
+    except Exception as e:
+        return f"\u274c Bulk lounge registration failed: {str(e)}"
+
+    lines = [
+        f"\u2705 {report['written']} lounge configs registered in "
+        f"{report['elapsed_seconds']:.2f}s (index: {report['index']})"
+    ]
+    for error in report["errors"]:
+        lines.append(f"\u274c line {error['line']}: {error['error']}")
+    return "\n".join(lines)
+
 def pushPressKit():
     """Simulates pushing the latest press kit assets."""
     # Placeholder for real sync logic
@@ -232,15 +237,31 @@ def releaseTeaserVideo():
 # Optional: Extend as new cmd.* actions are needed
 
 
-# Codex and internal use: maps string commands to functions
-COMMANDS = {
-    "deployReflexUI": reflex_ui.deploy_reflex_ui,
-    "renderReflexLoyalty": reflex_ui.render_reflex_loyalty,
-    "injectReflexHeatmap": reflex_ui.inject_reflex_heatmap,
-    "deployFlavorMixUI": reflex_ui.deploy_flavor_mix_ui,
+# Codex and internal use: maps string commands to functions. Entries under
+# cmd/modules are "module:function" paths so only the dispatched command's
+# module is imported; set HOOKAHPLUS_EAGER_COMMANDS=1 to import them all.
+# With HOOKAHPLUS_METRICS=1 every command is timed and counted (see
+# cmd/modules/command_metrics.py).
+COMMANDS = LazyCommandRegistry({
+    "deployReflexUI": "reflex_ui:deploy_reflex_ui",
+    "renderReflexLoyalty": "reflex_ui:render_reflex_loyalty",
+    "injectReflexHeatmap": "reflex_ui:inject_reflex_heatmap",
+    "deployFlavorMixUI": "reflex_ui:deploy_flavor_mix_ui",
     # Add more here...
 
-    "deployToNetlify": reflex_ui.deploy_to_netlify,
+    "deployToNetlify": "reflex_ui:deploy_to_netlify",
+    "runStripeWebhookServer": "stripe_webhook_server:run_webhook_server",
+    "buildLoungeSnapshot": "lounge_config_loader:build_lounge_snapshot",
+    "refreshFlavorLeaderboard": "flavor_leaderboard:refresh_flavor_leaderboard",
+    "syncFlavorUsageToPricing": "reflex_loop:sync_flavor_usage_to_pricing",
+    "simulateFlavorBloom": "reflex_loop:simulate_flavor_bloom",
+    "autoOptimizeFlavorMixes": "reflex_loop:auto_optimize_flavor_mixes",
+    "exportOwnerTrustDigest": "reflex_loop:export_owner_trust_digest",
+    "deployTrustHeatmap": "reflex_loop:deploy_trust_heatmap",
+    "traceTrustEscalation": "trust_graph:describe_escalation",
+    "migrateReflexLog": "reflex_event_store:migrate_reflex_log",
+    "runQuarterlySurgeRotation": "surge_loop:run_quarterly_surge_rotation",
+    "generateLoyaltyCoachHints": "reflex_loop:generate_loyalty_coach_hints",
 
     "bundleDeployKit": bundleDeployKit,
     "switchDomain": switchDomain,
@@ -252,18 +273,61 @@ COMMANDS = {
     "lockTrustDeploy": lockTrustDeploy,
     "alignMainPortalUI": alignMainPortalUI,
     "registerLoungeConfig": registerLoungeConfig,
+    "registerLoungeConfigsBulk": registerLoungeConfigsBulk,
     "pushPressKit": pushPressKit,
     "releaseTeaserVideo": releaseTeaserVideo
-}
+}, wrap=METRICS.wrap)
+
+if os.environ.get("HOOKAHPLUS_EAGER_COMMANDS"):
+    COMMANDS.preload()
+
+
+def run_batch_cli(argv):
+    """Run many commands from a file (or ``-`` for stdin) in this one process."""
+    import argparse
+    import json
+    import time
+    from command_batch import parse_batch, run_batch, summarize
+
+    parser = argparse.ArgumentParser(prog=f"python {sys.argv[0]} --batch")
+    parser.add_argument("source", nargs="?", default="-", help="batch file, or - for stdin")
+    parser.add_argument("--parallel", action="store_true",
+                        help="run the commands of each ---separated stage concurrently")
+    parser.add_argument("--workers", type=int, default=None, help="pool size per stage (with --parallel)")
+    parser.add_argument("--processes", action="store_true", help="use a process pool instead of threads")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    opts = parser.parse_args(argv)
+
+    if opts.source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(opts.source, "r") as f:
+            lines = f.read().splitlines()
+
+    start = time.perf_counter()
+    results = run_batch(parse_batch(lines), COMMANDS, workers=opts.workers, processes=opts.processes,
+                        out=None if opts.json else print, parallel=opts.parallel)
+    wall = time.perf_counter() - start
+    METRICS.flush()
+    if opts.json:
+        print(json.dumps({"results": results, "wall_seconds": wall}, indent=2, default=str))
+    else:
+        print(summarize(results, wall))
+    return 0 if all(r["ok"] for r in results) else 1
 
 
 # Optional: Run command from CLI
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         available = ", ".join(COMMANDS.keys())
-        print(f"Usage: python {sys.argv[0]} <command> [args...]\nAvailable commands: {available}")
+        print(f"Usage: python {sys.argv[0]} <command> [args...]\n"
+              f"       python {sys.argv[0]} --batch [file|-] [--parallel] [--workers N] [--processes] [--json]\n"
+              f"Available commands: {available}")
         sys.exit(1)
 
+    if sys.argv[1] == "--batch":
+        sys.exit(run_batch_cli(sys.argv[2:]))
+
     cmd_name = sys.argv[1]
     args = sys.argv[2:]
     cmd_func = COMMANDS.get(cmd_name)
@@ -275,5 +339,8 @@ if __name__ == "__main__":
             print(f"  - {name}")
         sys.exit(1)
 
-    result = cmd_func(*args)
+    try:
+        result = cmd_func(*args)
+    finally:
+        METRICS.flush()
     print(result)
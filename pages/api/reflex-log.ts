@@ -2,12 +2,60 @@ import type { NextApiRequest, NextApiResponse } from 'next';
 import fs from 'fs';
 import path from 'path';
 
+type Segment = {
+  name: string;
+  count: number;
+  bytes: number;
+  first: number | null;
+  last: number | null;
+  types: Record<string, number>;
+};
+
+// Events live in the segmented store written by cmd/modules/reflex_event_store.py;
+// ReflexLog.json is only read until it has been migrated.
+function readStore(storeDir: string, type?: string, since?: number, until?: number) {
+  const manifest = JSON.parse(fs.readFileSync(path.join(storeDir, 'manifest.json'), 'utf8'));
+  const events: any[] = [];
+  for (const segment of manifest.segments as Segment[]) {
+    if (!segment.count || (type && !segment.types[type])) continue;
+    if (since !== undefined && segment.last !== null && segment.last < since) continue;
+    if (until !== undefined && segment.first !== null && segment.first >= until) continue;
+    // Only the committed bytes: anything past them is an interrupted append.
+    const raw = fs.readFileSync(path.join(storeDir, segment.name)).subarray(0, segment.bytes).toString('utf8');
+    for (const line of raw.split('\n')) {
+      if (line) events.push(JSON.parse(line));
+    }
+  }
+  return events;
+}
+
 export default function handler(
-  _req: NextApiRequest,
+  req: NextApiRequest,
   res: NextApiResponse
 ) {
-  const filePath = path.join(process.cwd(), 'data', 'ReflexLog.json');
-  const raw = fs.readFileSync(filePath, 'utf8');
-  const events = JSON.parse(raw);
+  const type = typeof req.query.type === 'string' ? req.query.type : undefined;
+  const since = typeof req.query.since === 'string' ? Date.parse(req.query.since) / 1000 : undefined;
+  const until = typeof req.query.until === 'string' ? Date.parse(req.query.until) / 1000 : undefined;
+  // An unparsable bound is NaN, which would silently filter out every event.
+  for (const [name, value] of [['since', since], ['until', until]] as const) {
+    if (Number.isNaN(value)) {
+      res.status(400).json({ error: `Invalid ${name}: expected an ISO 8601 date` });
+      return;
+    }
+  }
+  const storeDir = path.join(process.cwd(), 'data', 'reflex_log');
+  let events: any[];
+  if (fs.existsSync(path.join(storeDir, 'manifest.json'))) {
+    events = readStore(storeDir, type, since, until);
+  } else {
+    const filePath = path.join(process.cwd(), 'data', 'ReflexLog.json');
+    events = JSON.parse(fs.readFileSync(filePath, 'utf8'));
+  }
+  events = events.filter((event) => {
+    const at = Date.parse(event.timestamp) / 1000;
+    return (!type || event.type === type)
+      && (since === undefined || at >= since)
+      && (until === undefined || at < until);
+  });
   res.status(200).json(events);
 }
@@ -0,0 +1,59 @@
+"""Compare eager vs lazy command-registry startup for cmd_dispatcher.py.
+
+Each run launches ``python cmd_dispatcher.py <command>`` as a fresh
+process, the way the Node scripts do, once with the lazy registry and once
+with HOOKAHPLUS_EAGER_COMMANDS=1 (every module imported up front), and
+reports the median and p90 wall time of each.
+
+    python scripts/bench_dispatcher_startup.py --runs 30 --command switchDomain
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DISPATCHER = os.path.join(ROOT, "cmd_dispatcher.py")
+
+
+def time_runs(command, runs, eager):
+    env = dict(os.environ)
+    env.pop("HOOKAHPLUS_EAGER_COMMANDS", None)
+    if eager:
+        env["HOOKAHPLUS_EAGER_COMMANDS"] = "1"
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, DISPATCHER, command], cwd=ROOT, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples) * 1e3,
+        "p90_ms": samples[min(len(samples) - 1, int(len(samples) * 0.9))] * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--command", default="switchDomain")
+    args = parser.parse_args()
+
+    # Warm the OS page cache and __pycache__ before measuring.
+    time_runs(args.command, 2, eager=True)
+
+    eager = time_runs(args.command, args.runs, eager=True)
+    lazy = time_runs(args.command, args.runs, eager=False)
+    print(f"cmd_dispatcher.py {args.command} x{args.runs}")
+    print(f"  eager: median {eager['median_ms']:7.1f} ms  p90 {eager['p90_ms']:7.1f} ms")
+    print(f"  lazy:  median {lazy['median_ms']:7.1f} ms  p90 {lazy['p90_ms']:7.1f} ms")
+    saved = eager["median_ms"] - lazy["median_ms"]
+    print(f"  lazy saves {saved:.1f} ms per invocation ({saved / eager['median_ms'] * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark the rolling flavor-usage aggregator at 10k checkout events/sec.
+
+Replays a synthetic stream of flavor events timestamped ``--rate`` per
+second: ``--warmup`` minutes of steady history, then ``--seconds`` of
+measured traffic with a "Peach + Mint" demand spike in its second half,
+feeding each event to FlavorUsageAggregator (1-minute recent window,
+3-minute baseline).
+Reports ingest throughput, the worst per-simulated-second processing time
+against the one-second budget, and how long computing price nudges takes.
+
+    python scripts/bench_flavor_usage.py
+    python scripts/bench_flavor_usage.py --rate 10000 --seconds 120 --warmup 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+MODULE_PATH = os.path.join(os.path.dirname(__file__), "..", "cmd", "modules")
+if MODULE_PATH not in sys.path:
+    sys.path.insert(0, MODULE_PATH)
+
+from flavor_usage import FlavorUsageAggregator  # noqa: E402
+
+FLAVORS = ["Peach", "Mint", "Double Apple", "Blue Mist", "Mint Blast", "Grape Burst", "Citrus Chill", "Lemon"]
+
+
+def make_second(start, second, rate, spike):
+    """Build one simulated second of events as the webhook path would log them."""
+    events = []
+    for i in range(rate):
+        at = start + timedelta(seconds=second + i / rate)
+        if spike and random.random() < 0.3:
+            combo = "Peach + Mint"
+        else:
+            combo = " + ".join(random.sample(FLAVORS, random.choice((1, 2))))
+        events.append({"timestamp": at.isoformat(), "flavor_combo": combo, "surge_active": False})
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=10000, help="events per simulated second")
+    parser.add_argument("--seconds", type=int, default=60, help="simulated seconds to replay")
+    parser.add_argument("--warmup", type=int, default=2, help="minutes of history fed before measuring")
+    args = parser.parse_args()
+
+    random.seed(7)
+    aggregator = FlavorUsageAggregator(bucket="minute", recent_buckets=1, baseline_buckets=3)
+    start = datetime.utcnow() - timedelta(seconds=args.seconds)
+    for second in range(-60 * args.warmup, 0):
+        aggregator.consume(make_second(start, second, args.rate, spike=False))
+    worst = total = 0.0
+    for second in range(args.seconds):
+        events = make_second(start, second, args.rate, spike=second >= args.seconds // 2)
+        began = time.perf_counter()
+        aggregator.consume(events)
+        elapsed = time.perf_counter() - began
+        worst = max(worst, elapsed)
+        total += elapsed
+
+    end = (start + timedelta(seconds=args.seconds)).replace(tzinfo=timezone.utc).timestamp()
+    began = time.perf_counter()
+    nudges = aggregator.nudges(now=end)
+    nudge_ms = (time.perf_counter() - began) * 1e3
+
+    count = args.rate * args.seconds
+    print(f"flavor usage: {count} events at {args.rate}/s simulated after {args.warmup} min of history")
+    print(f"  ingest: {count / total:,.0f} events/s ({total / count * 1e6:.2f} µs/event)")
+    print(f"  worst simulated second: {worst * 1e3:.1f} ms of the 1000 ms budget "
+          f"({'OK' if worst < 1.0 else 'FALLING BEHIND'})")
+    print(f"  nudges for {len(nudges)} flavors in {nudge_ms:.2f} ms")
+    for flavor, (ratio, factor) in sorted(nudges.items(), key=lambda item: -item[1][1])[:4]:
+        print(f"    {flavor:<14} usage x{ratio:.2f} -> price {factor:+.1%}")
+
+
+if __name__ == "__main__":
+    main()
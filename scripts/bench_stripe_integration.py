@@ -0,0 +1,221 @@
+"""Benchmark the stripe_integration hot paths at realistic log sizes.
+
+For each size, synthetic flavor, surge and loyalty logs are written into a
+scratch directory, then inject_flavor_metadata_stripe,
+attach_loyalty_to_stripe_events and add_surge_addon_to_stripe_price are
+timed call by call. Results (latency percentiles and ops/sec) are saved as
+JSON; pass --compare with an earlier file to print the change per path.
+
+    python scripts/bench_stripe_integration.py
+    python scripts/bench_stripe_integration.py --sizes 1000,100000 --compare bench_results/old.json
+    python scripts/bench_stripe_integration.py --legacy --sizes 1000   # YAML rewrite paths
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import yaml
+
+MODULE_PATH = os.path.join(os.path.dirname(__file__), "..", "cmd", "modules")
+if MODULE_PATH not in sys.path:
+    sys.path.insert(0, MODULE_PATH)
+
+import stripe_integration  # noqa: E402
+from loyalty_ledger import LoyaltyLedger  # noqa: E402
+
+FLAVORS = ["Peach + Mint", "Double Apple", "Blue Mist", "Mint Blast", "Grape Burst", "Citrus Chill"]
+HOT_PATHS = ("inject_flavor_metadata_stripe", "attach_loyalty_to_stripe_events", "add_surge_addon_to_stripe_price")
+
+
+def _configure(base_dir, legacy):
+    si = stripe_integration
+    si._ledgers.clear()
+    si._surge_tables.clear()
+    si.BASE_DIR = base_dir
+    si.FLAVOR_LOG_PATH = os.path.join(base_dir, "StripeFlavorLog.yaml")
+    si.FLAVOR_JOURNAL_PATH = os.path.join(base_dir, "StripeFlavorLog.journal.jsonl")
+    si.CHECKOUT_METADATA_PATH = os.path.join(base_dir, "checkout_session_metadata.json")
+    si.LOYALTY_VAULT_PATH = os.path.join(base_dir, "ReflexLoyalty_Vault.yaml")
+    si.LOYALTY_LEDGER_PATH = os.path.join(base_dir, "ReflexLoyalty_Ledger.sqlite3")
+    si.SURGE_PRICING_PATH = os.path.join(base_dir, "StripeSurgePricing.json")
+    si.SURGE_LOG_PATH = os.path.join(base_dir, "SurgeLog_WeekendPeachMint.yaml")
+    si.SURGE_JOURNAL_PATH = os.path.join(base_dir, "SurgeLog_WeekendPeachMint.journal.jsonl")
+    si.FLAVOR_LOG_MODE = "yaml" if legacy else "journal"
+    si.LOYALTY_BACKEND = "yaml" if legacy else "sqlite"
+    si.SURGE_PRICING_MODE = "file" if legacy else "memory"
+
+
+def _synthetic_events(size, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    for i in range(size):
+        ts = (start + timedelta(seconds=i * 30)).isoformat()
+        flavor = rng.choice(FLAVORS)
+        surge = rng.random() < 0.3
+        yield i, ts, flavor, surge, rng
+
+
+def seed_logs(base_dir, size, legacy):
+    """Stream ``size`` synthetic entries into each log in the active storage format."""
+    si = stripe_integration
+    if legacy:
+        dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        # A YAML sequence can be written item by item, so nothing is held in memory.
+        encode = lambda record: yaml.dump([record], Dumper=dumper)  # noqa: E731
+        flavor_path, surge_path = si.FLAVOR_LOG_PATH, si.SURGE_LOG_PATH
+    else:
+        encode = lambda record: json.dumps(record, separators=(",", ":")) + "\n"  # noqa: E731
+        flavor_path, surge_path = si.FLAVOR_JOURNAL_PATH, si.SURGE_JOURNAL_PATH
+
+    ledger = None if legacy else LoyaltyLedger(si.LOYALTY_LEDGER_PATH)
+    vault = open(si.LOYALTY_VAULT_PATH, "w") if legacy else None
+    if vault:
+        vault.write("transactions:\n")
+    latest_prices = {}
+    batch = []
+    with open(flavor_path, "w") as flavor_log, open(surge_path, "w") as surge_log:
+        for i, ts, flavor, surge, rng in _synthetic_events(size):
+            flavor_log.write(encode({"timestamp": ts, "flavor_combo": flavor, "surge_active": surge}))
+            base = round(rng.uniform(20, 40), 2)
+            surge_price = base + (3 if surge else 0)
+            latest_prices[flavor] = surge_price
+            surge_log.write(encode({"flavor": flavor, "base_price": base, "surge_price": surge_price,
+                                    "weekend": surge, "timestamp": ts}))
+            amount = round(rng.uniform(20, 120), 2)
+            tx = {"user": f"user-{i % 5000}", "amount": amount, "trust_arc": 7.5,
+                  "loyalty_gain": round(amount * 0.1, 2), "surge_active": surge, "timestamp": ts}
+            if vault:
+                vault.write(encode(tx))
+            else:
+                batch.append(tx)
+                if len(batch) >= 50000:
+                    ledger.record_many(batch)
+                    batch = []
+
+    if ledger:
+        ledger.record_many(batch)
+        ledger.close()
+    if vault:
+        vault.close()
+    with open(si.SURGE_PRICING_PATH, "w") as f:
+        json.dump(latest_prices, f)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        "iterations": iterations,
+        "mean_ms": total / iterations * 1e3,
+        "p50_ms": _percentile(samples, 50) * 1e3,
+        "p90_ms": _percentile(samples, 90) * 1e3,
+        "p99_ms": _percentile(samples, 99) * 1e3,
+        "max_ms": samples[-1] * 1e3,
+        "ops_per_sec": iterations / total if total else float("inf"),
+    }
+
+
+def bench_size(size, iterations, legacy):
+    si = stripe_integration
+    base_dir = tempfile.mkdtemp(prefix="hplus-bench-")
+    try:
+        _configure(base_dir, legacy)
+        start = time.perf_counter()
+        seed_logs(base_dir, size, legacy)
+        seed_seconds = time.perf_counter() - start
+
+        hot_paths = {
+            "inject_flavor_metadata_stripe": lambda i: si.inject_flavor_metadata_stripe(FLAVORS[i % len(FLAVORS)], i % 3 == 0),
+            "attach_loyalty_to_stripe_events": lambda i: si.attach_loyalty_to_stripe_events(f"user-{i % 5000}", 42.0, 8.0, i % 2 == 0),
+            "add_surge_addon_to_stripe_price": lambda i: si.add_surge_addon_to_stripe_price(FLAVORS[i % len(FLAVORS)], 30.0),
+        }
+        results = {"size": size, "seed_seconds": seed_seconds, "paths": {}}
+        for name in HOT_PATHS:
+            results["paths"][name] = time_calls(hot_paths[name], iterations)
+        si.flush_surge_pricing()
+        return results
+    finally:
+        for table in si._surge_tables.values():
+            table._stop_event.set()
+        for ledger in si._ledgers.values():
+            ledger.close()
+        si._ledgers.clear()
+        si._surge_tables.clear()
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def compare(current, previous):
+    old = {(r["size"], name): stats for r in previous["results"] for name, stats in r["paths"].items()}
+    print("\nChange vs previous run (p50 latency):")
+    for result in current["results"]:
+        for name, stats in result["paths"].items():
+            before = old.get((result["size"], name))
+            if not before:
+                continue
+            delta = (stats["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0.0
+            print(f"  {result['size']:>9,} {name:<34} {before['p50_ms']:8.3f} -> {stats['p50_ms']:8.3f} ms ({delta:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="comma-separated log sizes")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per hot path")
+    parser.add_argument("--legacy", action="store_true", help="benchmark the YAML rewrite backends")
+    parser.add_argument("--output", help="results file (default: bench_results/stripe_integration-<utc>.json)")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    report = {
+        "benchmark": "stripe_integration",
+        "created_at": datetime.utcnow().isoformat(),
+        "mode": "legacy" if args.legacy else "current",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "results": [],
+    }
+
+    for size in sizes:
+        result = bench_size(size, args.iterations, args.legacy)
+        report["results"].append(result)
+        print(f"size={size:,} (seeded in {result['seed_seconds']:.1f}s)")
+        for name, stats in result["paths"].items():
+            print(f"  {name:<34} p50 {stats['p50_ms']:8.3f} ms  p99 {stats['p99_ms']:8.3f} ms  "
+                  f"{stats['ops_per_sec']:10.0f} ops/s")
+
+    output = args.output or os.path.join(
+        "bench_results", f"stripe_integration-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
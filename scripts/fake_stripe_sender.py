@@ -0,0 +1,174 @@
+"""Local fake Stripe sender for the webhook ingestion service.
+
+Fires Stripe-style ``checkout.session.completed`` events at
+``cmd/modules/stripe_webhook_server.py`` over loopback keep-alive
+connections, backing off when the server answers 503, then prints the
+server's /stats. With --self-host the server runs in-process against a
+scratch data dir and the persisted flavor/loyalty counts are checked.
+
+    python scripts/fake_stripe_sender.py --self-host --count 5000
+    python scripts/fake_stripe_sender.py --port 8787 --count 1000 --secret whsec_test
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+MODULE_PATH = os.path.join(os.path.dirname(__file__), "..", "cmd", "modules")
+if MODULE_PATH not in sys.path:
+    sys.path.insert(0, MODULE_PATH)
+
+import stripe_integration  # noqa: E402
+from stripe_webhook_server import WebhookIngestionServer, sign_payload  # noqa: E402
+
+FLAVORS = ["Peach + Mint", "Double Apple", "Blue Mist", "Mint Blast"]
+
+
+def fake_event(i, rng):
+    flavor = rng.choice(FLAVORS)
+    return {
+        "id": f"evt_fake_{i}",
+        "type": "checkout.session.completed",
+        "data": {
+            "object": {
+                "id": f"cs_fake_{i}",
+                "amount_total": rng.randint(2000, 9000),
+                "customer": f"cus_{i % 200}",
+                "metadata": {
+                    "flavor_combo": flavor,
+                    "surge_active": str(rng.random() < 0.3).lower(),
+                    "trust_arc": str(round(rng.uniform(5.0, 9.5), 1)),
+                    "base_price": "30",
+                },
+            }
+        },
+    }
+
+
+async def _request(reader, writer, method, path, body=b"", headers=None):
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+    lines.extend(f"{k}: {v}" for k, v in (headers or {}).items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    payload = await reader.readexactly(length)
+    return status, json.loads(payload) if payload else None
+
+
+async def _sender(host, port, events, secret, counters):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for event in events:
+            body = json.dumps(event).encode("utf-8")
+            while True:
+                headers = {"Content-Type": "application/json"}
+                if secret:
+                    headers["Stripe-Signature"] = sign_payload(body, secret)
+                status, _ = await _request(reader, writer, "POST", "/webhook", body, headers)
+                if status != 503:
+                    counters[status] = counters.get(status, 0) + 1
+                    break
+                counters["backoffs"] = counters.get("backoffs", 0) + 1
+                await asyncio.sleep(0.01)
+    finally:
+        writer.close()
+
+
+async def send_fake_events(host, port, count, concurrency=8, secret=None, seed=7):
+    """Send ``count`` fake events over ``concurrency`` connections; returns counters and /stats."""
+    rng = random.Random(seed)
+    events = [fake_event(i, rng) for i in range(count)]
+    counters = {}
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_sender(host, port, events[n::concurrency], secret, counters) for n in range(concurrency))
+    )
+    elapsed = time.perf_counter() - start
+    reader, writer = await asyncio.open_connection(host, port)
+    _, stats = await _request(reader, writer, "GET", "/stats", headers={"Connection": "close"})
+    writer.close()
+    return {"sent": count, "elapsed_seconds": elapsed, "requests_per_second": count / elapsed,
+            "responses": counters, "server": stats}
+
+
+def _use_scratch_dir():
+    base_dir = tempfile.mkdtemp(prefix="hplus-webhook-")
+    si = stripe_integration
+    si.BASE_DIR = base_dir
+    si.FLAVOR_LOG_PATH = os.path.join(base_dir, "StripeFlavorLog.yaml")
+    si.FLAVOR_JOURNAL_PATH = os.path.join(base_dir, "StripeFlavorLog.journal.jsonl")
+    si.CHECKOUT_METADATA_PATH = os.path.join(base_dir, "checkout_session_metadata.json")
+    si.LOYALTY_VAULT_PATH = os.path.join(base_dir, "ReflexLoyalty_Vault.yaml")
+    si.LOYALTY_LEDGER_PATH = os.path.join(base_dir, "ReflexLoyalty_Ledger.sqlite3")
+    si.SURGE_PRICING_PATH = os.path.join(base_dir, "StripeSurgePricing.json")
+    si.SURGE_LOG_PATH = os.path.join(base_dir, "SurgeLog_WeekendPeachMint.yaml")
+    si.SURGE_JOURNAL_PATH = os.path.join(base_dir, "SurgeLog_WeekendPeachMint.journal.jsonl")
+    return base_dir
+
+
+async def self_hosted(args):
+    base_dir = _use_scratch_dir()
+    server = await WebhookIngestionServer(
+        port=0, queue_size=args.queue_size, batch_size=args.batch_size, webhook_secret=args.secret
+    ).start()
+    report = await send_fake_events(server.host, server.port, args.count, args.concurrency, args.secret)
+    await server.stop(drain=True)
+    report["server"] = server.stats()
+
+    rng = random.Random(7)
+    expected_loyalty = sum(
+        1 for i in range(args.count)
+        if float(fake_event(i, rng)["data"]["object"]["metadata"]["trust_arc"]) >= stripe_integration.TRUST_ARC_THRESHOLD
+    )
+    ledger = stripe_integration.get_loyalty_ledger()
+    report["check"] = {
+        "data_dir": base_dir,
+        "flavor_events": len(stripe_integration.load_flavor_log()),
+        "surge_entries": len(stripe_integration.load_surge_log()),
+        "loyalty_transactions": sum(len(ledger.history(user)) for user in ledger.balances()),
+        "expected_loyalty_transactions": expected_loyalty,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--secret", help="sign payloads like Stripe (must match STRIPE_WEBHOOK_SECRET)")
+    parser.add_argument("--self-host", action="store_true", help="run the server in-process on a scratch dir")
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.self_host:
+        report = asyncio.run(self_hosted(args))
+    else:
+        report = asyncio.run(send_fake_events(args.host, args.port, args.count, args.concurrency, args.secret))
+    print(json.dumps(report, indent=2))
+
+    if args.self_host:
+        check = report["check"]
+        ok = (check["flavor_events"] == args.count == check["surge_entries"]
+              and check["loyalty_transactions"] == check["expected_loyalty_transactions"])
+        print("OK: every event persisted" if ok else "FAIL: persisted counts do not match")
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
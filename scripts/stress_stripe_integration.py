@@ -0,0 +1,128 @@
+"""Concurrency stress test for cmd/modules/stripe_integration.py.
+
+Runs N worker processes that hammer the flavor, loyalty and surge writers
+against a scratch directory (plus one process compacting the flavor
+journal), then checks that every event landed exactly once.
+
+    python scripts/stress_stripe_integration.py --workers 8 --events 50
+    python scripts/stress_stripe_integration.py --legacy   # YAML rewrite paths
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+MODULE_PATH = os.path.join(os.path.dirname(__file__), "..", "cmd", "modules")
+if MODULE_PATH not in sys.path:
+    sys.path.insert(0, MODULE_PATH)
+
+import stripe_integration  # noqa: E402
+
+
+def _configure(base_dir, legacy):
+    si = stripe_integration
+    si.BASE_DIR = base_dir
+    si.FLAVOR_LOG_PATH = os.path.join(base_dir, "StripeFlavorLog.yaml")
+    si.FLAVOR_JOURNAL_PATH = os.path.join(base_dir, "StripeFlavorLog.journal.jsonl")
+    si.CHECKOUT_METADATA_PATH = os.path.join(base_dir, "checkout_session_metadata.json")
+    si.LOYALTY_VAULT_PATH = os.path.join(base_dir, "ReflexLoyalty_Vault.yaml")
+    si.LOYALTY_LEDGER_PATH = os.path.join(base_dir, "ReflexLoyalty_Ledger.sqlite3")
+    si.SURGE_PRICING_PATH = os.path.join(base_dir, "StripeSurgePricing.json")
+    si.SURGE_LOG_PATH = os.path.join(base_dir, "SurgeLog_WeekendPeachMint.yaml")
+    si.SURGE_JOURNAL_PATH = os.path.join(base_dir, "SurgeLog_WeekendPeachMint.journal.jsonl")
+    si.FLAVOR_LOG_MODE = "yaml" if legacy else "journal"
+    si.LOYALTY_BACKEND = "yaml" if legacy else "sqlite"
+    si.SURGE_PRICING_MODE = "file" if legacy else "memory"
+    si.JOURNAL_FSYNC = "never"
+
+
+def _worker(worker_id, events, base_dir, legacy):
+    _configure(base_dir, legacy)
+    si = stripe_integration
+    for i in range(events):
+        si.inject_flavor_metadata_stripe(f"Flavor-{worker_id}-{i}", surge_active=i % 2 == 0)
+        si.attach_loyalty_to_stripe_events(f"user-{worker_id}", 10.0, 8.0)
+        si.add_surge_addon_to_stripe_price(f"Flavor-{worker_id}-{i % 5}", 20.0)
+    # multiprocessing children skip atexit hooks, so flush write-behind state here.
+    si.flush_surge_pricing()
+
+
+def _compactor(base_dir, legacy, stop):
+    _configure(base_dir, legacy)
+    while not stop.is_set():
+        stripe_integration.compact_flavor_log()
+        stripe_integration.compact_surge_log()
+        time.sleep(0.2)
+
+
+def run(workers, events, legacy=False):
+    base_dir = tempfile.mkdtemp(prefix="hplus-stress-")
+    _configure(base_dir, legacy)
+
+    stop = multiprocessing.Event()
+    compactor = None
+    if not legacy:
+        compactor = multiprocessing.Process(target=_compactor, args=(base_dir, legacy, stop))
+        compactor.start()
+
+    start = time.perf_counter()
+    procs = [
+        multiprocessing.Process(target=_worker, args=(w, events, base_dir, legacy))
+        for w in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if compactor is not None:
+        compactor.join()
+
+    si = stripe_integration
+    expected = workers * events
+    flavors = si.load_flavor_log()
+    if legacy:
+        loyalty_count = len(si._load_yaml(si.LOYALTY_VAULT_PATH, {}).get("transactions", []))
+    else:
+        loyalty_count = sum(len(si.get_loyalty_history(f"user-{w}")) for w in range(workers))
+    surge_count = len(si.load_surge_log())
+    pricing = si.read_json(si.SURGE_PRICING_PATH, {})
+
+    failures = []
+    unique_flavors = len({e["flavor_combo"] for e in flavors})
+    if unique_flavors != expected:
+        failures.append(f"{expected - unique_flavors} flavor events lost")
+    if len(flavors) != expected:
+        failures.append(f"flavor log has {len(flavors)} events, expected {expected}")
+    if loyalty_count != expected:
+        failures.append(f"loyalty has {loyalty_count} transactions, expected {expected}")
+    if surge_count != expected:
+        failures.append(f"surge log has {surge_count} entries, expected {expected}")
+    if len(pricing) != workers * min(events, 5):
+        failures.append(f"surge pricing has {len(pricing)} flavors, expected {workers * min(events, 5)}")
+
+    mode = "legacy YAML" if legacy else "journal + ledger"
+    print(f"{mode}: {workers} workers x {events} events in {elapsed:.2f}s "
+          f"({expected * 3 / elapsed:.0f} writes/s) -> {base_dir}")
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    if not failures:
+        print("  OK: no events lost")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--legacy", action="store_true", help="stress the YAML rewrite backends")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.workers, args.events, args.legacy) else 1)
+
+
+if __name__ == "__main__":
+    main()